@@ -0,0 +1,143 @@
+# access_trace.py
+from enum import IntEnum
+import lzma
+import struct
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+import zlib
+
+class AccessKind(IntEnum):
+    FETCH = 0
+    LOAD = 1
+    STORE = 2
+
+class TraceRecord(NamedTuple):
+    cycle: int
+    pc: int        # Byte address of the instruction making the access
+    kind: AccessKind
+    address: int   # Byte address accessed: the fetch PC or the data address
+    value: int     # Word loaded or stored; 0 for fetches
+
+# File layout: a header, then fixed-width records, little-endian. With
+# compression the records are one zlib or lzma stream after the header.
+_MAGIC = b"MTR1"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBH")  # magic, version, compression, record size
+RECORD = struct.Struct("<QIIHBx")  # cycle, pc, address, value, kind
+COMPRESSION = {None: 0, "zlib": 1, "lzma": 2}
+_COMPRESSION_NAMES = {code: name for name, code in COMPRESSION.items()}
+_KINDS = tuple(AccessKind)
+
+def _compressor(name: Optional[str]):
+    if name == "zlib":
+        return zlib.compressobj(6)
+    if name == "lzma":
+        return lzma.LZMACompressor()
+    return None
+
+def _decompressor(name: Optional[str]):
+    if name == "zlib":
+        return zlib.decompressobj()
+    if name == "lzma":
+        return lzma.LZMADecompressor()
+    return None
+
+class TraceWriter:
+    """Streams memory-access records to a binary file.
+
+    Records are packed straight into a preallocated buffer and written (and
+    compressed) one full buffer at a time, so memory use stays constant no
+    matter how long the trace gets. Use as a context manager, or call
+    close() to write out the last partial buffer.
+    """
+
+    DEFAULT_BUFFER_RECORDS = 1 << 16
+
+    def __init__(self, path: str, compression: Optional[str] = None,
+                 buffer_records: int = DEFAULT_BUFFER_RECORDS):
+        if compression not in COMPRESSION:
+            raise ValueError(f"Unknown trace compression: {compression}")
+        self.path = path
+        self.compression = compression
+        self.records = 0
+        self._buffer = bytearray(RECORD.size * buffer_records)
+        self._view = memoryview(self._buffer)
+        self._offset = 0
+        self._compressor = _compressor(compression)
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, COMPRESSION[compression], RECORD.size))
+
+    def record(self, cycle: int, pc: int, kind: AccessKind, address: int, value: int) -> None:
+        RECORD.pack_into(self._buffer, self._offset, cycle, pc, address, value, kind)
+        self._offset += RECORD.size
+        self.records += 1
+        if self._offset == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out the buffered records."""
+        if not self._offset:
+            return
+        chunk = self._view[:self._offset]
+        self._file.write(self._compressor.compress(chunk) if self._compressor else chunk)
+        self._offset = 0
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.flush()
+        if self._compressor:
+            self._file.write(self._compressor.flush())
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> 'TraceWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def _decompressed_chunks(f: BinaryIO, decompressor, chunk_size: int) -> Iterator[bytes]:
+    # Output is capped at chunk_size per piece, so a highly compressed trace
+    # never expands into one huge buffer
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            return
+        if decompressor is None:
+            yield data
+            continue
+        while True:
+            yield decompressor.decompress(data, chunk_size)
+            if isinstance(decompressor, lzma.LZMADecompressor):
+                # lzma keeps unread input internally and asks for more once it is drained
+                if decompressor.needs_input or decompressor.eof:
+                    break
+                data = b""
+            else:
+                data = decompressor.unconsumed_tail
+                if not data:
+                    break
+
+def read_trace(path: str, chunk_size: int = 1 << 20) -> Iterator[TraceRecord]:
+    """Yield the records of a trace file one at a time, reading it in chunks.
+
+    Raises ValueError if the file is not a trace written by TraceWriter.
+    """
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{path}: not a memory access trace")
+        magic, version, compression, record_size = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION or record_size != RECORD.size \
+                or compression not in _COMPRESSION_NAMES:
+            raise ValueError(f"{path}: not a memory access trace of this version")
+        decompressor = _decompressor(_COMPRESSION_NAMES[compression])
+        pending = b""
+        for chunk in _decompressed_chunks(f, decompressor, chunk_size):
+            data = pending + chunk if pending else chunk
+            usable = len(data) - len(data) % RECORD.size
+            for cycle, pc, address, value, kind in RECORD.iter_unpack(memoryview(data)[:usable]):
+                yield TraceRecord(cycle, pc, _KINDS[kind], address, value)
+            pending = data[usable:]
+        if pending:
+            raise ValueError(f"{path}: truncated trace record")
@@ -0,0 +1,347 @@
+# assembler.py
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Dict, List, Optional, Tuple
+from decoder import Opcode, OPCODE_BY_NAME, MEMORY_OPERAND_PATTERN
+from register_data import REGISTER_INDEX
+
+TEXT_BASE_ADDRESS = 0x00400000
+# Identifies the IR layout and encoding rules; bump it whenever either changes so that
+# cached programs assembled by an older version are not reused
+ASSEMBLER_VERSION = 2
+
+class OperandKind(Enum):
+    REGISTER = auto()
+    IMMEDIATE = auto()
+    MEMORY = auto()  # offset(base)
+    LABEL = auto()
+
+@dataclass(frozen=True)
+class Operand:
+    kind: OperandKind
+    value: int = 0    # Register index, immediate value or memory offset
+    base: int = -1    # Base register index of a memory operand
+    label: str = ""   # Symbol name of a label operand
+
+@dataclass
+class IRInstruction:
+    slot: int                 # Instruction slot; the PC of this instruction is slot * 4
+    line: int                 # 1-based line number in the source text
+    op: Opcode
+    mnemonic: str = ""
+    operands: Tuple[Operand, ...] = ()
+    label: str = ""           # Label defined on this line, if any
+    source: str = ""          # Normalised text, as shown in instruction memory
+    error: str = ""           # Why the operands could not be assembled; the slot then runs as a NOP
+
+    @property
+    def address(self) -> str:
+        return f"0x{TEXT_BASE_ADDRESS + self.slot * 4:08X}"
+
+    def moved(self, slot: int, line: int) -> 'IRInstruction':
+        """Copy of this instruction placed at another slot and source line."""
+        return IRInstruction(slot, line, self.op, self.mnemonic, self.operands, self.label, self.source, self.error)
+
+_R, _I, _M, _L = OperandKind.REGISTER, OperandKind.IMMEDIATE, OperandKind.MEMORY, OperandKind.LABEL
+
+# Operand kinds of each instruction, in source order
+OPERAND_SIGNATURES: Dict[Opcode, Tuple[OperandKind, ...]] = {
+    Opcode.ADD: (_R, _R, _R),
+    Opcode.SUB: (_R, _R, _R),
+    Opcode.AND: (_R, _R, _R),
+    Opcode.OR: (_R, _R, _R),
+    Opcode.XOR: (_R, _R, _R),
+    Opcode.SLT: (_R, _R, _R),
+    Opcode.SLL: (_R, _R, _I),
+    Opcode.SRL: (_R, _R, _I),
+    Opcode.ADDI: (_R, _R, _I),
+    Opcode.ANDI: (_R, _R, _I),
+    Opcode.ORI: (_R, _R, _I),
+    Opcode.LI: (_R, _I),
+    Opcode.LW: (_R, _M),
+    Opcode.SW: (_R, _M),
+    Opcode.BEQ: (_R, _R, _L),
+    Opcode.BNE: (_R, _R, _L),
+    Opcode.J: (_L,),
+    Opcode.JAL: (_L,),
+    Opcode.JR: (_R,),
+    Opcode.SYSCALL: (),
+}
+
+@dataclass
+class Program:
+    """Assembled program: typed instructions, symbol tables and the data image."""
+    instructions: List[IRInstruction] = field(default_factory=list)
+    symbols: Dict[str, int] = field(default_factory=dict)     # Label -> instruction slot
+    labels_at: Dict[int, str] = field(default_factory=dict)   # Instruction slot -> label
+    data: Dict[str, int] = field(default_factory=dict)        # .data variable -> initial value, in order
+
+    def address_of(self, label: str) -> int:
+        """Byte address (PC value) of a text label."""
+        return self.symbols[label] * 4
+
+    def rewrite(self, slot: int, text: str) -> bool:
+        """Re-assemble one instruction slot in place. Returns True if the symbol table changed."""
+        old = self.instructions[slot]
+        new = assemble_line(text, slot, old.line)
+        self.instructions[slot] = new
+        if old.label == new.label:
+            return False
+        if old.label and self.symbols.get(old.label) == slot:
+            del self.symbols[old.label]
+            del self.labels_at[slot]
+            # An earlier definition of the same label becomes visible again
+            for instruction in reversed(self.instructions):
+                if instruction.label == old.label:
+                    self.symbols[old.label] = instruction.slot
+                    self.labels_at[instruction.slot] = old.label
+                    break
+        if new.label and self.symbols.get(new.label, -1) < slot:
+            # A later definition of the same label still wins
+            self._define(new.label, slot)
+        return True
+
+    def copy(self) -> 'Program':
+        """Shallow copy that later in-place updates of this Program do not affect."""
+        return Program(list(self.instructions), dict(self.symbols), dict(self.labels_at), dict(self.data))
+
+    def rebuild_symbols(self) -> None:
+        """Recompute the symbol table and reverse index from the instructions' labels."""
+        self.symbols.clear()
+        self.labels_at.clear()
+        for instruction in self.instructions:
+            if instruction.label:
+                self._define(instruction.label, instruction.slot)
+
+    def _define(self, label: str, slot: int) -> None:
+        # The last definition of a label wins
+        previous = self.symbols.get(label)
+        if previous is not None and self.labels_at.get(previous) == label:
+            del self.labels_at[previous]
+        self.symbols[label] = slot
+        self.labels_at[slot] = label
+
+def _normalise_token(token: str) -> str:
+    # Hex and negative literals are shown in decimal, as instruction memory always has
+    lowered = token.lower()
+    if lowered.startswith(("0x", "-0x")) or (token.startswith("-") and not token[1:].isalpha()):
+        try:
+            return str(int(token, 16) if lowered.lstrip("-").startswith("0x") else int(token))
+        except ValueError:
+            pass
+    return token
+
+def _register(name: str) -> Operand:
+    index = REGISTER_INDEX.get(name)
+    if index is None:
+        raise ValueError(f"Register {name} not found")
+    return Operand(OperandKind.REGISTER, index)
+
+def _immediate(text: str) -> Operand:
+    try:
+        return Operand(OperandKind.IMMEDIATE, int(text, 16) if text.lower().lstrip("-").startswith("0x") else int(text))
+    except ValueError:
+        raise ValueError(f"Invalid immediate value {text}")
+
+def _memory(text: str) -> Operand:
+    match = MEMORY_OPERAND_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid memory operand {text}")
+    return Operand(OperandKind.MEMORY, int(match.group(1)), _register(match.group(2)).value)
+
+_OPERAND_PARSERS = {
+    OperandKind.REGISTER: _register,
+    OperandKind.IMMEDIATE: _immediate,
+    OperandKind.MEMORY: _memory,
+    OperandKind.LABEL: lambda text: Operand(OperandKind.LABEL, label=text),
+}
+
+def assemble_line(text: str, slot: int = 0, line: int = 0) -> IRInstruction:
+    """Assemble one line of the text section.
+
+    Malformed operands do not raise: the error is kept on the instruction and
+    reported when it is decoded. Unknown mnemonics assemble to NOPs, which is
+    how label-only lines occupy their slot too.
+    """
+    text = text.split('#')[0].strip()
+    label = ""
+    if ':' in text:
+        label, text = (part.strip() for part in text.split(':', 1))
+    tokens = [_normalise_token(token) for token in text.replace(",", " ").split()]
+    source = " ".join(tokens)
+    if label:
+        source = f"{label}: {source}" if source else f"{label}:"
+
+    if not tokens:
+        return IRInstruction(slot, line, Opcode.NOP, label=label, source=source)
+    op = OPCODE_BY_NAME.get(tokens[0])
+    if op is None:
+        return IRInstruction(slot, line, Opcode.NOP, tokens[0], label=label, source=source)
+
+    instruction = IRInstruction(slot, line, op, tokens[0], label=label, source=source)
+    signature = OPERAND_SIGNATURES[op]
+    try:
+        if len(tokens) != len(signature) + 1:
+            raise ValueError(f"'{tokens[0]}' expects {len(signature)} operand(s), got {len(tokens) - 1}")
+        instruction.operands = tuple(_OPERAND_PARSERS[kind](token) for kind, token in zip(signature, tokens[1:]))
+        if op in (Opcode.SLL, Opcode.SRL) and instruction.operands[2].value < 0:
+            raise ValueError(f"Invalid shift amount: {tokens[3]}")
+    except ValueError as e:
+        instruction.operands = ()
+        instruction.error = str(e)
+    return instruction
+
+def _parse_data_line(text: str) -> Optional[Tuple[str, int]]:
+    """(name, value) for a "name: .word value" line, None for anything else."""
+    if ":" not in text or ".word" not in text:
+        return None
+    name, value_part = text.split(":", 1)
+    value_part = value_part.split()
+    if len(value_part) < 2 or value_part[0] != ".word":
+        return None
+    try:
+        value = int(value_part[1], 16) if value_part[1].lower().startswith("0x") else int(value_part[1])
+    except ValueError:
+        return None
+    return name.strip(), value & 0xFFFF
+
+# Section state after each source line
+_TEXT, _PENDING, _DATA = "text", "pending", "data"
+
+class MIPSAssembler:
+    """Single-pass, incremental assembler from source text to a Program.
+
+    Each line is read once. .data lines go to the data image, text lines are
+    assembled into IRInstructions and labels are entered in the symbol table
+    as they are met; label operands are resolved against it when the program
+    is decoded, so forward references need no second pass. As before, text
+    after .text starts at main: when there is one, and every non-directive
+    line (labels included) occupies one instruction slot.
+
+    Assembled lines are cached by their text, and update() re-assembles only
+    the lines that differ from the previous source, patching the last Program
+    in place. Edits that touch .data, .text or the lines before main: fall
+    back to a full pass, which still reuses the line cache.
+    """
+
+    LINE_CACHE_LIMIT = 20000  # Distinct line texts kept before the cache is dropped
+
+    def __init__(self):
+        self.program: Optional[Program] = None  # Result of the last assemble() or update()
+        self._line_cache: Dict[str, IRInstruction] = {}  # Line text -> IR with slot and line unset
+        self._lines: List[str] = []          # Source lines of self.program
+        self._line_slots: List[int] = []     # Slot of each source line, -1 if it holds no instruction
+        self._state_after: List[str] = []    # Section state after each source line
+
+    def _assemble_line(self, text: str, slot: int, line: int) -> IRInstruction:
+        template = self._line_cache.get(text)
+        if template is None:
+            if len(self._line_cache) >= self.LINE_CACHE_LIMIT:
+                self._line_cache.clear()
+            template = self._line_cache[text] = assemble_line(text)
+        return template.moved(slot, line)
+
+    def assemble(self, code: str) -> Program:
+        """Assemble a whole source text into a new Program."""
+        program = Program()
+        instructions = program.instructions
+        lines = code.split('\n')
+        line_slots = [-1] * len(lines)
+        state_after = [_TEXT] * len(lines)
+        section = _TEXT
+        text_start = 0
+        for index, raw_line in enumerate(lines):
+            text = raw_line.strip()
+            if text == ".data":
+                section = _DATA
+            elif text == ".text":
+                # Text before main: is dropped once main: is found
+                section = _PENDING
+                text_start = len(instructions)
+            elif section == _DATA:
+                entry = _parse_data_line(text) if text else None
+                if entry:
+                    program.data[entry[0]] = entry[1]
+            elif text and not text.startswith(('.', ':')) and text.split('#')[0].strip():
+                if section == _PENDING and text == "main:":
+                    section = _TEXT
+                    for instruction in instructions[text_start:]:
+                        line_slots[instruction.line - 1] = -1
+                    del instructions[text_start:]
+                instruction = self._assemble_line(text, len(instructions), index + 1)
+                instructions.append(instruction)
+                line_slots[index] = instruction.slot
+            state_after[index] = section
+        program.rebuild_symbols()
+
+        self.program = program
+        self._lines, self._line_slots, self._state_after = lines, line_slots, state_after
+        return program
+
+    def update(self, code: str) -> Program:
+        """Bring the last Program up to date with code, re-assembling only changed lines."""
+        program = self.program
+        if program is None:
+            return self.assemble(code)
+        old_lines = self._lines
+        new_lines = code.split('\n')
+
+        # The edit is the region between the common prefix and the common suffix
+        limit = min(len(old_lines), len(new_lines))
+        start = 0
+        while start < limit and old_lines[start] == new_lines[start]:
+            start += 1
+        if start == len(old_lines) == len(new_lines):
+            return program
+        end = 0
+        while end < limit - start and old_lines[-1 - end] == new_lines[-1 - end]:
+            end += 1
+        old_end, new_end = len(old_lines) - end, len(new_lines) - end
+
+        # Only plain text-section edits can be patched; anything that moves a
+        # section boundary or main: is re-assembled in full
+        state_before = self._state_after[start - 1] if start else _TEXT
+        if (state_before != _TEXT
+                or any(state != _TEXT for state in self._state_after[start:old_end])
+                or any(line.strip() in (".data", ".text") for line in old_lines[start:old_end])
+                or any(line.strip() in (".data", ".text") for line in new_lines[start:new_end])):
+            return self.assemble(code)
+
+        old_slots = [slot for slot in self._line_slots[start:old_end] if slot >= 0]
+        # Instructions of the edited lines go where the first old one was, or
+        # before the first instruction that follows the edit
+        first_slot = next((slot for slot in self._line_slots[start:] if slot >= 0), len(program.instructions))
+        new_instructions = []
+        new_line_slots = []
+        for index in range(start, new_end):
+            text = new_lines[index].strip()
+            if text and not text.startswith(('.', ':')) and text.split('#')[0].strip():
+                slot = first_slot + len(new_instructions)
+                new_instructions.append(self._assemble_line(text, slot, index + 1))
+                new_line_slots.append(slot)
+            else:
+                new_line_slots.append(-1)
+
+        instructions = program.instructions
+        relabel = any(instructions[slot].label for slot in old_slots) or any(
+            instruction.label for instruction in new_instructions)
+        instructions[first_slot:first_slot + len(old_slots)] = new_instructions
+
+        # Renumber what follows the edit; instructions are replaced, never
+        # mutated, so copies handed out earlier stay valid
+        slot_shift = len(new_instructions) - len(old_slots)
+        line_shift = (new_end - start) - (old_end - start)
+        if slot_shift or line_shift:
+            for slot in range(first_slot + len(new_instructions), len(instructions)):
+                instruction = instructions[slot]
+                instructions[slot] = instruction.moved(slot, instruction.line + line_shift)
+        if relabel or slot_shift:
+            program.rebuild_symbols()
+
+        tail_slots = self._line_slots[old_end:]
+        if slot_shift:
+            tail_slots = [slot + slot_shift if slot >= 0 else -1 for slot in tail_slots]
+        self._line_slots = self._line_slots[:start] + new_line_slots + tail_slots
+        self._state_after = self._state_after[:start] + [_TEXT] * (new_end - start) + self._state_after[old_end:]
+        self._lines = new_lines
+        return program
@@ -0,0 +1,223 @@
+# batch.py
+"""Run many programs in parallel without the GUI, e.g. to grade submissions.
+
+Jobs go to a pool of worker processes that stay up for the whole batch,
+so imports and start-up are paid once per worker rather than per program.
+Each job has an instruction budget and a wall-clock timeout, both enforced
+inside the worker between slices of execution, so a runaway program ends
+its own job without taking the worker down. Optional expected register
+and memory values turn a finished run into "passed" or "failed".
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import csv
+from dataclasses import dataclass, field
+import glob
+import json
+import os
+import time
+from typing import Dict, List, Optional
+from block_engine import BlockEngine
+from console_log import LogLevel
+from memory import MemoryError
+from mips_sim import DATA_MEMORY_SIZE, DEFAULT_PREDICTOR, load_program
+from register_data import REGISTER_INDEX, REGISTER_NAMES
+
+DEFAULT_INSTRUCTION_BUDGET = 1_000_000
+DEFAULT_TIMEOUT = 10.0  # Seconds per job
+# Work done between deadline checks: cycles for the pipeline, instructions for the block engine
+_SLICE = {"pipeline": 4096, "block": 65536}
+MAX_ERRORS = 20  # Error messages kept per job; a failing load in a loop would repeat forever
+STATUSES = ("passed", "failed", "budget", "timeout", "error")
+CSV_FIELDS = ("program", "status", "instructions", "cycles", "seconds", "failures", "errors")
+
+@dataclass
+class BatchJob:
+    program: str  # Path of the assembly source
+    max_instructions: int = DEFAULT_INSTRUCTION_BUDGET
+    timeout: float = DEFAULT_TIMEOUT
+    # {"registers": {"R1": 53}, "memory": {"4": 53}}; memory keys are byte addresses into data memory
+    expect: Dict = field(default_factory=dict)
+    engine: str = "pipeline"
+    predictor: str = DEFAULT_PREDICTOR
+    memory_size: int = DATA_MEMORY_SIZE
+
+    def __post_init__(self):
+        if self.engine not in _SLICE:
+            raise ValueError(f"Unknown engine: {self.engine}")
+        _check_expect(self.expect)
+
+def _check_expect(expect) -> None:
+    """Raise ValueError unless expect maps "registers"/"memory" to dicts of int values."""
+    if not isinstance(expect, dict):
+        raise ValueError(f"expect must be an object, not {expect!r}")
+    for section, values in expect.items():
+        if section not in ("registers", "memory"):
+            raise ValueError(f"Unknown expect section: {section}")
+        if not isinstance(values, dict):
+            raise ValueError(f"expect {section} must be an object, not {values!r}")
+        for key, value in values.items():
+            if section == "memory":
+                try:
+                    int(key, 0) if isinstance(key, str) else int(key)
+                except (TypeError, ValueError):
+                    raise ValueError(f"expect memory address must be an integer, not {key!r}")
+            # bool is an int subclass, but true/false is surely a mistake here
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"expected value for {section} {key} must be an integer, not {value!r}")
+
+def check_expectations(executor, expect: Dict) -> List[str]:
+    """Compare the executor's registers and data memory with expected values.
+
+    Returns one message per mismatch. Expected values are taken modulo 2^16,
+    so negative numbers can be given as such.
+    """
+    failures = []
+    registers = executor.commands.registers
+    for name, value in expect.get("registers", {}).items():
+        index = REGISTER_INDEX.get(name.upper())
+        if index is None:
+            failures.append(f"unknown register {name}")
+        elif registers[index] != value & 0xFFFF:
+            failures.append(f"{REGISTER_NAMES[index]} is {registers[index]}, expected {value & 0xFFFF}")
+    memory = executor.memory
+    for address, value in expect.get("memory", {}).items():
+        byte_address = int(address, 0) if isinstance(address, str) else address
+        if byte_address % memory.config.word_size:
+            failures.append(f"address {address} is not word-aligned")
+            continue
+        try:
+            actual = memory.read_word(byte_address // memory.config.word_size)
+        except MemoryError:
+            failures.append(f"address {address} is outside data memory")
+            continue
+        if actual != value & 0xFFFF:
+            failures.append(f"memory[{address}] is {actual}, expected {value & 0xFFFF}")
+    return failures
+
+def _error_result(program: str, *errors: str) -> Dict:
+    return {"program": program, "status": "error", "instructions": 0, "cycles": None, "seconds": 0.0,
+            "failures": [], "errors": list(errors)}
+
+def run_job(job: BatchJob) -> Dict:
+    """Run one job to completion, budget or timeout; the worker-side entry point."""
+    start = time.perf_counter()
+    deadline = start + job.timeout
+    result = _error_result(job.program)
+    errors = result["errors"]
+
+    def log(message: str, level: LogLevel) -> None:
+        if level >= LogLevel.ERROR and len(errors) < MAX_ERRORS:
+            errors.append(message)
+
+    try:
+        with open(job.program, encoding="utf-8") as f:
+            code = f.read()
+        executor = load_program(code, log, job.predictor, memory_size=job.memory_size)
+        executor.live_updates = False
+        # Decode everything up front so that bad lines are reported even if never reached
+        executor.decode_program()
+        # Lines that fail to assemble or decode run as NOPs, so no result of the run can be trusted
+        status = "error" if errors else None
+        if job.engine == "block":
+            engine = BlockEngine(executor)
+            run, retired, finished = engine.run, lambda: engine.instructions_retired, engine.is_finished
+        else:
+            run, retired, finished = executor.run, lambda: executor.instructions_retired, executor.is_finished
+        slice_size = _SLICE[job.engine]
+        while status is None and not finished():
+            remaining = job.max_instructions - retired()
+            if remaining <= 0:
+                status = "budget"
+                break
+            if time.perf_counter() > deadline:
+                status = "timeout"
+                break
+            # A cycle retires at most one instruction, so this never overshoots the budget
+            run(min(slice_size, remaining))
+        if status is None:
+            result["failures"] = check_expectations(executor, job.expect)
+            status = "failed" if result["failures"] else "passed"
+        result["status"] = status
+        result["instructions"] = retired()
+        if job.engine == "pipeline":
+            result["cycles"] = executor.cycles
+        registers = executor.commands.registers
+        result["registers"] = {name: registers[index] for index, name in enumerate(REGISTER_NAMES)}
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        errors.append(str(e))
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+def _resolve(path: str, base: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(base, path)
+
+def load_jobs(source: str, defaults: Optional[Dict] = None) -> List[BatchJob]:
+    """Jobs for every .asm file in a directory, or for each entry of a JSON manifest.
+
+    A manifest is {"defaults": {...}, "jobs": [...]}, where each job is a
+    program path or an object with "program" and any BatchJob field;
+    relative paths are taken from the manifest's directory. defaults, e.g.
+    options given on the command line, override the manifest's "defaults"
+    but not the settings of individual jobs.
+    Raises ValueError on a malformed manifest.
+    """
+    if os.path.isdir(source):
+        return [BatchJob(program=path, **(defaults or {}))
+                for path in sorted(glob.glob(os.path.join(source, "*.asm")))]
+    with open(source, encoding="utf-8") as f:
+        try:
+            manifest = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{source}: {e}")
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("jobs"), list):
+        raise ValueError(f"{source}: a manifest needs a \"jobs\" list")
+    settings = dict(manifest.get("defaults", {}), **(defaults or {}))
+    base = os.path.dirname(source)
+    jobs = []
+    for entry in manifest["jobs"]:
+        fields = dict(settings, **(entry if isinstance(entry, dict) else {"program": entry}))
+        if "program" not in fields:
+            raise ValueError(f"{source}: job without a program: {entry}")
+        fields["program"] = _resolve(fields["program"], base)
+        try:
+            jobs.append(BatchJob(**fields))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{source}: {e}")
+    return jobs
+
+def run_batch(jobs: List[BatchJob], workers: Optional[int] = None) -> Dict:
+    """Run jobs across a process pool; results come back in job order."""
+    start = time.perf_counter()
+    results: List[Optional[Dict]] = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for index, future in enumerate(futures):
+            try:
+                results[index] = future.result()
+            except BrokenProcessPool as e:
+                # A worker died outright (e.g. killed for memory); the rest of the pool is gone too
+                results[index] = _error_result(jobs[index].program, str(e) or "worker died")
+            except Exception as e:
+                # A bug in one job must not cost the results of all the others
+                results[index] = _error_result(jobs[index].program, f"{type(e).__name__}: {e}")
+    summary = {status: 0 for status in STATUSES}
+    for result in results:
+        summary[result["status"]] += 1
+    summary["jobs"] = len(jobs)
+    summary["seconds"] = round(time.perf_counter() - start, 6)
+    return {"summary": summary, "results": results}
+
+def write_results(batch: Dict, path: str, indent: Optional[int] = None) -> None:
+    """Write merged results to path: one CSV row per job for .csv, JSON otherwise."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(CSV_FIELDS)
+            for result in batch["results"]:
+                writer.writerow([result["program"], result["status"], result["instructions"],
+                                 "" if result["cycles"] is None else result["cycles"], result["seconds"],
+                                 "; ".join(result["failures"]), "; ".join(result["errors"])])
+        else:
+            json.dump(batch, f, indent=indent)
+            f.write("\n")
@@ -0,0 +1,163 @@
+# block_engine.py
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from decoder import DecodedInstruction, Opcode
+from executor import MIPSExecutor
+from console_log import LogLevel
+
+# Expression templates for register-writing instructions; {s} and {t} are the
+# source register locals, {imm} the immediate
+_EXPRESSIONS: Dict[int, str] = {
+    Opcode.ADD: "({s} + {t}) & 0xFFFF",
+    Opcode.SUB: "({s} - {t}) & 0xFFFF",
+    Opcode.AND: "{s} & {t}",
+    Opcode.OR: "{s} | {t}",
+    Opcode.XOR: "{s} ^ {t}",
+    Opcode.SLT: "1 if {s} < {t} else 0",
+    Opcode.SLL: "({s} << {imm}) & 0xFFFF",
+    Opcode.SRL: "{s} >> {imm}",
+    Opcode.ADDI: "({s} + {imm}) & 0xFFFF",
+    Opcode.ANDI: "{s} & {imm} & 0xFFFF",
+    Opcode.ORI: "({s} | {imm}) & 0xFFFF",
+}
+
+_CONTROL_OPCODES = (Opcode.BEQ, Opcode.BNE, Opcode.J, Opcode.JAL, Opcode.JR)
+
+# A compiled block: (function(registers, memory words, dirty set, log) -> next slot, instructions in it)
+Block = Tuple[Callable[[list, list, Set[int], Callable[[str, LogLevel], None]], int], int]
+
+class BlockEngine:
+    """Functional engine that runs each basic block as one generated Python function.
+
+    Blocks start at the program entry, at every label and after every branch
+    or jump, and end at the next control instruction or label. Each block is
+    compiled on first use into straight-line code that keeps registers in
+    locals and writes them back on exit, so a block costs one call instead
+    of a dispatch per instruction. There is no pipeline timing here; use the
+    MIPSExecutor for cycle counts. The engine shares the executor's processor,
+    memory and decode cache, and must not be interleaved with executor.step().
+    """
+
+    def __init__(self, executor: MIPSExecutor):
+        self.executor = executor
+        self.blocks: Dict[int, Block] = {}
+        self._program_version = -1
+        self._leaders: Set[int] = set()
+        self.instructions_retired = 0
+        self.blocks_executed = 0
+
+    def _sync_program(self) -> None:
+        # Any rewrite of instruction memory drops every compiled block
+        executor = self.executor
+        if executor.program_version != self._program_version:
+            self.blocks.clear()
+            self._leaders = set(executor.labels.values())
+            self._program_version = executor.program_version
+
+    def is_finished(self) -> bool:
+        return not (0 <= self.executor.current_line < len(self.executor.instructions))
+
+    def run(self, max_instructions: Optional[int] = None) -> int:
+        """Run until the program leaves instruction memory or max_instructions
+        have retired; returns the number of instructions retired."""
+        self._sync_program()
+        executor = self.executor
+        registers = executor.commands.registers
+        words = executor.memory.memory
+        dirty = executor.memory.dirty_words
+        log = executor._log
+        count = len(executor.instructions)
+        blocks = self.blocks
+        slot = executor.current_line
+        retired = 0
+        executed = 0
+        while 0 <= slot < count:
+            block = blocks.get(slot)
+            if block is None:
+                block = blocks[slot] = self._compile(slot)
+            function, length = block
+            if max_instructions is not None and retired + length > max_instructions:
+                if retired == max_instructions:
+                    break
+                # Budget ends inside this block: run a truncated, uncached copy
+                function, length = self._compile(slot, max_instructions - retired)
+            slot = function(registers, words, dirty, log)
+            retired += length
+            executed += 1
+        executor.current_line = slot
+        self.instructions_retired += retired
+        self.blocks_executed += executed
+        return retired
+
+    def _block_records(self, start: int, limit: Optional[int]) -> Tuple[List[Tuple[int, DecodedInstruction]], int]:
+        """(slot, record) for each instruction of the block starting at start,
+        and the slot after its last one."""
+        executor = self.executor
+        records = []
+        slot = start
+        while slot < len(executor.instructions) and (limit is None or len(records) < limit):
+            if slot != start and slot in self._leaders:
+                break
+            record = executor.decode_slot(slot)
+            slot += 1
+            if record.op == Opcode.NOP:
+                continue
+            records.append((slot - 1, record))
+            if record.op in _CONTROL_OPCODES:
+                break
+        return records, slot
+
+    def _compile(self, start: int, limit: Optional[int] = None) -> Block:
+        records, fall_through = self._block_records(start, limit)
+        words = len(self.executor.memory.memory)
+        body: List[str] = []
+        used: Set[int] = set()
+        written: Set[int] = set()
+        exit_line = f"return {fall_through}"
+
+        for slot, record in records:
+            op = record.op
+            s, t, d = f"r{record.rs}", f"r{record.rt}", f"r{record.rd}"
+            if op in _EXPRESSIONS:
+                used.update(index for index in (record.rs, record.rt) if index >= 0)
+                body.append(f"{d} = " + _EXPRESSIONS[op].format(s=s, t=t, imm=record.imm))
+                written.add(record.rd)
+            elif op == Opcode.LI:
+                body.append(f"{d} = {record.imm & 0xFFFF}")
+                written.add(record.rd)
+            elif op in (Opcode.LW, Opcode.SW):
+                # The word index is static: the base register is not used
+                index = record.imm // 2
+                if not 0 <= index < words:
+                    verb = "reading from" if op == Opcode.LW else "writing to"
+                    message = (f"Error {verb} memory: Invalid memory access: "
+                               f"Memory access out of bounds at address: {index}")
+                    body.append(f"log({message!r}, {int(LogLevel.ERROR)})")
+                elif op == Opcode.LW:
+                    body.append(f"{d} = m[{index}]")
+                    written.add(record.rd)
+                else:
+                    used.add(record.rt)
+                    body.append(f"m[{index}] = {t}")
+                    body.append(f"dirty.add({index})")
+            elif op in (Opcode.BEQ, Opcode.BNE):
+                used.update((record.rs, record.rt))
+                compare = "==" if op == Opcode.BEQ else "!="
+                exit_line = f"return {record.target} if {s} {compare} {t} else {fall_through}"
+            elif op == Opcode.J:
+                exit_line = f"return {record.target}"
+            elif op == Opcode.JAL:
+                body.append(f"{d} = {(slot * 4 + 4) & 0xFFFF}")  # Return address
+                written.add(record.rd)
+                exit_line = f"return {record.target}"
+            elif op == Opcode.JR:
+                used.add(record.rs)
+                exit_line = f"return {s} // 4"
+
+        lines = ["def block(r, m, dirty, log):"]
+        lines.extend(f"    r{index} = r[{index}]" for index in sorted(used | written))
+        lines.extend(f"    {line}" for line in body)
+        lines.extend(f"    r[{index}] = r{index}" for index in sorted(written))
+        lines.append(f"    {exit_line}")
+        namespace: Dict[str, object] = {}
+        exec(compile("\n".join(lines), f"<block {start}>", "exec"), namespace)
+        return namespace["block"], len(records)
@@ -0,0 +1,161 @@
+# branch_predictor.py
+from typing import Dict, List, Optional
+
+class BranchPredictor:
+    """Base class for conditional branch (beq/bne) predictors.
+
+    The executor consults a predictor twice: predict_fetch() in IF, before the
+    instruction is decoded (only a BTB can answer there), and predict() in ID
+    once the branch and its target are known. The outcome is reported back
+    with update() when the branch resolves in EX.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget learned state and statistics."""
+        self.branch_stats: Dict[int, List[int]] = {}  # slot -> [executed, correct]
+        self.penalty_cycles = 0
+
+    def predict_fetch(self, slot: int) -> Optional[int]:
+        """Slot to fetch next if the instruction at slot is predicted taken, else None."""
+        return None
+
+    def predict(self, slot: int, target: int) -> bool:
+        """Direction prediction in ID for the branch at slot."""
+        return False
+
+    def update(self, slot: int, target: int, taken: bool) -> None:
+        """Train on the resolved outcome of the branch at slot."""
+
+    def record(self, slot: int, correct: bool, penalty: int) -> None:
+        stats = self.branch_stats.get(slot)
+        if stats is None:
+            stats = self.branch_stats[slot] = [0, 0]
+        stats[0] += 1
+        stats[1] += correct
+        self.penalty_cycles += penalty
+
+    def report(self, sources: Optional[List[str]] = None) -> Dict:
+        """Overall and per-branch accuracy, plus the flush cycles spent on branches."""
+        executed = sum(stats[0] for stats in self.branch_stats.values())
+        correct = sum(stats[1] for stats in self.branch_stats.values())
+        per_branch = {}
+        for slot, (count, hits) in sorted(self.branch_stats.items()):
+            per_branch[slot] = {
+                "source": sources[slot] if sources else "",
+                "executed": count,
+                "correct": hits,
+                "accuracy": hits / count
+            }
+        return {
+            "predictor": self.name,
+            "branches": executed,
+            "correct": correct,
+            "accuracy": correct / executed if executed else 0.0,
+            "flush_penalty_cycles": self.penalty_cycles,
+            "per_branch": per_branch
+        }
+
+class StaticNotTakenPredictor(BranchPredictor):
+    name = "not-taken"
+
+class StaticBackwardTakenPredictor(BranchPredictor):
+    """Backward branches (loops) taken, forward branches not taken."""
+
+    name = "backward-taken"
+
+    def predict(self, slot: int, target: int) -> bool:
+        return target <= slot
+
+class OneBitPredictor(BranchPredictor):
+    """Remembers the last outcome per table entry."""
+
+    name = "1-bit"
+
+    def __init__(self, entries: int = 64):
+        self.entries = entries
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.table = bytearray(self.entries)
+
+    def predict(self, slot: int, target: int) -> bool:
+        return bool(self.table[slot % self.entries])
+
+    def update(self, slot: int, target: int, taken: bool) -> None:
+        self.table[slot % self.entries] = taken
+
+class TwoBitPredictor(BranchPredictor):
+    """2-bit saturating counters; 0-1 predict not taken, 2-3 predict taken."""
+
+    name = "2-bit"
+
+    def __init__(self, entries: int = 64, initial: int = 1):
+        self.entries = entries
+        self.initial = initial
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.table = bytearray([self.initial]) * self.entries
+
+    def predict(self, slot: int, target: int) -> bool:
+        return self.table[slot % self.entries] >= 2
+
+    def update(self, slot: int, target: int, taken: bool) -> None:
+        index = slot % self.entries
+        counter = self.table[index]
+        self.table[index] = min(counter + 1, 3) if taken else max(counter - 1, 0)
+
+class BTBPredictor(BranchPredictor):
+    """Direct-mapped branch target buffer with a 2-bit counter per entry.
+
+    A hit on a taken-leaning entry redirects fetch in IF, so a correctly
+    predicted taken branch costs no bubbles at all. Misses fall through.
+    """
+
+    name = "btb"
+
+    def __init__(self, entries: int = 8):
+        self.entries = entries
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.tags = [-1] * self.entries
+        self.targets = [0] * self.entries
+        self.counters = bytearray(self.entries)
+
+    def predict_fetch(self, slot: int) -> Optional[int]:
+        index = slot % self.entries
+        if self.tags[index] == slot and self.counters[index] >= 2:
+            return self.targets[index]
+        return None
+
+    def update(self, slot: int, target: int, taken: bool) -> None:
+        index = slot % self.entries
+        if self.tags[index] != slot:
+            if not taken:
+                return  # Only taken branches are allocated
+            self.tags[index] = slot
+            self.counters[index] = 2
+        else:
+            counter = self.counters[index]
+            self.counters[index] = min(counter + 1, 3) if taken else max(counter - 1, 0)
+        self.targets[index] = target
+
+PREDICTORS = {
+    predictor.name: predictor
+    for predictor in (StaticNotTakenPredictor, StaticBackwardTakenPredictor, OneBitPredictor,
+                      TwoBitPredictor, BTBPredictor)
+}
+
+def create_predictor(name: str) -> BranchPredictor:
+    if name not in PREDICTORS:
+        raise ValueError(f"Unknown branch predictor: {name}")
+    return PREDICTORS[name]()
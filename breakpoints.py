@@ -0,0 +1,166 @@
+# breakpoints.py
+from enum import IntEnum
+import operator
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, TYPE_CHECKING
+from decoder import Opcode
+from register_data import REGISTER_INDEX, REGISTER_NAMES
+
+if TYPE_CHECKING:
+    from executor import MIPSExecutor
+
+WORD_SIZE = 2  # Watch addresses are byte offsets into data memory, as in access traces
+
+class StopReason(IntEnum):
+    BREAKPOINT = 0
+    READ_WATCH = 1
+    WRITE_WATCH = 2
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_CONDITION = re.compile(r"^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(-?\w+)\s*$")
+
+class RegisterCondition(NamedTuple):
+    register: int  # Index into the register file
+    op: str        # One of ==, !=, <, <=, >, >=
+    value: int     # Compared with the unsigned 16-bit register value
+
+    def holds(self, registers) -> bool:
+        return _OPERATORS[self.op](registers[self.register], self.value)
+
+    def __str__(self) -> str:
+        return f"{REGISTER_NAMES[self.register]} {self.op} {self.value}"
+
+def parse_condition(text: str) -> RegisterCondition:
+    """Parse a register condition such as "R3 == 10" or "R1>=0x20".
+
+    Negative values are taken as 16-bit two's complement. Raises ValueError
+    on anything else.
+    """
+    match = _CONDITION.match(text)
+    register = REGISTER_INDEX.get(match.group(1).upper()) if match else None
+    if register is None:
+        raise ValueError(f"Invalid register condition: {text}")
+    try:
+        value = int(match.group(3), 0)
+    except ValueError:
+        raise ValueError(f"Invalid register condition: {text}")
+    return RegisterCondition(register, match.group(2), value & 0xFFFF)
+
+class BreakEvent(NamedTuple):
+    reason: StopReason
+    slot: int      # Instruction that triggered the stop
+    address: int   # Byte address accessed by a watched load or store; -1 for breakpoints
+    value: int     # Word loaded or stored; 0 for breakpoints
+
+    def __str__(self) -> str:
+        if self.reason == StopReason.BREAKPOINT:
+            return f"Breakpoint at slot {self.slot}"
+        access = "read" if self.reason == StopReason.READ_WATCH else "write"
+        return f"Watchpoint: {access} of 0x{self.value:04X} at address {self.address} by slot {self.slot}"
+
+class Breakpoints:
+    """PC breakpoints, optionally conditional on a register, and data watchpoints.
+
+    Everything is checked against the instruction sitting in MEM/WB at the
+    end of a cycle: only instructions on the committed path get there, all
+    older ones have written back, and a load or store in it has just made
+    its access. So a breakpoint stops before its instruction writes its
+    register, and a condition sees the registers exactly as the program
+    left them. The check depends only on machine state, which lets a
+    history run backwards to the previous stop with the same test.
+
+    Each check is a bitmap lookup for the slot and a set lookup for a load
+    or store address, whatever the number of breakpoints.
+    """
+
+    def __init__(self):
+        self._slot_map = bytearray()  # Non-zero for every slot with a breakpoint
+        self.conditions: Dict[int, Optional[RegisterCondition]] = {}
+        self.read_watch: Set[int] = set()   # Watched word indices
+        self.write_watch: Set[int] = set()
+        self.hit: Optional[BreakEvent] = None  # Result of the last cycle's check
+        self.enabled = False  # False while nothing is set, so the check returns at once
+
+    def _changed(self) -> None:
+        self.enabled = bool(self.conditions or self.read_watch or self.write_watch)
+
+    @property
+    def slots(self) -> List[int]:
+        return sorted(self.conditions)
+
+    def add_breakpoint(self, slot: int, condition: Optional[RegisterCondition] = None) -> None:
+        """Break at an instruction slot, replacing any breakpoint already there."""
+        if slot < 0:
+            raise ValueError(f"Invalid instruction slot: {slot}")
+        if slot >= len(self._slot_map):
+            self._slot_map.extend(bytes(slot + 1 - len(self._slot_map)))
+        self._slot_map[slot] = 1
+        self.conditions[slot] = condition
+        self._changed()
+
+    def remove_breakpoint(self, slot: int) -> None:
+        if self.conditions.pop(slot, False) is not False:
+            self._slot_map[slot] = 0
+            self._changed()
+
+    def toggle_breakpoint(self, slot: int) -> bool:
+        """Set or clear an unconditional breakpoint; returns True if one is now set."""
+        if slot in self.conditions:
+            self.remove_breakpoint(slot)
+            return False
+        self.add_breakpoint(slot)
+        return True
+
+    def watch(self, address: int, read: bool = False, write: bool = True) -> None:
+        """Stop after loads and/or stores of the word at a byte address."""
+        if address < 0 or address % WORD_SIZE:
+            raise ValueError(f"Watch address must be a word-aligned byte offset: {address}")
+        index = address // WORD_SIZE
+        if read:
+            self.read_watch.add(index)
+        if write:
+            self.write_watch.add(index)
+        self._changed()
+
+    def unwatch(self, address: int) -> None:
+        index = address // WORD_SIZE
+        self.read_watch.discard(index)
+        self.write_watch.discard(index)
+        self._changed()
+
+    def clear(self) -> None:
+        self._slot_map = bytearray()
+        self.conditions.clear()
+        self.read_watch.clear()
+        self.write_watch.clear()
+        self.hit = None
+        self._changed()
+
+    def check(self, executor: 'MIPSExecutor') -> Optional[BreakEvent]:
+        """Return the reason to stop in the executor's current state, if any."""
+        if not self.enabled:
+            return None
+        latch = executor.pipeline.mem_wb
+        record = latch.decoded
+        if record is None:
+            return None
+        slot = latch.pc // 4
+        if slot < len(self._slot_map) and self._slot_map[slot]:
+            condition = self.conditions[slot]
+            if condition is None or condition.holds(executor.commands.registers):
+                return BreakEvent(StopReason.BREAKPOINT, slot, -1, 0)
+        if record.op == Opcode.LW:
+            if latch.alu_result in self.read_watch and latch.write_register >= 0:
+                return BreakEvent(StopReason.READ_WATCH, slot, latch.alu_result * WORD_SIZE, latch.memory_data)
+        elif record.op == Opcode.SW:
+            if latch.alu_result in self.write_watch and latch.alu_result < executor.memory.size:
+                return BreakEvent(StopReason.WRITE_WATCH, slot, latch.alu_result * WORD_SIZE,
+                                  executor.memory.memory[latch.alu_result])
+        return None
@@ -0,0 +1,178 @@
+# cache.py
+from dataclasses import dataclass
+import random
+from typing import Dict, List, Set
+
+REPLACEMENT_POLICIES = ("lru", "fifo", "random")
+
+@dataclass
+class CacheConfig:
+    size: int = 256            # Capacity in bytes
+    line_size: int = 16        # Bytes per line
+    associativity: int = 1     # Ways per set; size // line_size for fully associative
+    replacement: str = "lru"   # One of REPLACEMENT_POLICIES
+    write_back: bool = True    # False for write-through
+    write_allocate: bool = True  # Bring the line in on a write miss
+    miss_penalty: int = 10     # Cycles to fill a line (or write back a dirty one)
+    seed: int = 0              # Random replacement is reproducible
+
+    @property
+    def sets(self) -> int:
+        return self.size // (self.line_size * self.associativity)
+
+    def validate(self) -> None:
+        if self.size <= 0 or self.line_size <= 0 or self.associativity <= 0:
+            raise ValueError("Cache size, line size and associativity must be positive")
+        if self.size % (self.line_size * self.associativity):
+            raise ValueError(f"Cache size {self.size} is not a multiple of line size x associativity "
+                             f"({self.line_size} x {self.associativity})")
+        if self.replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"Unknown replacement policy: {self.replacement}")
+        if self.miss_penalty < 0:
+            raise ValueError("Miss penalty cannot be negative")
+
+_SPEC_KEYS = {
+    "size": ("size", int),
+    "line": ("line_size", int),
+    "ways": ("associativity", int),
+    "replacement": ("replacement", str),
+    "penalty": ("miss_penalty", int),
+    "seed": ("seed", int),
+}
+
+def parse_cache_spec(spec: str) -> CacheConfig:
+    """Parse "size=1024,line=16,ways=2,replacement=lru,write=back,allocate=yes,penalty=10".
+
+    Every key is optional; missing ones keep the CacheConfig defaults.
+    Raises ValueError on unknown keys or bad values.
+    """
+    config = CacheConfig()
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, value = item.partition("=")
+        key, value = key.strip().lower(), value.strip().lower()
+        if key in _SPEC_KEYS:
+            name, convert = _SPEC_KEYS[key]
+            setattr(config, name, convert(value))
+        elif key == "write" and value in ("back", "through"):
+            config.write_back = value == "back"
+        elif key == "allocate" and value in ("yes", "no"):
+            config.write_allocate = value == "yes"
+        else:
+            raise ValueError(f"Invalid cache option: {item}")
+    config.validate()
+    return config
+
+class Cache:
+    """Set-associative cache model: tags and counters only, no data.
+
+    The data itself stays in MIPSMemory; the cache only decides whether an
+    access hits and what a miss costs. access() returns the stall cycles:
+    miss_penalty to fill a line, plus another miss_penalty when a dirty
+    victim has to be written back first. Write-through stores and
+    non-allocating write misses go through a write buffer and cost nothing.
+    """
+
+    def __init__(self, config: CacheConfig, name: str = "cache"):
+        config.validate()
+        self.config = config
+        self.name = name
+        self.reset()
+
+    def reset(self) -> None:
+        """Invalidate every line and clear the counters."""
+        # Each set lists its resident line numbers, oldest (or least recently used) first
+        self.sets: List[List[int]] = [[] for _ in range(self.config.sets)]
+        self.dirty: Set[int] = set()
+        self._random = random.Random(self.config.seed)
+        self.reads = 0
+        self.writes = 0
+        self.read_misses = 0
+        self.write_misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+        self.memory_writes = 0  # Stores sent straight to memory (write-through or no-allocate)
+        self.stall_cycles = 0
+
+    def access(self, address: int, write: bool = False) -> int:
+        """Look up a byte address; returns the stall cycles the access costs."""
+        config = self.config
+        line = address // config.line_size
+        ways = self.sets[line % len(self.sets)]
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+
+        if line in ways:
+            if config.replacement == "lru" and ways[-1] != line:
+                ways.remove(line)
+                ways.append(line)
+            if write:
+                if config.write_back:
+                    self.dirty.add(line)
+                else:
+                    self.memory_writes += 1
+            return 0
+
+        if write:
+            self.write_misses += 1
+            if not config.write_allocate:
+                self.memory_writes += 1
+                return 0
+        else:
+            self.read_misses += 1
+
+        penalty = config.miss_penalty
+        if len(ways) >= config.associativity:
+            if config.replacement == "random":
+                victim = ways.pop(self._random.randrange(len(ways)))
+            else:
+                victim = ways.pop(0)
+            self.evictions += 1
+            if victim in self.dirty:
+                self.dirty.discard(victim)
+                self.writebacks += 1
+                penalty += config.miss_penalty
+        ways.append(line)
+        if write:
+            if config.write_back:
+                self.dirty.add(line)
+            else:
+                self.memory_writes += 1
+        self.stall_cycles += penalty
+        return penalty
+
+    @property
+    def hits(self) -> int:
+        return self.reads + self.writes - self.read_misses - self.write_misses
+
+    @property
+    def misses(self) -> int:
+        return self.read_misses + self.write_misses
+
+    def report(self) -> Dict:
+        """Geometry, policy and counters as plain data."""
+        config = self.config
+        accesses = self.reads + self.writes
+        return {
+            "size": config.size,
+            "line_size": config.line_size,
+            "associativity": config.associativity,
+            "sets": config.sets,
+            "replacement": config.replacement,
+            "write_policy": "write-back" if config.write_back else "write-through",
+            "write_allocate": config.write_allocate,
+            "miss_penalty": config.miss_penalty,
+            "accesses": accesses,
+            "reads": self.reads,
+            "writes": self.writes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "read_misses": self.read_misses,
+            "write_misses": self.write_misses,
+            "hit_rate": self.hits / accesses if accesses else 0.0,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+            "memory_writes": self.memory_writes,
+            "stall_cycles": self.stall_cycles,
+        }
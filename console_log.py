@@ -0,0 +1,52 @@
+# console_log.py
+from collections import deque
+from enum import IntEnum
+from typing import Deque, List
+
+class LogLevel(IntEnum):
+    TRACE = 5    # Per-cycle pipeline dumps
+    DEBUG = 10   # Hazard reports and other per-instruction detail
+    INFO = 20    # Program events: loads, branches, run status
+    ERROR = 40
+
+class ConsoleLog:
+    """Level-filtered, bounded log buffer.
+
+    Messages below the current level are dropped on entry. Accepted lines are
+    kept in a ring buffer of at most max_lines, and queued until a consumer
+    drains them (the GUI does this on a timer, in one batch).
+    """
+
+    def __init__(self, level: LogLevel = LogLevel.INFO, max_lines: int = 2000):
+        self.level = level
+        self.max_lines = max_lines
+        self.lines: Deque[str] = deque(maxlen=max_lines)
+        self._pending: Deque[str] = deque(maxlen=max_lines)
+        self.dropped = 0  # Pending lines lost because the consumer fell behind
+
+    def enabled(self, level: LogLevel) -> bool:
+        return level >= self.level
+
+    def log(self, message: str, level: LogLevel = LogLevel.INFO) -> bool:
+        """Queue a message; returns False if it was filtered out by level."""
+        if level < self.level:
+            return False
+        if len(self._pending) == self.max_lines:
+            self.dropped += 1
+        self.lines.append(message)
+        self._pending.append(message)
+        return True
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def drain(self) -> List[str]:
+        """Return and clear the lines queued since the last drain."""
+        pending = list(self._pending)
+        self._pending.clear()
+        return pending
+
+    def clear(self) -> None:
+        self.lines.clear()
+        self._pending.clear()
+        self.dropped = 0
@@ -1,7 +1,69 @@
 # converter.py
-from typing import Optional, Dict, Match
+from array import array
+from typing import Optional, Dict, List, Match
 import re
-from dataclasses import dataclass
+import struct
+import sys
+from dataclasses import dataclass, field
+from assembler import IRInstruction
+from decoder import Opcode
+
+# An image with initial data memory starts with this header, followed by the
+# instruction words and then the data words, all little-endian. Its first
+# word, 0x494D, is an `and` with a non-zero funct and so never a valid
+# instruction, which tells it apart from a raw image of instructions only.
+IMAGE_MAGIC = b"MI16"
+IMAGE_HEADER = struct.Struct("<4sII")  # magic, instruction words, data words
+
+def _little_endian(words: array) -> bytes:
+    if sys.byteorder == "little":
+        return words.tobytes()
+    swapped = array('H', words)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+class EncodingError(Exception):
+    """Raised when an instruction has no 16-bit encoding."""
+    pass
+
+@dataclass
+class EncodingFailure:
+    slot: int
+    line: int
+    source: str
+    reason: str
+
+def image_bytes(words: array, data: array) -> bytes:
+    """An image of instruction words and initial data words.
+
+    Without data this is the raw instruction words; otherwise the
+    IMAGE_HEADER comes first and the data words follow the instructions.
+    """
+    if not data:
+        return _little_endian(words)
+    return IMAGE_HEADER.pack(IMAGE_MAGIC, len(words), len(data)) + _little_endian(words) + _little_endian(data)
+
+@dataclass
+class EncodedProgram:
+    words: array                   # array('H') program image, one word per instruction
+    slots: List[int]               # Source instruction slot of each word
+    symbols: Dict[str, int]        # Label -> word address in the image
+    errors: List[EncodingFailure]  # Instructions that could not be encoded
+    slot_count: int = 0            # Instruction slots in the source program
+    data: array = field(default_factory=lambda: array('H'))  # Initial data memory words, in .data order
+
+    def tobytes(self) -> bytes:
+        """The image as little-endian 16-bit words; see image_bytes."""
+        return image_bytes(self.words, self.data)
+
+    def slot_words(self) -> List[Optional[int]]:
+        """Encoded word for every source slot; None for labels and failed instructions."""
+        words: List[Optional[int]] = [None] * self.slot_count
+        for slot, word in zip(self.slots, self.words):
+            words[slot] = word
+        for failure in self.errors:
+            words[failure.slot] = None
+        return words
 
 @dataclass
 class InstructionFormat:
@@ -37,58 +99,101 @@ class MIPSConverter:
             "beq": "110",
             "j":   "111"   # Example format: 111 xxxxxxxxxxxxx
         }
+        self.OPCODES = {name: int(bits, 2) for name, bits in self.OPCODE_MAP.items()}
+
+        # Instructions with an encoding; xor, slt and the shifts share add's
+        # opcode and are told apart by the funct field
+        self.ENCODED_OPCODES = {
+            Opcode.ADD: "add", Opcode.XOR: "add", Opcode.SLT: "add", Opcode.SLL: "add", Opcode.SRL: "add",
+            Opcode.SUB: "sub", Opcode.AND: "and", Opcode.OR: "or",
+            Opcode.LW: "lw", Opcode.SW: "sw", Opcode.BEQ: "beq", Opcode.J: "j",
+        }
+        self.FUNCT_MAP = {
+            Opcode.ADD: 0, Opcode.XOR: 1, Opcode.SLT: 2, Opcode.SLL: 3, Opcode.SRL: 4,
+            Opcode.SUB: 0, Opcode.AND: 0, Opcode.OR: 0,
+        }
 
     def _compile_regex_patterns(self) -> None:
         """Compile regex patterns used in parsing."""
         self.MEMORY_ACCESS_PATTERN = re.compile(r'(-?\d+)\((\$\w+)\)')
 
-    def convert_to_machine_code(self, instruction: str) -> str:
-        """Convert MIPS instruction to 16-bit machine code."""
-        try:
-            parts = [part.strip() for part in instruction.replace(",", " ").split()]
-            command = parts[0]
-            
-            # Skip labels and empty lines
-            if command.endswith(":") or not command:
-                return None
-                
-            # Convert to 16-bit instruction format
-            if command in ["add", "sub", "and", "or"]:
-                # R-type format: opcode(3) rs(3) rt(3) rd(3) unused(4)
-                rd, rs, rt = parts[1:]
-                opcode = self.OPCODE_MAP[command]
-                rs_bin = self.REGISTER_MAP[rs]
-                rt_bin = self.REGISTER_MAP[rt]
-                rd_bin = self.REGISTER_MAP[rd]
-                return f"{opcode}{rs_bin}{rt_bin}{rd_bin}0000"
-                
-            elif command in ["lw", "sw"]:
-                # I-type format: opcode(3) rs(3) rt(3) immediate(7)
-                rt, offset = parts[1:]
-                opcode = self.OPCODE_MAP[command]
-                match = re.match(r'(-?\d+)\((\w+)\)', offset)
-                if match:
-                    imm = int(match.group(1)) & 0x7F  # 7-bit immediate
-                    rs = match.group(2)
-                    return f"{opcode}{self.REGISTER_MAP[rs]}{self.REGISTER_MAP[rt]}{format(imm, '07b')}"
-                    
-            elif command == "beq":
-                # I-type format: opcode(3) rs(3) rt(3) immediate(7)
-                rs, rt, label = parts[1:]
-                opcode = self.OPCODE_MAP[command]
-                rs_bin = self.REGISTER_MAP[rs]
-                rt_bin = self.REGISTER_MAP[rt]
-                # For branch, we'll use a placeholder immediate value
-                return f"{opcode}{rs_bin}{rt_bin}0000000"
-                
-            elif command == "j":
-                # J-type format: opcode(3) address(13)
-                label = parts[1]
-                opcode = self.OPCODE_MAP[command]
-                # For jump, we'll use a placeholder address
-                return f"{opcode}0000000000000"
-                
-            return None  # Return None for unsupported instructions or labels
-            
-        except Exception as e:
-            return None  # Return None instead of error message
\ No newline at end of file
+    def encode_instruction(self, instruction: IRInstruction, address: int, symbols: Dict[str, int]) -> int:
+        """Encode one instruction as a 16-bit word.
+
+        address is the instruction's word address in the image and symbols
+        maps labels to word addresses. Raises EncodingError with the reason
+        if the instruction has no 16-bit encoding.
+        """
+        if instruction.error:
+            raise EncodingError(instruction.error)
+        op = instruction.op
+        if op not in self.ENCODED_OPCODES:
+            raise EncodingError(f"No 16-bit encoding for '{instruction.mnemonic}'")
+        opcode = self.OPCODES[self.ENCODED_OPCODES[op]] << 13
+        values = [operand.value for operand in instruction.operands]
+
+        if op in self.FUNCT_MAP:
+            # R-type format: opcode(3) rs(3) rt(3) rd(3) funct(4); shifts carry the amount in rt
+            rd, rs, rt = values
+            if op in (Opcode.SLL, Opcode.SRL) and rt > 7:
+                raise EncodingError(f"Shift amount {rt} does not fit in 3 bits")
+            return opcode | rs << 10 | rt << 7 | rd << 4 | self.FUNCT_MAP[op]
+
+        if op in (Opcode.LW, Opcode.SW):
+            # I-type format: opcode(3) rs(3) rt(3) immediate(7)
+            memory = instruction.operands[1]
+            return opcode | memory.base << 10 | values[0] << 7 | self._signed_field(memory.value, 7, "Offset")
+
+        label = instruction.operands[-1].label
+        if label not in symbols:
+            raise EncodingError(f"Unknown label {label}")
+        if op == Opcode.BEQ:
+            # I-type format: opcode(3) rs(3) rt(3) offset(7), in words relative to the next instruction
+            offset = self._signed_field(symbols[label] - (address + 1), 7, "Branch offset")
+            return opcode | values[0] << 10 | values[1] << 7 | offset
+
+        # J-type format: opcode(3) address(13), an absolute word address
+        if not 0 <= symbols[label] < 1 << 13:
+            raise EncodingError(f"Jump target {symbols[label]} does not fit in 13 bits")
+        return opcode | symbols[label]
+
+    @staticmethod
+    def _signed_field(value: int, bits: int, name: str) -> int:
+        if not -(1 << (bits - 1)) <= value < 1 << (bits - 1):
+            raise EncodingError(f"{name} {value} does not fit in {bits} bits")
+        return value & ((1 << bits) - 1)
+
+    def encode_program(self, instructions: List[IRInstruction],
+                       data: Optional[Dict[str, int]] = None) -> EncodedProgram:
+        """Encode a whole program into a packed image in two passes.
+
+        The first pass gives every instruction its word address in the image
+        (label lines take no space) and resolves labels; the second encodes.
+        Instructions that cannot be encoded get a zero word, keeping later
+        addresses intact, and are listed in the result's errors. data, the
+        program's .data values, becomes the image's initial data memory.
+        """
+        symbols: Dict[str, int] = {}
+        address = 0
+        for instruction in instructions:
+            if instruction.label:
+                symbols[instruction.label] = address
+            if instruction.op != Opcode.NOP:
+                address += 1
+
+        words = array('H', bytes(2 * address))
+        slots: List[int] = []
+        errors: List[EncodingFailure] = []
+        for instruction in instructions:
+            if instruction.op == Opcode.NOP:
+                if instruction.mnemonic:
+                    errors.append(EncodingFailure(instruction.slot, instruction.line, instruction.source,
+                                                  f"Unknown instruction '{instruction.mnemonic}'"))
+                continue
+            try:
+                words[len(slots)] = self.encode_instruction(instruction, len(slots), symbols)
+            except EncodingError as e:
+                errors.append(EncodingFailure(instruction.slot, instruction.line, instruction.source, str(e)))
+            slots.append(instruction.slot)
+        data_words = array('H', [value & 0xFFFF for value in (data or {}).values()])
+        return EncodedProgram(words, slots, symbols, errors, len(instructions), data_words)
@@ -0,0 +1,93 @@
+# decoder.py
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Dict, Optional, TYPE_CHECKING
+import re
+from register_data import REGISTER_INDEX
+
+if TYPE_CHECKING:
+    from assembler import IRInstruction
+
+class Opcode(IntEnum):
+    NOP = 0  # Labels and unrecognised text
+    ADD = 1
+    SUB = 2
+    AND = 3
+    OR = 4
+    XOR = 5
+    SLL = 6
+    SRL = 7
+    SLT = 8
+    LW = 9
+    SW = 10
+    ADDI = 11
+    BEQ = 12
+    BNE = 13
+    LI = 14
+    ANDI = 15
+    ORI = 16
+    J = 17
+    JAL = 18
+    JR = 19
+    SYSCALL = 20
+
+OPCODE_BY_NAME: Dict[str, Opcode] = {op.name.lower(): op for op in Opcode if op != Opcode.NOP}
+
+RETURN_ADDRESS_REGISTER = REGISTER_INDEX["R7"]
+
+MEMORY_OPERAND_PATTERN = re.compile(r'(-?\d+)\((\w+)\)')
+
+@dataclass
+class DecodedInstruction:
+    op: int
+    mnemonic: str = ""
+    rd: int = -1        # Destination register index
+    rs: int = -1        # First source register (base register for lw/sw)
+    rt: int = -1        # Second source register (stored value for sw)
+    imm: int = 0        # Immediate, shift amount or memory offset
+    target: int = -1    # Resolved instruction slot for branches and jumps
+    handler: Optional[Callable[[int, int, int], int]] = None  # EX-stage operation: (rs value, rt value, imm) -> result
+    source: str = ""
+
+NOP_INSTRUCTION = DecodedInstruction(Opcode.NOP)
+
+def _target(label: str, labels: Dict[str, int]) -> int:
+    if label not in labels:
+        raise ValueError(f"Unknown label {label}")
+    return labels[label]
+
+def decode_instruction(instruction: 'IRInstruction', labels: Dict[str, int]) -> DecodedInstruction:
+    """Lower an assembled instruction into a DecodedInstruction.
+
+    Raises ValueError if the instruction failed to assemble or names an
+    unknown label. Labels and unknown mnemonics decode to a NOP record,
+    matching how the executor has always skipped them.
+    """
+    if instruction.error:
+        raise ValueError(instruction.error)
+    op = instruction.op
+    record = DecodedInstruction(op, instruction.mnemonic, source=instruction.source)
+    operands = instruction.operands
+    if op in (Opcode.ADD, Opcode.SUB, Opcode.AND, Opcode.OR, Opcode.XOR, Opcode.SLT):
+        record.rd, record.rs, record.rt = (operand.value for operand in operands)
+    elif op in (Opcode.SLL, Opcode.SRL, Opcode.ADDI, Opcode.ANDI, Opcode.ORI):
+        record.rd, record.rs, record.imm = (operand.value for operand in operands)
+    elif op == Opcode.LI:
+        record.rd, record.imm = (operand.value for operand in operands)
+    elif op in (Opcode.LW, Opcode.SW):
+        register, memory = operands
+        record.imm, record.rs = memory.value, memory.base
+        if op == Opcode.LW:
+            record.rd = register.value
+        else:
+            record.rt = register.value
+    elif op in (Opcode.BEQ, Opcode.BNE):
+        record.rs, record.rt = operands[0].value, operands[1].value
+        record.target = _target(operands[2].label, labels)
+    elif op in (Opcode.J, Opcode.JAL):
+        record.target = _target(operands[0].label, labels)
+        if op == Opcode.JAL:
+            record.rd = RETURN_ADDRESS_REGISTER
+    elif op == Opcode.JR:
+        record.rs = operands[0].value
+    return record
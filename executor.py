@@ -1,318 +1,588 @@
-
 # executor.py
-from typing import List, Dict, Optional, Callable
+from typing import List, Dict, Optional, Callable, Tuple
 from mips_commands import MIPSProcessor
-from memory import MIPSMemory
-import re
-from pipeline import Pipeline, PipelineStage
+from assembler import Program, IRInstruction
+from memory import MIPSMemory, MemoryError
+from decoder import DecodedInstruction, Opcode, NOP_INSTRUCTION, decode_instruction
+from pipeline import Pipeline, PipelineRegister, PipelineStage, Hazard, HazardType
+from console_log import LogLevel
+from register_data import REGISTER_NAMES
+from branch_predictor import BranchPredictor, StaticNotTakenPredictor
+from cache import Cache
+from access_trace import AccessKind, TraceWriter
+from history import ExecutionHistory
+from breakpoints import Breakpoints
+import perf_counters as perf
 
 class MIPSExecutor:
-    def __init__(self, commands: MIPSProcessor, memory: MIPSMemory, labels: Dict[str, int], 
-                 pc_update_callback: Callable[[int], None], ui_log_callback: Callable[[str], None], ui):
+    """Cycle-accurate 5-stage pipeline (IF, ID, EX, MEM, WB).
+
+    Every call to step() is one clock cycle in which each stage does its own
+    work on the instruction it holds. Results are forwarded from EX/MEM and
+    MEM/WB, a load followed by a dependent instruction stalls for one cycle,
+    jumps redirect fetch from ID (one flushed slot) and jr resolves in EX
+    (two flushed slots). Conditional branches follow the branch predictor:
+    a BTB hit redirects fetch in IF, a taken prediction in ID costs one
+    flushed slot, and a misprediction found in EX flushes two.
+
+    Optional instruction and data caches sit in front of IF and MEM. A miss
+    freezes the whole pipeline for the cache's penalty, so it adds cycles
+    without changing what any stage does.
+    """
+
+    # EX-stage operations: (rs value, rt value, immediate) -> result
+    _ALU_OPERATIONS: Dict[int, Callable[[int, int, int], int]] = {
+        Opcode.ADD: lambda a, b, imm: (a + b) & 0xFFFF,
+        Opcode.SUB: lambda a, b, imm: (a - b) & 0xFFFF,
+        Opcode.AND: lambda a, b, imm: a & b,
+        Opcode.OR: lambda a, b, imm: a | b,
+        Opcode.XOR: lambda a, b, imm: a ^ b,
+        Opcode.SLT: lambda a, b, imm: 1 if a < b else 0,
+        Opcode.SLL: lambda a, b, imm: (a << imm) & 0xFFFF,
+        Opcode.SRL: lambda a, b, imm: a >> imm,
+        Opcode.ADDI: lambda a, b, imm: (a + imm) & 0xFFFF,
+        Opcode.ANDI: lambda a, b, imm: a & imm & 0xFFFF,
+        Opcode.ORI: lambda a, b, imm: (a | imm) & 0xFFFF,
+        Opcode.LI: lambda a, b, imm: imm & 0xFFFF,
+        # Memory operations compute a word index; the base register is not used
+        Opcode.LW: lambda a, b, imm: imm // 2,
+        Opcode.SW: lambda a, b, imm: imm // 2,
+    }
+
+    def __init__(self, commands: MIPSProcessor, memory: MIPSMemory, program: Optional[Program] = None,
+                 pc_update_callback: Optional[Callable[[int], None]] = None,
+                 ui_log_callback: Optional[Callable[[str, LogLevel], None]] = None, ui=None,
+                 branch_predictor: Optional[BranchPredictor] = None, icache: Optional[Cache] = None,
+                 dcache: Optional[Cache] = None):
         self.commands = commands
         self.memory = memory
-        self.labels = labels
+        self.program = Program()
         self.program_counter = 0
-        self.current_line = 0
-        self.pc_update_callback = pc_update_callback
-        self.ui_log_callback = ui_log_callback
-        self.ui = ui  # Store UI reference
-        self.instructions = []
+        self.pc_update_callback = pc_update_callback or (lambda pc: None)
+        self.ui_log_callback = ui_log_callback or (lambda message, level: None)
+        # Messages below this level are never formatted
+        self.log_level = LogLevel.INFO
+        self.ui = ui  # Store UI reference; None when running headless
+        # When False, per-cycle UI work is skipped and the caller repaints in batches
+        self.live_updates = True
+        self._decoded: List[Optional[DecodedInstruction]] = []
+        # Bumped whenever instruction memory changes, so derived caches can tell they are stale
+        self.program_version = 0
         self.pipeline = Pipeline()
+        self.branch_predictor = branch_predictor or StaticNotTakenPredictor()
+        self.icache = icache
+        self.dcache = dcache
+        self._memory_stall = 0  # Miss penalty collected by the stages this cycle
+        self.trace: Optional[TraceWriter] = None  # Receives every fetch, load and store when set
+        self.history: Optional[ExecutionHistory] = None  # Set to allow stepping backwards
+        self.breakpoints: Optional[Breakpoints] = None  # Checked at the end of every cycle when set
+        if program is not None:
+            self.set_program(program)
+
+    @property
+    def program_counter(self) -> int:
+        # The PC is part of the processor's register array; it addresses the next fetch
+        return self.commands.pc
+
+    @program_counter.setter
+    def program_counter(self, value: int) -> None:
+        self.commands.pc = value
+
+    @property
+    def current_line(self) -> int:
+        """Instruction slot of the next fetch."""
+        return self.program_counter // 4
+
+    @current_line.setter
+    def current_line(self, slot: int) -> None:
+        self.program_counter = slot * 4
+
+    @property
+    def cycles(self) -> int:
+        return self.pipeline.cycles
+
+    @property
+    def instructions_retired(self) -> int:
+        return self.pipeline.instructions_retired
+
+    @property
+    def instructions(self) -> List[IRInstruction]:
+        return self.program.instructions
+
+    @property
+    def labels(self) -> Dict[str, int]:
+        """Symbol table: label -> instruction slot."""
+        return self.program.symbols
+
+    def set_program(self, program: Program):
+        self.program = program
+        # Per-program decode cache, indexed by instruction slot
+        self._decoded = [None] * len(program.instructions)
+        self.program_version += 1
+        self.pipeline.reset()
+        self.branch_predictor.reset()
+        for cache in (self.icache, self.dcache):
+            if cache:
+                cache.reset()
+        if self.history:
+            self.history.reset()
+
+    def write_instruction(self, slot: int, source: str) -> None:
+        """Rewrite one instruction slot of the loaded program in place."""
+        if self.program.rewrite(slot, source):
+            # A label moved: branch targets anywhere may change
+            self._decoded = [None] * len(self.instructions)
+        else:
+            self._decoded[slot] = None
+        self.program_version += 1
+        if self.history:
+            # Replaying the past against different code would not reproduce it
+            self.history.reset()
+
+    def decode_slot(self, slot: int) -> DecodedInstruction:
+        """Return the decoded record for an instruction slot, decoding it on first use."""
+        record = self._decoded[slot]
+        if record is None:
+            try:
+                record = decode_instruction(self.instructions[slot], self.labels)
+            except ValueError as e:
+                self._log(f"Error: {e}", LogLevel.ERROR)
+                record = NOP_INSTRUCTION
+            else:
+                record.handler = self._ALU_OPERATIONS.get(record.op)
+            self._decoded[slot] = record
+        return record
+
+    def decode_program(self) -> List[DecodedInstruction]:
+        """Decode every instruction slot up front and return the cache."""
+        return [self.decode_slot(slot) for slot in range(len(self.instructions))]
 
-    def set_instructions(self, instructions: List[dict]):
-        self.instructions = instructions
+    def cache_report(self) -> Dict[str, Dict]:
+        """Counters of the instruction and data caches that are attached."""
+        return {name: cache.report() for name, cache in (("icache", self.icache), ("dcache", self.dcache)) if cache}
+
+    def branch_prediction_report(self) -> Dict:
+        """Accuracy and flush penalty of the branch predictor for this run."""
+        return self.branch_predictor.report([instr.source for instr in self.instructions])
+
+    def next_instruction_slot(self, slot: int) -> int:
+        """First slot at or after slot that holds an instruction; label lines
+        and unknown text occupy a slot but are not instructions."""
+        count = len(self.instructions)
+        while 0 <= slot < count and self.decode_slot(slot).op == Opcode.NOP:
+            slot += 1
+        return slot
+
+    def is_finished(self) -> bool:
+        """True once fetch has run past the program and the pipeline has drained."""
+        next_slot = self.next_instruction_slot(self.current_line)
+        return not (0 <= next_slot < len(self.instructions)) and self.pipeline.is_empty()
+
+    def step(self) -> bool:
+        """Advance the pipeline by one clock cycle.
+
+        Returns False when there was nothing left to do.
+        """
+        if self.is_finished():
+            return False
+        if not self.live_updates:
+            self._clock()
+            return True
 
-    def execute_instruction(self, instruction: dict):
         # Clear previous register highlight
         self.commands.clear_highlight()
-        
-        # Pipeline execution
-        self._execute_pipeline_stage(instruction)
-        
+
+        self._clock()
+
+        # Mirror the register array into the register view
+        self.commands.refresh_view()
+
         # Update UI with pipeline state
         self._update_pipeline_display()
-        
+
         # Update highlight on instruction memory
-        self.ui.highlight_instruction(self.current_line)
-        
-        self._increment_pc_and_line()
-
-    def _execute_pipeline_stage(self, instruction: dict):
-        # 1. Instruction Fetch (IF)
-        self.pipeline.current_stages[PipelineStage.IF] = instruction
-        
-        # 2. Instruction Decode (ID)
-        if self.pipeline.if_id.instruction:
-            self.pipeline.current_stages[PipelineStage.ID] = self.pipeline.if_id.instruction
-            
-            # Parse instruction
-            parts = self.pipeline.if_id.instruction['source'].split()
-            command = parts[0]
-            handler = self._get_instruction_handler(command)
-            if handler and len(parts) > 1:
-                handler(command, parts[1:])  # Execute the instruction
-        
-        # 3. Execute (EX)
-        if self.pipeline.id_ex.instruction:
-            self.pipeline.current_stages[PipelineStage.EX] = self.pipeline.id_ex.instruction
-        
-        # 4. Memory Access (MEM)
-        if self.pipeline.ex_mem.instruction:
-            self.pipeline.current_stages[PipelineStage.MEM] = self.pipeline.ex_mem.instruction
-        
-        # 5. Write Back (WB)
-        if self.pipeline.mem_wb.instruction:
-            self.pipeline.current_stages[PipelineStage.WB] = self.pipeline.mem_wb.instruction
-
-        # Move instructions through pipeline registers
-        self.pipeline.advance_pipeline()
-        
-        # Update pipeline registers
-        self.pipeline.if_id.instruction = instruction
-        
-        # Enhanced hazard detection
-        hazards = self.pipeline.detect_all_hazards(instruction)
-        
-        if hazards:
-            hazard_info = self.pipeline.get_hazard_info()
-            self.ui_log_callback("\nHazard Detection Results:")
-            
-            if hazard_info["current"]:
-                self.ui_log_callback("\nCurrent Hazards:")
-                for hazard in hazard_info["current"]:
-                    self.ui_log_callback(f"- {hazard}")
+        if self.ui:
+            self.ui.highlight_instruction(self.last_fetched_slot())
+        self.pc_update_callback(self.program_counter)
+        return True
+
+    def run(self, max_steps: Optional[int] = None) -> int:
+        """Clock until the program finishes, a breakpoint or watchpoint fires or
+        max_steps cycles have run; returns the cycles taken."""
+        breakpoints = self.breakpoints
+        if breakpoints is not None:
+            breakpoints.hit = None
+        steps = 0
+        while max_steps is None or steps < max_steps:
+            if not self.step():
+                break
+            steps += 1
+            if breakpoints is not None and breakpoints.hit is not None:
+                break
+        return steps
+
+    def step_back(self, cycles: int = 1) -> bool:
+        """Undo the last clock cycles through the execution history.
+
+        Returns False if there is no history or no earlier state to go back to.
+        """
+        if not self.history:
+            return False
+        position = self.history.position
+        if self.history.step_back(cycles) == position:
+            return False
+        if self.breakpoints is not None:
+            self.breakpoints.hit = None  # It described a stop that has just been undone
+        return True
+
+    def last_fetched_slot(self) -> int:
+        """Slot of the instruction in IF/ID, or -1 if it holds a bubble."""
+        if_id = self.pipeline.if_id
+        return if_id.pc // 4 if if_id.decoded else -1
+
+    def _clock(self):
+        """One clock cycle. Stages run from WB back to IF so that each reads
+        the pipeline registers as they were at the start of the cycle."""
+        if self.history:
+            self.history.before_cycle()
+        pipeline = self.pipeline
+        counters = pipeline.counters.values
+        hazards: List[Hazard] = []
+        pipeline.forwarding_actions = []
+        stages = pipeline.current_stages
+        stages[PipelineStage.WB] = pipeline.mem_wb.instruction
+        stages[PipelineStage.MEM] = pipeline.ex_mem.instruction
+        stages[PipelineStage.EX] = pipeline.id_ex.instruction
+        stages[PipelineStage.ID] = pipeline.if_id.instruction
+
+        self._stage_wb(pipeline.mem_wb)
+        mem_wb = self._stage_mem(pipeline.ex_mem)
+        ex_mem, ex_redirect = self._stage_ex(pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb, hazards)
+        id_ex, id_redirect, stall, id_hazards = self._stage_id(pipeline.if_id, pipeline.id_ex, pipeline.ex_mem)
+        if_id, next_slot = self._stage_if()
+        stages[PipelineStage.IF] = if_id.instruction
+
+        if ex_redirect is not None:
+            # Branch or jr resolved in EX: squash the two younger instructions. If a
+            # taken prediction in ID already emptied the ID slot, that cycle is counted
+            counters[perf.FLUSH_CYCLES] += 2 - pipeline.if_id.is_stall
+            if_id = PipelineRegister(is_stall=True)
+            id_ex = PipelineRegister(is_stall=True)
+            next_slot = ex_redirect
+            # The instruction in ID never happened, nor did its hazards
+            id_hazards = []
+        elif stall:
+            # Load-use: hold IF/ID and the PC, send a bubble down to EX
+            counters[perf.STALL_CYCLES] += 1
+            if_id = pipeline.if_id
+            id_ex = PipelineRegister(is_stall=True)
+            next_slot = self.current_line
+        elif id_redirect is not None:
+            # Jump resolved in ID: squash the instruction fetched this cycle
+            counters[perf.FLUSH_CYCLES] += 1
+            if_id = PipelineRegister(is_stall=True)
+            next_slot = id_redirect
+            self._log_jump(id_ex)
+        for hazard, counter in id_hazards:
+            hazards.append(hazard)
+            counters[counter] += 1
+
+        pipeline.if_id, pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb = if_id, id_ex, ex_mem, mem_wb
+        self.current_line = next_slot
+        counters[perf.CYCLES] += 1
+        if self._memory_stall:
+            # Cache misses are serviced one after another while every stage waits
+            counters[perf.CYCLES] += self._memory_stall
+            counters[perf.MEMORY_STALL_CYCLES] += self._memory_stall
+            self._memory_stall = 0
+        pipeline.record_hazards(hazards)
+        if self.breakpoints is not None:
+            self.breakpoints.hit = self.breakpoints.check(self)
+
+        if hazards and self.log_level <= LogLevel.DEBUG:
+            self._log("\nHazard Detection Results:", LogLevel.DEBUG)
+            self._log("\nCurrent Hazards:", LogLevel.DEBUG)
+            for hazard in hazards:
+                self._log(f"- {hazard}", LogLevel.DEBUG)
+
+    def _stage_if(self) -> Tuple[PipelineRegister, int]:
+        slot = self.next_instruction_slot(self.current_line)
+        if not (0 <= slot < len(self.instructions)):
+            return PipelineRegister(), slot
+        latch = PipelineRegister(instruction=self.instructions[slot], decoded=self._decoded[slot], pc=slot * 4)
+        if self.icache:
+            self._memory_stall += self.icache.access(slot * 4)
+        if self.trace:
+            self.trace.record(self.pipeline.counters.values[perf.CYCLES], slot * 4, AccessKind.FETCH, slot * 4, 0)
+        target = self.branch_predictor.predict_fetch(slot)
+        if target is not None:
+            latch.predicted_taken = True
+            return latch, target
+        return latch, slot + 1
+
+    def _stage_id(self, if_id: PipelineRegister, id_ex: PipelineRegister, ex_mem: PipelineRegister
+                  ) -> Tuple[PipelineRegister, Optional[int], bool, List[Tuple[Hazard, int]]]:
+        """Decode and read registers. Returns (ID/EX latch, jump target slot, stall,
+        hazards found). Each hazard comes with the counter it adds to; _clock
+        records them only if a branch resolving in EX does not squash the
+        instruction."""
+        record = if_id.decoded
+        if record is None:
+            return PipelineRegister(), None, False, []
+
+        # Load-use hazard: the load in EX has no data until the end of MEM
+        producer = id_ex.decoded
+        if producer and producer.op == Opcode.LW and producer.rd >= 0 and producer.rd in (record.rs, record.rt):
+            hazard = Hazard(
+                type=HazardType.RAW,
+                source_instr=producer.source,
+                dependent_instr=record.source,
+                affected_register=REGISTER_NAMES[producer.rd],
+                resolution="Stall (load-use)"
+            )
+            return PipelineRegister(), None, True, [(hazard, perf.RAW_STALLED)]
+
+        found: List[Tuple[Hazard, int]] = []
+        if record.rd >= 0:
+            for older in (id_ex.decoded, ex_mem.decoded):
+                if older and older.rd == record.rd:
+                    found.append((Hazard(
+                        type=HazardType.WAW,
+                        source_instr=older.source,
+                        dependent_instr=record.source,
+                        affected_register=REGISTER_NAMES[record.rd],
+                        resolution="In-order writeback"
+                    ), perf.WAW_HAZARDS))
+
+        registers = self.commands.registers
+        latch = PipelineRegister(
+            instruction=if_id.instruction,
+            decoded=record,
+            pc=if_id.pc,
+            rs_value=registers[record.rs] if record.rs >= 0 else 0,
+            rt_value=registers[record.rt] if record.rt >= 0 else 0,
+            write_register=record.rd,
+            predicted_taken=if_id.predicted_taken
+        )
+
+        target = None
+        if record.op in (Opcode.BEQ, Opcode.BNE):
+            if not if_id.predicted_taken and self.branch_predictor.predict(if_id.pc // 4, record.target):
+                target = record.target
+                latch.predicted_taken = True
+                latch.prediction_penalty = 1
+        elif record.op in (Opcode.J, Opcode.JAL):
+            target = record.target
+            found.append((self._control_hazard(record, "Flush (1 cycle)"), perf.CONTROL_FLUSHED))
+        return latch, target, False, found
+
+    def _log_jump(self, latch: PipelineRegister) -> None:
+        """Log a J or JAL that has just left ID."""
+        record = latch.decoded
+        if record.op not in (Opcode.J, Opcode.JAL):
+            return
+        label = record.source.split()[-1]
+        if record.op == Opcode.J:
+            self._log(f"Jumping to {label} (PC={latch.pc})")
+        else:
+            self._log(f"Jumping to {label} and storing return address (PC={latch.pc})")
+
+    def _forward(self, register: int, value: int, consumer: DecodedInstruction, ex_mem: PipelineRegister,
+                 mem_wb: PipelineRegister, hazards: List[Hazard]) -> int:
+        """Operand value for EX, taking the newest in-flight result for register."""
+        if register < 0:
+            return value
+        for latch, path in ((ex_mem, "EX/MEM"), (mem_wb, "MEM/WB")):
+            if latch.decoded and latch.write_register == register:
+                hazards.append(Hazard(
+                    type=HazardType.RAW,
+                    source_instr=latch.decoded.source,
+                    dependent_instr=consumer.source,
+                    affected_register=REGISTER_NAMES[register],
+                    resolution=f"Forwarding ({path})"
+                ))
+                self.pipeline.forwarding_actions.append(
+                    f"{REGISTER_NAMES[register]}: {path} -> {consumer.source}")
+                self.pipeline.counters.values[perf.RAW_FORWARDED] += 1
+                return latch.alu_result if path == "EX/MEM" else latch.write_data
+        return value
+
+    def _stage_ex(self, id_ex: PipelineRegister, ex_mem: PipelineRegister, mem_wb: PipelineRegister,
+                  hazards: List[Hazard]) -> Tuple[PipelineRegister, Optional[int]]:
+        """Run the ALU and resolve branches. Returns (EX/MEM latch, redirect slot)."""
+        record = id_ex.decoded
+        if record is None:
+            return PipelineRegister(), None
+
+        a = self._forward(record.rs, id_ex.rs_value, record, ex_mem, mem_wb, hazards)
+        b = self._forward(record.rt, id_ex.rt_value, record, ex_mem, mem_wb, hazards)
+        latch = PipelineRegister(
+            instruction=id_ex.instruction,
+            decoded=record,
+            pc=id_ex.pc,
+            rs_value=a,
+            rt_value=b,
+            write_register=id_ex.write_register,
+            predicted_taken=id_ex.predicted_taken
+        )
+
+        redirect = None
+        op = record.op
+        if record.handler:
+            latch.alu_result = record.handler(a, b, record.imm)
+        elif op == Opcode.JAL:
+            latch.alu_result = (id_ex.pc + 4) & 0xFFFF  # Return address
+        elif op in (Opcode.BEQ, Opcode.BNE):
+            redirect = self._resolve_branch(record, id_ex, (a == b) == (op == Opcode.BEQ), hazards)
+        elif op == Opcode.JR:
+            redirect = a // 4
+            self.pipeline.counters.values[perf.CONTROL_FLUSHED] += 1
+            hazards.append(self._control_hazard(record, "Flush (2 cycles)"))
+            self._log(f"Returning to address {a:08X}")
+        return latch, redirect
+
+    def _resolve_branch(self, record: DecodedInstruction, id_ex: PipelineRegister, taken: bool,
+                        hazards: List[Hazard]) -> Optional[int]:
+        """Check the prediction made for a branch and train the predictor.
+        Returns the slot to refetch from on a misprediction, else None."""
+        counters = self.pipeline.counters.values
+        slot = id_ex.pc // 4
+        predicted = id_ex.predicted_taken
+        penalty = id_ex.prediction_penalty
+        redirect = None
+        if taken:
+            counters[perf.BRANCHES_TAKEN] += 1
+            self._log(f"Branching to {record.source.split()[-1]} (PC={id_ex.pc})")
+        else:
+            counters[perf.BRANCHES_NOT_TAKEN] += 1
+
+        if taken != predicted:
+            redirect = record.target if taken else slot + 1
+            # Two cycles in all, including the bubble of a taken prediction in ID
+            penalty = 2
+            counters[perf.BRANCH_MISPREDICTS] += 1
+            resolution = "Mispredicted, flush (2 cycles)"
+        elif predicted:
+            resolution = f"Predicted taken ({penalty} cycle{'' if penalty == 1 else 's'})"
+        else:
+            resolution = "Predicted not-taken"
+        counters[perf.CONTROL_FLUSHED if penalty else perf.CONTROL_NOT_FLUSHED] += 1
+        hazards.append(self._control_hazard(record, resolution))
+
+        self.branch_predictor.record(slot, taken == predicted, penalty)
+        self.branch_predictor.update(slot, record.target, taken)
+        return redirect
+
+    def _stage_mem(self, ex_mem: PipelineRegister) -> PipelineRegister:
+        record = ex_mem.decoded
+        if record is None:
+            return PipelineRegister()
+        latch = PipelineRegister(
+            instruction=ex_mem.instruction,
+            decoded=record,
+            pc=ex_mem.pc,
+            alu_result=ex_mem.alu_result,
+            write_register=ex_mem.write_register,
+            write_data=ex_mem.alu_result
+        )
+        if record.op == Opcode.LW:
+            self.pipeline.counters.values[perf.LOADS] += 1
+            try:
+                latch.memory_data = self.memory.read_word(ex_mem.alu_result)
+                latch.write_data = latch.memory_data
+                if self.dcache:
+                    self._memory_stall += self.dcache.access(ex_mem.alu_result * self.memory.config.word_size)
+                if self.trace:
+                    self.trace.record(self.pipeline.counters.values[perf.CYCLES], ex_mem.pc, AccessKind.LOAD,
+                                      ex_mem.alu_result * self.memory.config.word_size, latch.memory_data)
+            except MemoryError as e:
+                self._log(f"Error reading from memory: {str(e)}", LogLevel.ERROR)
+                latch.write_register = -1
+        elif record.op == Opcode.SW:
+            self.pipeline.counters.values[perf.STORES] += 1
+            try:
+                if self.history:
+                    self.history.log_store(ex_mem.alu_result)
+                self.memory.write_word(ex_mem.alu_result, ex_mem.rt_value)
+                if self.dcache:
+                    self._memory_stall += self.dcache.access(ex_mem.alu_result * self.memory.config.word_size, True)
+                if self.trace:
+                    self.trace.record(self.pipeline.counters.values[perf.CYCLES], ex_mem.pc, AccessKind.STORE,
+                                      ex_mem.alu_result * self.memory.config.word_size, ex_mem.rt_value & 0xFFFF)
+            except MemoryError as e:
+                self._log(f"Error writing to memory: {str(e)}", LogLevel.ERROR)
+        return latch
+
+    def _stage_wb(self, mem_wb: PipelineRegister):
+        record = mem_wb.decoded
+        if record is None:
+            return
+        if mem_wb.write_register >= 0:
+            self.commands.registers[mem_wb.write_register] = mem_wb.write_data
+        counters = self.pipeline.counters.values
+        counters[perf.INSTRUCTIONS] += 1
+        counters[perf.OPCODE_BASE + record.op] += 1
+        if record.op in (Opcode.J, Opcode.JAL, Opcode.JR):
+            counters[perf.JUMPS] += 1
+
+    def _control_hazard(self, record: DecodedInstruction, resolution: str) -> Hazard:
+        return Hazard(
+            type=HazardType.CONTROL,
+            source_instr=record.source,
+            dependent_instr="Next sequential instructions",
+            affected_register="PC",
+            resolution=resolution
+        )
+
+    def _log(self, message: str, level: LogLevel = LogLevel.INFO):
+        if level >= self.log_level:
+            self.ui_log_callback(message, level)
 
     def _update_pipeline_display(self):
         """Update UI with pipeline information."""
-        # Get current pipeline state
-        pipeline_state = self.pipeline.get_pipeline_state()
-        hazards = self.pipeline.get_hazards()
-        forwarding = self.pipeline.get_forwarding_actions()
-        
-        # Log pipeline state in formatted way
-        self.ui_log_callback("\n=== Clock Cycle Start ===")
-        
-        # Display PC
-        self.ui_log_callback(f"PC: 0x{self.program_counter:04X}")
-        
+        # Per-cycle register dumps are only formatted when tracing is enabled
+        if self.log_level <= LogLevel.TRACE:
+            self._log_pipeline_state()
+
+        # Update hazard display
+        if self.ui:
+            hazard_info = self.pipeline.get_hazard_info(self.ui.hazard_rows_shown, self.ui.HAZARD_ROW_LIMIT)
+            self.ui.update_hazard_display(hazard_info)
+
+    def _log_pipeline_state(self):
+        pipeline = self.pipeline
+        forwarding = pipeline.get_forwarding_actions()
+        lines = [f"\n=== Clock Cycle {pipeline.cycles} ===", f"PC: 0x{self.program_counter:04X}"]
+
         # Display Pipeline Registers
-        if_id_instr = self.pipeline.if_id.instruction['source'] if self.pipeline.if_id.instruction else "NOP"
-        self.ui_log_callback(f"IF/ID: {if_id_instr}")
-        
+        if_id_instr = pipeline.if_id.decoded.source if pipeline.if_id.decoded else "NOP"
+        lines.append(f"IF/ID: {if_id_instr}")
+
         # ID/EX Register
-        if self.pipeline.id_ex.instruction:
-            id_ex_info = (f"ID/EX: ALUOp={self.pipeline.id_ex.instruction['source'].split()[0]}, "
-                         f"RegDst={bool(self.pipeline.id_ex.write_register)}, "
-                         f"ALUSrc={bool(self.pipeline.id_ex.is_stall)}, "
-                         f"rs={self.pipeline.id_ex.instruction['source'].split()[1] if len(self.pipeline.id_ex.instruction['source'].split()) > 1 else 'R0'}, "
-                         f"rt={self.pipeline.id_ex.instruction['source'].split()[2] if len(self.pipeline.id_ex.instruction['source'].split()) > 2 else 'R0'}")
+        record = pipeline.id_ex.decoded
+        if record:
+            lines.append(f"ID/EX: ALUOp={record.mnemonic}, "
+                         f"RegDst={pipeline.id_ex.write_register >= 0}, "
+                         f"rs={REGISTER_NAMES[record.rs] if record.rs >= 0 else 'R0'}=0x{pipeline.id_ex.rs_value:04X}, "
+                         f"rt={REGISTER_NAMES[record.rt] if record.rt >= 0 else 'R0'}=0x{pipeline.id_ex.rt_value:04X}")
         else:
-            id_ex_info = "ID/EX: ALUOp=NOP, RegDst=False, ALUSrc=False, rs=R0, rt=R0"
-        self.ui_log_callback(id_ex_info)
-        
+            lines.append("ID/EX: ALUOp=NOP, RegDst=False, rs=R0, rt=R0")
+
         # EX/MEM Register
-        ex_mem_info = (f"EX/MEM: alu_result=0x{self.pipeline.ex_mem.alu_result:04X}, "
-                       f"write_reg={self.pipeline.ex_mem.write_register or 'R0'}")
-        self.ui_log_callback(ex_mem_info)
-        
+        lines.append(f"EX/MEM: alu_result=0x{pipeline.ex_mem.alu_result:04X}, "
+                     f"write_reg={self._register_label(pipeline.ex_mem.write_register)}")
+
         # MEM/WB Register
-        mem_wb_info = (f"MEM/WB: write_data=0x{self.pipeline.mem_wb.write_data:04X}, "
-                       f"write_reg={self.pipeline.mem_wb.write_register or 'R0'}")
-        self.ui_log_callback(mem_wb_info)
-        
-        self.ui_log_callback("===================\n")
-        
-        # Update hazard display
-        hazard_info = self.pipeline.get_hazard_info()
-        self.ui.update_hazard_display(hazard_info)
-        
-        # Log forwarding actions if any
+        lines.append(f"MEM/WB: write_data=0x{pipeline.mem_wb.write_data:04X}, "
+                     f"write_reg={self._register_label(pipeline.mem_wb.write_register)}")
+        lines.append("===================\n")
+
+        # Forwarding actions if any
         if forwarding:
-            self.ui_log_callback("\nForwarding actions:")
-            for action in forwarding:
-                self.ui_log_callback(f"- {action}")
+            lines.append("\nForwarding actions:")
+            lines.extend(f"- {action}" for action in forwarding)
+        self._log("\n".join(lines), LogLevel.TRACE)
 
-    def _increment_pc_and_line(self):
-        self.program_counter += 4
-        self.pc_update_callback(self.program_counter)
-        self.current_line += 1
-        
-    def _get_instruction_handler(self, command):
-        instruction_map = {
-            # R-Format
-            "add": self._handle_r_type_arithmetic,
-            "sub": self._handle_r_type_arithmetic,
-            "and": self._handle_r_type_logical,
-            "or": self._handle_r_type_logical,
-            "xor": self._handle_r_type_logical,
-            "sll": self._handle_shift,
-            "srl": self._handle_shift,
-            "slt": self._handle_slt,
-            # I-Format
-            "lw": self._handle_lw,
-            "sw": self._handle_sw,
-            "addi": self._handle_addi,
-            "beq": self._handle_branch,
-            "bne": self._handle_branch,
-            "li": self._handle_li,
-            "andi": self._handle_logical_immediate,
-            "ori": self._handle_logical_immediate,
-            # J-Format
-            "j": self._handle_jump,
-            "jal": self._handle_jump,
-            "jr": self._handle_jr,
-            # System
-            "syscall": self._handle_syscall
-        }
-        return instruction_map.get(command)
-    
-    def _handle_r_type_arithmetic(self, command, parts):
-        dest, src1, src2 = parts
-        self.commands.execute_arithmetic(dest, src1, src2, command)
-
-    def _handle_r_type_logical(self, command, parts):
-        dest, src1, src2 = parts
-        operation_map = {
-            "and": lambda x, y: x & y,
-            "or": lambda x, y: x | y,
-            "xor": lambda x, y: x ^ y
-        }
-        operation = operation_map.get(command)
-        if operation:
-            self.commands.execute_logical(dest, src1, src2, operation)
-        else:
-            self.ui_log_callback(f"Error: Invalid R-type logical operation: {command}")
-    
-    def _handle_shift(self, command, parts):
-      dest, src1, shift_amount = parts
-      
-      if isinstance(shift_amount, str) and shift_amount.startswith("$"):
-          shift_value = self.commands.get_register_value(shift_amount)
-      else:
-          try:
-              shift_value = int(shift_amount)
-          except ValueError:
-              self.ui_log_callback(f"Error: Invalid shift amount: {shift_amount}")
-              return None
-      
-      operation_map = {
-          "sll": lambda x, y: x << y,
-          "srl": lambda x, y: x >> y
-      }
-
-      operation = operation_map.get(command)
-      if operation:
-        self.commands.execute_shift(dest, src1, shift_value, operation)
-      else:
-        self.ui_log_callback(f"Error: Invalid shift operation: {command}")
-
-    def _handle_lw(self, _, parts):
-        rt, offset = parts
-        try:
-            match = re.match(r'(-?\d+)\((\w+)\)', offset)
-            if match:
-                offset_val = int(match.group(1))
-                base_reg = match.group(2)
-                base_val = self.commands.get_register_value(base_reg)
-                
-                # Calculate memory address (in words, not bytes)
-                memory_loc = offset_val // 2
-                
-                try:
-                    value = self.memory.read_word(memory_loc)
-                    self.commands.update_register_value(rt, value)
-                    return f"Loaded 0x{value:04X} from memory location {memory_loc}"
-                except MemoryError as e:
-                    return f"Error reading from memory: {str(e)}"
-        except Exception as e:
-            return f"Error in load word: {str(e)}"
-
-    def _handle_sw(self, _, parts):
-        rt, offset = parts
-        try:
-            match = re.match(r'(-?\d+)\((\w+)\)', offset)
-            if match:
-                offset_val = int(match.group(1))
-                base_reg = match.group(2)
-                base_val = self.commands.get_register_value(base_reg)
-                
-                # Calculate memory address (in words, not bytes)
-                memory_loc = offset_val // 2
-                value = self.commands.get_register_value(rt)
-                
-                try:
-                    self.memory.write_word(memory_loc, value)
-                    return f"Stored 0x{value:04X} at memory location {memory_loc}"
-                except MemoryError as e:
-                    return f"Error writing to memory: {str(e)}"
-        except Exception as e:
-            return f"Error in store word: {str(e)}"
-
-    def _handle_slt(self, _, parts):
-        dest, src1, src2 = parts
-        self.commands.execute_slt(dest, src1, src2)
-
-    def _handle_branch(self, command, parts):
-        reg1, reg2, label = parts
-        val1 = self.commands.get_register_value(reg1)
-        val2 = self.commands.get_register_value(reg2)
-        
-        if command == "beq" and val1 == val2:
-            self._jump_to_label(label, f"Branching to {label} (PC={self.program_counter})")
-        elif command == "bne" and val1 != val2:
-            self._jump_to_label(label, f"Branching to {label} (PC={self.program_counter})")
-    
-    def _handle_jump(self, command, parts):
-        label = parts[0]
-        if command == "j":
-           self._jump_to_label(label, f"Jumping to {label} (PC={self.program_counter})")
-        elif command == "jal":
-            next_instruction = self.program_counter + 4
-            self.commands.update_register_value("$ra", next_instruction)
-            self._jump_to_label(label, f"Jumping to {label} and storing return address (PC={self.program_counter})")
-
-    def _jump_to_label(self, label, log_message):
-      self.program_counter = self.labels[label] * 4
-      self.current_line = self.labels[label]
-      self.pc_update_callback(self.program_counter)
-      self.ui_log_callback(log_message)
-
-    def _handle_addi(self, _, parts):
-        dest, src1, immediate = parts
-        self.commands.execute_addi(dest, src1, int(immediate))
-    
-    def _handle_jr(self, _, parts):
-        register = parts[0]
-        return_address = self.commands.get_register_value(register)
-        
-        # Set PC to return address
-        self.program_counter = return_address - 4  # Subtract 4 because PC will be incremented after this
-        self.current_line = (return_address - 4) // 4
-        self.pc_update_callback(self.program_counter)
-        
-        self.ui_log_callback(f"Returning to address {return_address:08X}")
-
-    def _handle_li(self, _, parts):
-        dest, immediate = parts
-        try:
-            value = int(immediate)
-            self.commands.update_register_value(dest, value)
-            return f"Loaded {value} into {dest}"
-        except ValueError:
-            return f"Error: Invalid immediate value {immediate}"
-
-    def _handle_syscall(self, _, parts):
-        service = self.commands.get_register_value("$v0")
-        if service == 10:  # Exit program
-            return "Program exit requested"
-        return f"Syscall service {service} executed"
-
-    def _handle_logical_immediate(self, command, parts):
-        dest, src1, immediate = parts
-        try:
-            imm_value = int(immediate)
-            self.commands.execute_logical_immediate(dest, src1, imm_value, command)
-            return f"Executed {command} {dest}, {src1}, {immediate}"
-        except ValueError:
-            return f"Error: Invalid immediate value {immediate}"
+    @staticmethod
+    def _register_label(index: int) -> str:
+        return REGISTER_NAMES[index] if index >= 0 else "None"
@@ -0,0 +1,243 @@
+# fuzz.py
+"""Differential fuzzing: random programs run on the pipeline and a fast engine.
+
+The cycle-accurate MIPSExecutor is the reference. Every generated program
+terminates: loops count down a register nothing else writes, branches and
+jumps only go forward within their own block, and subroutines return with
+jr R7. A case fails when the other engine ends with different registers,
+data memory or retired-instruction count; failing programs are then cut
+down line by line while the difference persists.
+"""
+from dataclasses import dataclass, field
+import random
+from typing import Callable, Dict, List, Optional
+from block_engine import BlockEngine
+from console_log import LogLevel
+from mips_sim import load_program
+
+DEFAULT_MAX_CYCLES = 20_000  # Generated programs finish far sooner; this only catches generator bugs
+
+_R_TYPE = ("add", "sub", "and", "or", "xor", "slt")
+_SHIFTS = ("sll", "srl")
+_I_TYPE = ("addi", "andi", "ori")
+# Random instructions write only these: R0 stays zero for the loop exit tests, R5 and R6 count
+# loops and R7 holds the return address
+_DESTINATIONS = ("R1", "R2", "R3", "R4")
+_SOURCES = ("R0", "R1", "R2", "R3", "R4", "R5", "R6", "R7")
+_LOOP_COUNTERS = ("R5", "R6")  # One per nesting level
+
+class ProgramGenerator:
+    """Random, always-terminating programs over the simulator's opcode set."""
+
+    def __init__(self, rng: random.Random, length: int = 24, data_words: int = 6, subroutines: int = 2,
+                 max_loop_iterations: int = 4):
+        self.rng = rng
+        self.length = length  # Rough number of instructions in the main body
+        self.data_words = data_words
+        self.subroutines = subroutines
+        self.max_loop_iterations = max_loop_iterations
+        self._labels = 0
+
+    def _label(self) -> str:
+        self._labels += 1
+        return f"L{self._labels}"
+
+    def _immediate(self, low: int, high: int) -> int:
+        """Mostly a small value in [low, high]; now and then one with bit 15 set,
+        so that the sign bit reaches shifts, slt and the upper half of memory words."""
+        if self.rng.random() < 0.3:
+            return self.rng.randint(0x8000, 0xFFFF)
+        return self.rng.randint(low, high)
+
+    def _simple(self) -> str:
+        """One instruction that only writes a destination register or memory."""
+        rng = self.rng
+        kind = rng.random()
+        rd, rs, rt = rng.choice(_DESTINATIONS), rng.choice(_SOURCES), rng.choice(_SOURCES)
+        if kind < 0.35:
+            return f"{rng.choice(_R_TYPE)} {rd} {rs} {rt}"
+        if kind < 0.45:
+            # Half the time an amount at a word or byte edge, where shifts go wrong
+            amount = rng.choice((0, 1, 7, 8, 15, 16)) if rng.random() < 0.5 else rng.randint(0, 17)
+            # Shift the registers that hold program values, not R0, counters or R7
+            return f"{rng.choice(_SHIFTS)} {rd} {rng.choice(_DESTINATIONS)} {amount}"
+        if kind < 0.6:
+            return f"{rng.choice(_I_TYPE)} {rd} {rs} {self._immediate(-40, 40)}"
+        if kind < 0.68:
+            return f"li {rd} {self._immediate(-5, 300)}"
+        # Mostly inside the data words, now and then just outside data memory
+        offset = rng.randint(-1, self.data_words + 1) * 2 if rng.random() < 0.9 else rng.randint(-4, 300) * 2
+        if kind < 0.84:
+            return f"lw {rd} {offset}({rs})"
+        return f"sw {rt} {offset}({rs})"
+
+    def _block(self, size: int, depth: int, calls: bool) -> List[str]:
+        """Straight-line code with forward branches, nested loops and calls."""
+        rng = self.rng
+        lines: List[str] = []
+        pending: List[str] = []  # Forward labels still to be placed in this block
+        while len(lines) < size:
+            kind = rng.random()
+            if kind < 0.12:
+                label = self._label()
+                op = rng.choice(("beq", "bne", "beq", "bne", "j"))
+                if op == "j":
+                    lines.append(f"j {label}")
+                else:
+                    lines.append(f"{op} {rng.choice(_SOURCES)} {rng.choice(_SOURCES)} {label}")
+                pending.append(label)
+            elif kind < 0.2 and pending:
+                lines.append(f"{pending.pop(rng.randrange(len(pending)))}:")
+            elif kind < 0.27 and depth < len(_LOOP_COUNTERS) and size - len(lines) > 3:
+                counter = _LOOP_COUNTERS[depth]
+                label = self._label()
+                lines.append(f"li {counter} {rng.randint(1, self.max_loop_iterations)}")
+                lines.append(f"{label}:")
+                lines.extend(self._block(rng.randint(2, max(2, (size - len(lines)) // 2)), depth + 1, calls))
+                lines.append(f"addi {counter} {counter} -1")
+                lines.append(f"bne {counter} R0 {label}")
+            elif kind < 0.32 and calls and self.subroutines:
+                lines.append(f"jal S{rng.randrange(self.subroutines)}")
+            else:
+                lines.append(self._simple())
+        lines.extend(f"{label}:" for label in pending)
+        return lines
+
+    def generate(self) -> str:
+        rng = self.rng
+        self._labels = 0
+        lines = [".data"]
+        lines.extend(f"v{index}: .word {self._immediate(-100, 1000)}" for index in range(self.data_words))
+        lines.extend([".text", "main:"])
+        lines.extend(self._block(self.length, 0, True))
+        lines.append("j END")
+        for index in range(self.subroutines):
+            # Subroutines write neither loop counters nor R7 and call nothing, so jr R7 always returns
+            lines.append(f"S{index}:")
+            lines.extend(self._block(rng.randint(1, 6), len(_LOOP_COUNTERS), False))
+            lines.append("jr R7")
+        lines.append("END:")
+        return "\n".join(lines)
+
+# Engine runners: (source, max cycles or instructions, log) -> final state
+Runner = Callable[[str, int, Callable[[str, LogLevel], None]], Dict]
+
+def _state(executor, instructions: int, finished: bool) -> Dict:
+    return {
+        "registers": list(executor.commands.registers[:8]),
+        "memory": executor.memory.get_data_memory_values(),
+        "instructions": instructions,
+        "finished": finished,
+    }
+
+def run_pipeline(code: str, budget: int, log) -> Dict:
+    executor = load_program(code, log)
+    executor.live_updates = False
+    executor.decode_program()
+    executor.run(budget)
+    return _state(executor, executor.instructions_retired, executor.is_finished())
+
+def run_block(code: str, budget: int, log) -> Dict:
+    executor = load_program(code, log)
+    engine = BlockEngine(executor)
+    engine.run(budget)
+    return _state(executor, engine.instructions_retired, engine.is_finished())
+
+def run_lanes(code: str, budget: int, log) -> Dict:
+    from lane_engine import LaneEngine  # Needs NumPy
+    engine = LaneEngine(load_program(code, log), 1)
+    engine.run(budget)
+    state = engine.lane_state(0)
+    return {
+        "registers": list(state["registers"].values()),
+        "memory": state["memory"],
+        "instructions": state["stats"]["instructions"],
+        "finished": state["stats"]["finished"],
+    }
+
+ENGINES: Dict[str, Runner] = {"pipeline": run_pipeline, "block": run_block, "lanes": run_lanes}
+
+def compare(code: str, engine: str = "block", max_cycles: int = DEFAULT_MAX_CYCLES) -> Optional[List[str]]:
+    """Run code on the reference pipeline and on engine and list the differences.
+
+    Returns None if the program is not a valid test: it fails to assemble
+    or decode, or the reference does not finish within max_cycles.
+    """
+    errors: List[str] = []
+
+    def log(message: str, level: LogLevel) -> None:
+        if level >= LogLevel.ERROR and not message.startswith("Error reading") \
+                and not message.startswith("Error writing"):
+            errors.append(message)
+
+    reference = run_pipeline(code, max_cycles, log)
+    if errors or not reference["finished"]:
+        return None
+    # Every cycle retires at most one instruction, so this budget is never the limit
+    other = ENGINES[engine](code, max_cycles, log)
+    differences = []
+    for index, (expected, actual) in enumerate(zip(reference["registers"], other["registers"])):
+        if expected != actual:
+            differences.append(f"R{index}: pipeline {expected}, {engine} {actual}")
+    for index, (expected, actual) in enumerate(zip(reference["memory"], other["memory"])):
+        if expected != actual:
+            differences.append(f"memory word {index}: pipeline {expected}, {engine} {actual}")
+    for key in ("instructions", "finished"):
+        if reference[key] != other[key]:
+            differences.append(f"{key}: pipeline {reference[key]}, {engine} {other[key]}")
+    return differences
+
+def minimize(code: str, still_fails: Callable[[str], bool]) -> str:
+    """Delta-debug code down to a smaller program for which still_fails holds.
+
+    Removes chunks of lines, halving the chunk size whenever nothing more can
+    go, down to single lines. Candidates that no longer assemble or finish
+    simply do not fail, so they are never kept.
+    """
+    lines = code.split("\n")
+    chunk = max(1, len(lines) // 2)
+    while True:
+        index = 0
+        removed = False
+        while index < len(lines):
+            candidate = lines[:index] + lines[index + chunk:]
+            if candidate and still_fails("\n".join(candidate)):
+                lines = candidate
+                removed = True
+            else:
+                index += chunk
+        if chunk == 1 and not removed:
+            return "\n".join(lines)
+        chunk = max(1, chunk // 2) if not removed else chunk
+
+@dataclass
+class FuzzFailure:
+    seed: int
+    source: str
+    minimized: str
+    differences: List[str] = field(default_factory=list)  # Of the minimised program
+
+def fuzz(cases: int, engine: str = "block", seed: int = 0, max_cycles: int = DEFAULT_MAX_CYCLES,
+         length: int = 24, shrink: bool = True, stop_after: Optional[int] = None) -> Dict:
+    """Run cases random programs; returns counts and the failures found.
+
+    Case i uses seed + i, so any case can be regenerated on its own with
+    ProgramGenerator(random.Random(seed + i), length).generate().
+    """
+    failures: List[FuzzFailure] = []
+    invalid = 0
+    for case in range(cases):
+        code = ProgramGenerator(random.Random(seed + case), length).generate()
+        differences = compare(code, engine, max_cycles)
+        if differences is None:
+            invalid += 1
+            continue
+        if not differences:
+            continue
+        minimized = minimize(code, lambda candidate: bool(compare(candidate, engine, max_cycles))) \
+            if shrink else code
+        failures.append(FuzzFailure(seed + case, code, minimized, compare(minimized, engine, max_cycles)))
+        if stop_after is not None and len(failures) >= stop_after:
+            cases = case + 1
+            break
+    return {"cases": cases, "invalid": invalid, "failures": failures}
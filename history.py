@@ -0,0 +1,191 @@
+# history.py
+from array import array
+from bisect import bisect_left, bisect_right
+import copy
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
+from pipeline import Hazard, HazardType, PipelineRegister, PipelineStage
+
+if TYPE_CHECKING:
+    from executor import MIPSExecutor
+
+@dataclass
+class Checkpoint:
+    """Machine state before the cycle at position, apart from data memory."""
+    position: int
+    registers: array                  # Register file including the PC
+    latches: Tuple[PipelineRegister, ...]  # IF/ID, ID/EX, EX/MEM, MEM/WB; never mutated once latched
+    counters: bytes
+    current_stages: Dict[PipelineStage, object]
+    current_hazards: List[Hazard]
+    forwarding_actions: List[str]
+    hazards_recorded: int             # Length of Pipeline.all_hazards
+    hazard_counts: Dict[HazardType, int]
+    branch_predictor: object
+    icache: object
+    dcache: object
+
+class ExecutionHistory:
+    """Lets a MIPSExecutor run backwards in time.
+
+    Every interval cycles a checkpoint copies the small parts of the machine:
+    registers, pipeline latches, counters, hazard log length, predictor and
+    cache state. Data memory can be large, so it is never copied; instead
+    every store logs the word it overwrites. Going back to cycle T undoes
+    the logged stores down to the nearest checkpoint at or before T, restores
+    that checkpoint and replays the few cycles up to T, so the cost depends
+    on the distance travelled and the interval, never on the program length.
+    Only the newest max_checkpoints intervals are kept.
+
+    Memory written outside the pipeline (e.g. by the BlockEngine) is not
+    logged; reset() the history after doing that.
+    """
+
+    DEFAULT_INTERVAL = 256
+    DEFAULT_MAX_CHECKPOINTS = 4096
+
+    def __init__(self, executor: 'MIPSExecutor', interval: int = DEFAULT_INTERVAL,
+                 max_checkpoints: int = DEFAULT_MAX_CHECKPOINTS):
+        if interval <= 0 or max_checkpoints <= 0:
+            raise ValueError("Checkpoint interval and count must be positive")
+        self.executor = executor
+        self.interval = interval
+        self.max_checkpoints = max_checkpoints
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the past; the current state becomes position 0."""
+        self.position = 0  # Cycles run since the last reset
+        self.checkpoints: List[Checkpoint] = []
+        self._checkpoint_positions: List[int] = []
+        # Undo log, one entry per store: cycle number (position after the cycle), word index, old value
+        self._undo_cycles = array('Q')
+        self._undo_indices = array('Q')
+        self._undo_values = array('H')
+
+    @property
+    def oldest_position(self) -> int:
+        """Earliest position that can still be reached."""
+        return self._checkpoint_positions[0] if self.checkpoints else self.position
+
+    def before_cycle(self) -> None:
+        """Called by the executor at the start of every clock cycle."""
+        if self.position % self.interval == 0 and (
+                not self.checkpoints or self._checkpoint_positions[-1] != self.position):
+            self._take_checkpoint()
+        self.position += 1
+
+    def log_store(self, index: int) -> None:
+        """Called by the executor before a store to data memory word index."""
+        memory = self.executor.memory
+        if 0 <= index < memory.size:
+            self._undo_cycles.append(self.position)
+            self._undo_indices.append(index)
+            self._undo_values.append(memory.memory[index])
+
+    def _take_checkpoint(self) -> None:
+        executor = self.executor
+        pipeline = executor.pipeline
+        self.checkpoints.append(Checkpoint(
+            self.position,
+            array(executor.commands.registers.typecode, executor.commands.registers),
+            (pipeline.if_id, pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb),
+            pipeline.counters.values.tobytes(),
+            dict(pipeline.current_stages),
+            pipeline.current_hazards,
+            pipeline.forwarding_actions,
+            len(pipeline.all_hazards),
+            dict(pipeline.hazard_counts),
+            copy.deepcopy(executor.branch_predictor),
+            copy.deepcopy(executor.icache),
+            copy.deepcopy(executor.dcache),
+        ))
+        self._checkpoint_positions.append(self.position)
+        if len(self.checkpoints) > self.max_checkpoints:
+            del self.checkpoints[0], self._checkpoint_positions[0]
+            # Stores made before the oldest checkpoint can no longer be undone to
+            drop = bisect_right(self._undo_cycles, self._checkpoint_positions[0])
+            del self._undo_cycles[:drop], self._undo_indices[:drop], self._undo_values[:drop]
+
+    def _restore(self, index: int) -> None:
+        """Put the machine back to checkpoints[index] and forget everything after it."""
+        checkpoint = self.checkpoints[index]
+        executor = self.executor
+        memory = executor.memory
+
+        # Undo the stores of every later cycle, newest first
+        keep = bisect_right(self._undo_cycles, checkpoint.position)
+        words = memory.memory
+        for position in range(len(self._undo_cycles) - 1, keep - 1, -1):
+            word = self._undo_indices[position]
+            words[word] = self._undo_values[position]
+            memory.dirty_words.add(word)
+        del self._undo_cycles[keep:], self._undo_indices[keep:], self._undo_values[keep:]
+
+        executor.commands.registers[:] = checkpoint.registers
+        pipeline = executor.pipeline
+        pipeline.if_id, pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb = checkpoint.latches
+        pipeline.counters.values[:] = array(pipeline.counters.values.typecode, checkpoint.counters)
+        pipeline.current_stages.update(checkpoint.current_stages)
+        pipeline.current_hazards = checkpoint.current_hazards
+        pipeline.forwarding_actions = checkpoint.forwarding_actions
+        for hazard in pipeline.all_hazards[checkpoint.hazards_recorded:]:
+            pipeline._hazard_index.discard(hazard)
+        del pipeline.all_hazards[checkpoint.hazards_recorded:]
+        pipeline.hazard_counts = dict(checkpoint.hazard_counts)
+        # The checkpoint keeps its own copies, so it can be restored again
+        executor.branch_predictor = copy.deepcopy(checkpoint.branch_predictor)
+        executor.icache = copy.deepcopy(checkpoint.icache)
+        executor.dcache = copy.deepcopy(checkpoint.dcache)
+
+        del self.checkpoints[index + 1:], self._checkpoint_positions[index + 1:]
+        self.position = checkpoint.position
+
+    def _replay(self, cycles: int) -> None:
+        # Re-running cycles that already ran once: no log output and no trace records
+        executor = self.executor
+        log_callback, trace = executor.ui_log_callback, executor.trace
+        executor.ui_log_callback, executor.trace = (lambda message, level: None), None
+        try:
+            for _ in range(cycles):
+                executor._clock()
+        finally:
+            executor.ui_log_callback, executor.trace = log_callback, trace
+
+    def travel(self, target: int) -> int:
+        """Move back to position target (clamped to the reachable range); returns the position reached."""
+        if not self.checkpoints or target >= self.position:
+            return self.position
+        target = max(target, self.oldest_position)
+        index = bisect_right(self._checkpoint_positions, target) - 1
+        self._restore(index)
+        self._replay(target - self.position)
+        return self.position
+
+    def step_back(self, cycles: int = 1) -> int:
+        """Undo the last cycles clock cycles; returns the position reached."""
+        return self.travel(self.position - cycles)
+
+    def run_back(self, stop: Callable[[], bool]) -> int:
+        """Go back to the latest earlier position at which stop() is true.
+
+        stop is evaluated against the executor's state. Intervals are searched
+        newest first, each replayed once to find the hit, so the work grows
+        with the distance travelled. Without a hit this ends at the oldest
+        reachable position. Returns the position reached.
+        """
+        end = self.position
+        while True:
+            index = bisect_left(self._checkpoint_positions, end) - 1
+            if index < 0:
+                return self.travel(end)
+            start = self._checkpoint_positions[index]
+            self.travel(start)
+            found = start if stop() else -1
+            while self.position < end - 1:
+                self._replay(1)
+                if stop():
+                    found = self.position
+            if found >= 0:
+                return self.travel(found)
+            end = start
@@ -0,0 +1,206 @@
+# image_loader.py
+from array import array
+import mmap
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+from assembler import IRInstruction, Operand, OperandKind, Program
+from converter import IMAGE_HEADER, IMAGE_MAGIC, MIPSConverter
+from decoder import Opcode
+from register_data import REGISTER_NAMES
+
+class ImageError(Exception):
+    """Raised when a file is not a valid 16-bit program image."""
+    pass
+
+# Instruction fields as laid out by MIPSConverter.encode_instruction
+def _rs(word: int) -> int:
+    return (word >> 10) & 0x7
+
+def _rt(word: int) -> int:
+    return (word >> 7) & 0x7
+
+def _rd(word: int) -> int:
+    return (word >> 4) & 0x7
+
+def _offset(word: int) -> int:
+    # Signed 7-bit immediate
+    value = word & 0x7F
+    return value - 0x80 if value & 0x40 else value
+
+def _register(index: int) -> Operand:
+    return Operand(OperandKind.REGISTER, index)
+
+def _label(address: int) -> str:
+    return f"L{address}"
+
+def _data_name(index: int) -> str:
+    # Images keep data values but not variable names
+    return f"D{index}"
+
+# Decoded word: (opcode, operands, branch/jump target word address or None)
+Decoded = Tuple[Opcode, Tuple[Operand, ...], Optional[int]]
+
+class ImageDecoder:
+    """Table-driven decoder from 16-bit instruction words to IRInstructions.
+
+    The top three bits of a word index a table of field decoders, one per
+    opcode of MIPSConverter.OPCODE_MAP; opcode 000 continues through a second
+    table indexed by the funct field. Both tables are built from the
+    converter's maps, so the decoder always agrees with the encoder.
+    """
+
+    def __init__(self):
+        converter = MIPSConverter()
+        self.FUNCT_TABLE: Dict[int, Opcode] = {
+            funct: op for op, funct in converter.FUNCT_MAP.items() if converter.ENCODED_OPCODES[op] == "add"
+        }
+        handlers: Dict[str, Callable[[int, int], Decoded]] = {
+            "add": self._decode_funct,
+            "sub": self._decode_r_type(Opcode.SUB),
+            "and": self._decode_r_type(Opcode.AND),
+            "or": self._decode_r_type(Opcode.OR),
+            "lw": self._decode_memory(Opcode.LW),
+            "sw": self._decode_memory(Opcode.SW),
+            "beq": self._decode_branch,
+            "j": self._decode_jump,
+        }
+        self.OPCODE_TABLE: List[Callable[[int, int], Decoded]] = [None] * 8
+        for name, opcode in converter.OPCODES.items():
+            self.OPCODE_TABLE[opcode] = handlers[name]
+        # Words without a branch or jump decode the same at any address
+        self._word_cache: Dict[int, Tuple[Opcode, str, Tuple[Operand, ...], str]] = {}
+
+    def _decode_funct(self, word: int, address: int) -> Decoded:
+        op = self.FUNCT_TABLE.get(word & 0xF)
+        if op is None:
+            raise ImageError(f"Unknown funct {word & 0xF}")
+        if op in (Opcode.SLL, Opcode.SRL):
+            # The shift amount travels in the rt field
+            return op, (_register(_rd(word)), _register(_rs(word)), Operand(OperandKind.IMMEDIATE, _rt(word))), None
+        return op, (_register(_rd(word)), _register(_rs(word)), _register(_rt(word))), None
+
+    @staticmethod
+    def _decode_r_type(op: Opcode) -> Callable[[int, int], Decoded]:
+        def decode(word: int, address: int) -> Decoded:
+            if word & 0xF:
+                raise ImageError(f"Unknown funct {word & 0xF}")
+            return op, (_register(_rd(word)), _register(_rs(word)), _register(_rt(word))), None
+        return decode
+
+    @staticmethod
+    def _decode_memory(op: Opcode) -> Callable[[int, int], Decoded]:
+        def decode(word: int, address: int) -> Decoded:
+            return op, (_register(_rt(word)), Operand(OperandKind.MEMORY, _offset(word), _rs(word))), None
+        return decode
+
+    @staticmethod
+    def _decode_branch(word: int, address: int) -> Decoded:
+        target = address + 1 + _offset(word)
+        if target < 0:
+            raise ImageError(f"Branch target {target} is before the start of the image")
+        return Opcode.BEQ, (_register(_rs(word)), _register(_rt(word)),
+                            Operand(OperandKind.LABEL, label=_label(target))), target
+
+    @staticmethod
+    def _decode_jump(word: int, address: int) -> Decoded:
+        target = word & 0x1FFF
+        return Opcode.J, (Operand(OperandKind.LABEL, label=_label(target)),), target
+
+    @staticmethod
+    def _format(op: Opcode, operands: Tuple[Operand, ...]) -> str:
+        # Same spelling as the assembler's normalised source text
+        tokens = [op.name.lower()]
+        for operand in operands:
+            if operand.kind == OperandKind.REGISTER:
+                tokens.append(REGISTER_NAMES[operand.value])
+            elif operand.kind == OperandKind.MEMORY:
+                tokens.append(f"{operand.value}({REGISTER_NAMES[operand.base]})")
+            elif operand.kind == OperandKind.LABEL:
+                tokens.append(operand.label)
+            else:
+                tokens.append(str(operand.value))
+        return " ".join(tokens)
+
+    def decode_words(self, words) -> Program:
+        """Decode a sequence of instruction words into a runnable Program.
+
+        Word i becomes instruction slot i. Every branch or jump target gets a
+        synthetic label L<address>, so the executor and block engine see the
+        same symbol table they would for assembled code. A word that is not a
+        valid instruction is kept with an error and reported when decoded.
+        """
+        program = Program()
+        instructions = program.instructions
+        table = self.OPCODE_TABLE
+        cache = self._word_cache
+        targets = set()
+        for address, word in enumerate(words):
+            cached = cache.get(word)
+            if cached is not None:
+                instructions.append(IRInstruction(address, address + 1, *cached[:3], source=cached[3]))
+                continue
+            try:
+                op, operands, target = table[word >> 13](word, address)
+            except ImageError as e:
+                instructions.append(IRInstruction(address, address + 1, Opcode.NOP, ".word",
+                                                  source=f".word 0x{word:04X}",
+                                                  error=f"Invalid instruction word 0x{word:04X}: {e}"))
+                continue
+            mnemonic = op.name.lower()
+            source = self._format(op, operands)
+            if target is None:
+                cache[word] = (op, mnemonic, operands, source)
+            else:
+                targets.add(target)
+            instructions.append(IRInstruction(address, address + 1, op, mnemonic, operands, source=source))
+
+        for target in sorted(targets):
+            label = _label(target)
+            program.symbols[label] = target
+            if target < len(instructions):
+                # Shown in instruction memory like a label written on the instruction's line
+                instruction = instructions[target]
+                instruction.label = label
+                instruction.source = f"{label}: {instruction.source}"
+                program.labels_at[target] = label
+        return program
+
+def read_image(path: str) -> Tuple[array, array]:
+    """Map an image of little-endian 16-bit words; returns its instruction and data words.
+
+    A raw image is all instructions; one that starts with IMAGE_HEADER also
+    carries initial data memory.
+    """
+    words = array('H')
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size % 2:
+            raise ImageError(f"{path}: image size {size} is not a whole number of 16-bit words")
+        if size == 0:
+            return words, array('H')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            text_count = None
+            if size >= IMAGE_HEADER.size and mapped[:len(IMAGE_MAGIC)] == IMAGE_MAGIC:
+                _, text_count, data_count = IMAGE_HEADER.unpack_from(mapped, 0)
+                if IMAGE_HEADER.size + 2 * (text_count + data_count) != size:
+                    raise ImageError(f"{path}: header gives {text_count} instruction and {data_count} data words, "
+                                     f"but the image holds {(size - IMAGE_HEADER.size) // 2}")
+                words.frombytes(mapped[IMAGE_HEADER.size:])
+            else:
+                words.frombytes(mapped)
+    if sys.byteorder != "little":
+        words.byteswap()
+    if text_count is None:
+        return words, array('H')
+    return words[:text_count], words[text_count:]
+
+def load_image(path: str, decoder: Optional[ImageDecoder] = None) -> Program:
+    """Load an image written by MIPSConverter.encode_program (or `mips_sim encode`) as a Program.
+
+    Initial data words, if the image has them, become .data variables
+    D0, D1, ... in order; otherwise data memory starts zeroed.
+    """
+    text, data = read_image(path)
+    program = (decoder or ImageDecoder()).decode_words(text)
+    program.data.update((_data_name(index), value) for index, value in enumerate(data))
+    return program
@@ -1,9 +1,18 @@
 import tkinter as tk
 import tkinter.ttk as ttk
-from typing import List, Dict
+from typing import Iterable, List, Dict, Set, TYPE_CHECKING
 from register_data import register
+from console_log import ConsoleLog, LogLevel
+from branch_predictor import PREDICTORS
+
+if TYPE_CHECKING:
+    from assembler import IRInstruction
 
 class MIPSUI:
+    CONSOLE_FLUSH_INTERVAL_MS = 100  # Buffered console lines are written at most 10 times per second
+    HAZARD_ROW_LIMIT = 500  # Oldest hazard rows are dropped beyond this
+    CODE_CHANGE_DELAY_MS = 300  # Re-assemble once typing pauses this long
+
     def __init__(self, root: tk.Tk, data_memory_base: int, program_counter_callback):
         self.root = root
         # Set theme colors with new color scheme
@@ -27,10 +36,26 @@ class MIPSUI:
         self.data_memory_base = data_memory_base
         self.program_counter_callback = program_counter_callback
         self.data_memory_values = [0] * (512 // 4)  # Initialize for 512 bytes / 4 bytes per word
+        self._data_memory_rows: List[str] = []  # Row item ids, so single cells can be updated in place
+        self.hazard_rows_shown = 0  # Number of Pipeline.all_hazards entries already appended to the tree
+        self._breakpoint_slots: Set[int] = set()  # Instruction rows drawn with the breakpoint tag
 
         self._run_button_action = lambda: None
         self._step_button_action = lambda: None
+        self._step_back_button_action = lambda: None
+        self._continue_button_action = lambda: None
+        self._run_back_button_action = lambda: None
+        self._breakpoint_toggle_action = lambda slot: None
         self._convert_button_action = lambda: None
+        self._clear_button_action = lambda: None
+        self._stop_button_action = lambda: None
+        self._log_level_action = lambda level: None
+        self._code_changed_action = lambda code: None
+        self._code_changed_job = None
+
+        # Console lines are buffered and written to the Text widget in batches
+        self.console_log = ConsoleLog()
+        self._console_flush_job = None
 
         self._create_widgets()
         self._update_line_numbers()
@@ -169,6 +194,9 @@ class MIPSUI:
         self.instruction_memory_tree.pack(fill="both", expand=True, padx=5, pady=5)
         # Highlight Tag configure
         self.instruction_memory_tree.tag_configure('highlight', background='#00ADB5', foreground='#EEEEEE')
+        self.instruction_memory_tree.tag_configure('breakpoint', foreground='#FF5555')
+        # Clicking a row toggles a breakpoint on that instruction
+        self.instruction_memory_tree.bind('<Button-1>', self._instruction_row_clicked)
 
         # Data Memory Frame (Right)
         self.data_frame = tk.Frame(right_memory_frame, bg=self.COLORS['bg_light'])
@@ -186,6 +214,7 @@ class MIPSUI:
 
         # Data Memory TreeView with increased height
         columns = ["Address"] + [f"Value(+{i*4})" for i in range(16)]
+        self.data_memory_columns = columns
         self.data_memory_tree = ttk.Treeview(
             self.data_frame, 
             columns=columns, 
@@ -296,8 +325,68 @@ class MIPSUI:
         
         tk.Button(top_frame, text="Clear", command=self._clear_registers, **button_style).pack(side='left', padx=2)
         tk.Button(top_frame, text="Run", command=lambda: self._run_button_action(), **button_style).pack(side='left', padx=2)
+        tk.Button(top_frame, text="Continue", command=lambda: self._continue_button_action(), **button_style).pack(side='left', padx=2)
         tk.Button(top_frame, text="Step", command=lambda: self._step_button_action(), **button_style).pack(side='left', padx=2)
+        tk.Button(top_frame, text="Step Back", command=lambda: self._step_back_button_action(), **button_style).pack(side='left', padx=2)
+        tk.Button(top_frame, text="Run Back", command=lambda: self._run_back_button_action(), **button_style).pack(side='left', padx=2)
         tk.Button(top_frame, text="Convert", command=lambda: self._convert_button_action(), **button_style).pack(side='left', padx=2)
+        tk.Button(top_frame, text="Stop", command=lambda: self._stop_button_action(), **button_style).pack(side='left', padx=2)
+
+        # Animate mode: Run paces itself at the selected instructions per second
+        self.animate_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            top_frame,
+            text="Animate",
+            variable=self.animate_var,
+            bg=self.COLORS['bg_dark'],
+            fg=self.COLORS['text'],
+            selectcolor=self.COLORS['bg_light'],
+            activebackground=self.COLORS['bg_dark'],
+            activeforeground=self.COLORS['text']
+        ).pack(side='left', padx=(10,2))
+        self.speed_scale = tk.Scale(
+            top_frame,
+            from_=1,
+            to=200,
+            orient='horizontal',
+            label="Instr/s",
+            length=140,
+            bg=self.COLORS['bg_dark'],
+            fg=self.COLORS['text'],
+            troughcolor=self.COLORS['bg_light'],
+            highlightthickness=0
+        )
+        self.speed_scale.set(5)
+        self.speed_scale.pack(side='left', padx=2)
+
+        # Console verbosity; TRACE adds the per-cycle pipeline register dump
+        self.log_level_var = tk.StringVar(value=self.console_log.level.name)
+        log_level_menu = tk.OptionMenu(
+            top_frame,
+            self.log_level_var,
+            *[level.name for level in sorted(LogLevel, reverse=True)],
+            command=self._set_log_level
+        )
+        log_level_menu.configure(
+            bg=self.COLORS['bg_light'],
+            fg=self.COLORS['text'],
+            activebackground=self.COLORS['accent'],
+            highlightthickness=0,
+            relief='flat'
+        )
+        log_level_menu.pack(side='left', padx=(10,2))
+
+        # Branch predictor model used by the next Run/Step load
+        self.predictor_var = tk.StringVar(value=next(iter(PREDICTORS)))
+        predictor_menu = tk.OptionMenu(top_frame, self.predictor_var, *PREDICTORS)
+        predictor_menu.configure(
+            bg=self.COLORS['bg_light'],
+            fg=self.COLORS['text'],
+            activebackground=self.COLORS['accent'],
+            highlightthickness=0,
+            relief='flat'
+        )
+        predictor_menu.pack(side='left', padx=2)
 
         # PC Counter Label styling
         self.pc_label = tk.Label(
@@ -493,6 +582,18 @@ class MIPSUI:
         )
         self.line_numbers.config(state='disabled')
         self.line_numbers.yview_moveto(self.edit_text.yview()[0])
+        if event is not None:
+            self._schedule_code_changed()
+
+    def _schedule_code_changed(self):
+        # Debounce: only the last keystroke of a burst triggers re-assembly
+        if self._code_changed_job is not None:
+            self.root.after_cancel(self._code_changed_job)
+        self._code_changed_job = self.root.after(self.CODE_CHANGE_DELAY_MS, self._notify_code_changed)
+
+    def _notify_code_changed(self):
+        self._code_changed_job = None
+        self._code_changed_action(self.get_mips_code())
 
     def _on_mouse_wheel(self, event):
         scroll_amount = -1 * (event.delta // 120)
@@ -515,6 +616,7 @@ class MIPSUI:
         return "break"
 
     def _clear_registers(self):
+        self.console_log.clear()
         self.console_output.delete('1.0', 'end')
         for item in self.instruction_memory_tree.get_children():
             self.instruction_memory_tree.delete(item)
@@ -522,20 +624,23 @@ class MIPSUI:
         for item in self.machine_code_tree.get_children():
             self.machine_code_tree.delete(item)
 
-        initial_values = ["0x0000"] * 16
-        for i in self.data_memory_tree.get_children():
-            self.data_memory_tree.delete(i)
-
-        addresses = [f"0x{self.data_memory_base + (i*32):04X}" for i in range(8)]
-
-        for addr in addresses:
-            self.data_memory_tree.insert("", "end", values=[addr] + initial_values)
+        self.update_data_memory_display([])
 
         for item in self.tree.get_children():
             self.tree.set(item, column="Value", value="0x0000")
         self.update_program_counter_display(0)
         self.program_counter_callback(0)
         self.clear_hazard_display()
+        self._clear_button_action()
+
+    def is_animating(self) -> bool:
+        return self.animate_var.get()
+
+    def get_animation_speed(self) -> int:
+        return int(self.speed_scale.get())
+
+    def get_branch_predictor(self) -> str:
+        return self.predictor_var.get()
 
     def update_program_counter_display(self, pc: int):
         hex_pc = f"0x{pc:04X}"
@@ -544,6 +649,7 @@ class MIPSUI:
     def update_data_memory_display(self, data_memory_values: List[int]):
         for i in self.data_memory_tree.get_children():
             self.data_memory_tree.delete(i)
+        self._data_memory_rows = []
             
         addresses = [f"0x{self.data_memory_base + (i*32):04X}" for i in range(8)]
         
@@ -558,28 +664,72 @@ class MIPSUI:
                 else:
                     row_values.append("0x0000")
 
-            self.data_memory_tree.insert("", "end", values=row_values)
+            self._data_memory_rows.append(self.data_memory_tree.insert("", "end", values=row_values))
+
+    def update_data_memory_cells(self, changed_words: Dict[int, int]):
+        """Update only the cells of words that changed since the last repaint."""
+        if not self._data_memory_rows:
+            return
+        for mem_index, val in changed_words.items():
+            row, column = divmod(mem_index, 16)
+            if row < len(self._data_memory_rows):
+                self.data_memory_tree.set(
+                    self._data_memory_rows[row],
+                    self.data_memory_columns[column + 1],
+                    f"0x{val:04X}"
+                )
 
     def get_mips_code(self):
         return self.edit_text.get('1.0', 'end-1c')
 
-    def log_to_console(self, message):
-        self.console_output.insert('end', f"{message}\n")
+    def log_to_console(self, message, level: LogLevel = LogLevel.INFO):
+        if self.console_log.log(message, level) and self._console_flush_job is None:
+            self._console_flush_job = self.root.after(self.CONSOLE_FLUSH_INTERVAL_MS, self.flush_console)
+
+    def flush_console(self):
+        """Write all buffered lines in one insert and trim the widget to the retention cap."""
+        if self._console_flush_job is not None:
+            self.root.after_cancel(self._console_flush_job)
+            self._console_flush_job = None
+        if not self.console_log.has_pending():
+            return
+        self.console_output.insert('end', "\n".join(self.console_log.drain()) + "\n")
+        line_count = int(self.console_output.index('end-1c').split('.')[0])
+        excess = line_count - self.console_log.max_lines
+        if excess > 0:
+            self.console_output.delete('1.0', f'{excess + 1}.0')
         self.console_output.see('end')
 
-    def set_instruction_memory(self, instructions: List[dict]):
+    def _set_log_level(self, level_name: str):
+        level = LogLevel[level_name]
+        self.console_log.level = level
+        self._log_level_action(level)
+
+    def set_instruction_memory(self, instructions: List['IRInstruction']):
         for item in self.instruction_memory_tree.get_children():
              self.instruction_memory_tree.delete(item)
         
-        for instr in instructions:
-            item_id = self.instruction_memory_tree.insert("", "end", values=(
-                instr['address'],
-                instr['source']
-            ))
-            if 'highlight' in self.instruction_memory_tree.tag_has(item_id):
-                self.instruction_memory_tree.item(item_id, tags='highlight')
-            else:
-                self.instruction_memory_tree.item(item_id, tags='')
+        for slot, instr in enumerate(instructions):
+            self.instruction_memory_tree.insert("", "end", values=(
+                instr.address,
+                instr.source
+            ), tags=self._instruction_row_tags(slot, False))
+
+    def _instruction_row_tags(self, slot: int, highlighted: bool) -> tuple:
+        tags = ('highlight',) if highlighted else ()
+        return tags + ('breakpoint',) if slot in self._breakpoint_slots else tags
+
+    def _instruction_row_clicked(self, event):
+        item_id = self.instruction_memory_tree.identify_row(event.y)
+        if item_id:
+            self._breakpoint_toggle_action(self.instruction_memory_tree.index(item_id))
+
+    def show_breakpoints(self, slots: Iterable[int]):
+        """Mark the instruction rows that carry a breakpoint."""
+        self._breakpoint_slots = set(slots)
+        for slot, item_id in enumerate(self.instruction_memory_tree.get_children()):
+            highlighted = 'highlight' in self.instruction_memory_tree.item(item_id, 'tags')
+            self.instruction_memory_tree.item(item_id, tags=self._instruction_row_tags(slot, highlighted))
     
     def set_machine_code_output(self, machine_code_pairs: List[tuple]):
         for item in self.machine_code_tree.get_children():
@@ -609,10 +759,26 @@ class MIPSUI:
         return rgb_to_hex(rgb)
 
     def update_hazard_display(self, hazard_info: Dict[str, List[dict]]):
-        for item in self.hazard_tree.get_children():
-            self.hazard_tree.delete(item)
+        """Append the hazards that are new since the last update.
+
+        hazard_info should come from Pipeline.get_hazard_info(self.hazard_rows_shown,
+        self.HAZARD_ROW_LIMIT). Only the newest HAZARD_ROW_LIMIT rows are kept in the tree.
+        """
+        if hazard_info["total"] < self.hazard_rows_shown:
+            # The pipeline was reset; start over on the next update
+            self.hazard_tree.delete(*self.hazard_tree.get_children())
+            self.hazard_rows_shown = 0
+            return
+
+        new_hazards = hazard_info["all"]
+        if not new_hazards:
+            return
+        if self.hazard_rows_shown == 0 or hazard_info["start"] > self.hazard_rows_shown:
+            # Drop the blank placeholder row left by clear_hazard_display, or rows
+            # that the newest HAZARD_ROW_LIMIT hazards have pushed out anyway
+            self.hazard_tree.delete(*self.hazard_tree.get_children())
         
-        for hazard in hazard_info["all"]:
+        for hazard in new_hazards:
             self.hazard_tree.insert("", "end", values=(
                 hazard["type"],
                 hazard["source"],
@@ -620,6 +786,11 @@ class MIPSUI:
                 hazard["register"],
                 hazard["resolution"]
             ), tags=(hazard["type"],))
+        self.hazard_rows_shown = hazard_info["start"] + len(new_hazards)
+
+        rows = self.hazard_tree.get_children()
+        if len(rows) > self.HAZARD_ROW_LIMIT:
+            self.hazard_tree.delete(*rows[:len(rows) - self.HAZARD_ROW_LIMIT])
         
         self.hazard_tree.tag_configure('RAW', background=self.COLORS['raw_hazard'])
         self.hazard_tree.tag_configure('WAW', background=self.COLORS['waw_hazard'])
@@ -631,6 +802,7 @@ class MIPSUI:
     def clear_hazard_display(self):
         for item in self.hazard_tree.get_children():
             self.hazard_tree.delete(item)
+        self.hazard_rows_shown = 0
         
         self.hazard_tree.insert("", "end", values=("", "", "", "", ""))
         
@@ -641,13 +813,13 @@ class MIPSUI:
         self.hazard_frame.update()
 
     def highlight_instruction(self, line_number):
-        for item in self.instruction_memory_tree.get_children():
-            if 'highlight' in self.instruction_memory_tree.tag_has(item):
-                self.instruction_memory_tree.item(item, tags='')
+        for item in self.instruction_memory_tree.tag_has('highlight'):
+            slot = self.instruction_memory_tree.index(item)
+            self.instruction_memory_tree.item(item, tags=self._instruction_row_tags(slot, False))
 
         if self.instruction_memory_tree.get_children() and 0 <= line_number < len(self.instruction_memory_tree.get_children()):
             item_id = self.instruction_memory_tree.get_children()[line_number]
-            self.instruction_memory_tree.item(item_id, tags='highlight')
+            self.instruction_memory_tree.item(item_id, tags=self._instruction_row_tags(line_number, True))
             total_rows = len(self.instruction_memory_tree.get_children())
             visible_rows = 8  # Updated to match new height
             scroll_fraction = max(0, min(1, (line_number - visible_rows / 2) / (total_rows - visible_rows)))
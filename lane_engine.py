@@ -0,0 +1,171 @@
+# lane_engine.py
+from typing import Dict, List, Optional, Sequence
+from decoder import Opcode
+from executor import MIPSExecutor
+from console_log import LogLevel
+from register_data import PC_INDEX, REGISTER_NAMES
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only the LaneEngine needs it
+    np = None
+
+# Register-writing operations over whole columns: (rs column, rt column, immediate) -> uint16 column
+_OPERATIONS = {
+    Opcode.ADD: lambda s, t, imm: s + t,  # uint16 arithmetic wraps like the & 0xFFFF elsewhere
+    Opcode.SUB: lambda s, t, imm: s - t,
+    Opcode.AND: lambda s, t, imm: s & t,
+    Opcode.OR: lambda s, t, imm: s | t,
+    Opcode.XOR: lambda s, t, imm: s ^ t,
+    Opcode.SLT: lambda s, t, imm: (s < t).astype(np.uint16),
+    Opcode.SLL: lambda s, t, imm: s << np.uint16(imm) if imm < 16 else np.zeros_like(s),
+    Opcode.SRL: lambda s, t, imm: s >> np.uint16(imm) if imm < 16 else np.zeros_like(s),
+    Opcode.ADDI: lambda s, t, imm: s + np.uint16(imm & 0xFFFF),
+    Opcode.ANDI: lambda s, t, imm: s & np.uint16(imm & 0xFFFF),
+    Opcode.ORI: lambda s, t, imm: s | np.uint16(imm & 0xFFFF),
+}
+
+class LaneEngine:
+    """Runs one program over many independent machines at once with NumPy.
+
+    Lane i has its own row of registers, (lanes, 8) uint16, and of data
+    memory, (lanes, words) uint16, so the same code can sweep thousands of
+    .data initialisations in one run. Every step executes one decoded
+    instruction for all lanes whose PC is at the lowest pending slot; when a
+    branch sends lanes different ways, the others wait until execution
+    reaches them, which for loops means the lanes still iterating run
+    while the finished ones idle at the exit. With no divergence every
+    lane takes part and no masks are applied.
+
+    Like the BlockEngine this is functional, with no pipeline timing; each
+    lane ends with the registers, memory and instruction count a BlockEngine
+    run on the same data would. The executor supplies the program, the
+    decode cache and the initial register and memory image; it is not
+    modified. Needs NumPy.
+    """
+
+    def __init__(self, executor: MIPSExecutor, lanes: int):
+        if np is None:
+            raise ImportError("The lane engine needs NumPy (pip install numpy)")
+        if lanes <= 0:
+            raise ValueError("Lane count must be positive")
+        self.executor = executor
+        self.lanes = lanes
+        self._records = executor.decode_program()
+        count = len(self._records)
+        # Slot of the next real instruction for each slot, skipping label lines
+        self._fetch = [executor.next_instruction_slot(slot) for slot in range(count)]
+        registers = np.array(executor.commands.registers[:PC_INDEX], dtype=np.uint16)
+        self.registers = np.tile(registers, (lanes, 1))
+        image = np.array(executor.memory.get_data_memory_values(), dtype=np.uint16)
+        self.memory = np.tile(image, (lanes, 1))
+        # Instruction slots; like the BlockEngine's, a lane can rest on a label line
+        self.pc = np.full(lanes, executor.current_line, dtype=np.int64)
+        self.retired = np.zeros(lanes, dtype=np.int64)  # Instructions retired per lane
+        self.steps = 0  # Instructions dispatched, each for one or more lanes
+
+    def set_data(self, name: str, values: Sequence[int]) -> None:
+        """Give the .data variable name one initial value per lane."""
+        index = self.executor.memory.data_section.get(name)
+        if index is None:
+            raise KeyError(f"No .data variable named {name}")
+        self.memory[:, index] = np.asarray(values, dtype=np.int64) & 0xFFFF
+
+    def active(self) -> 'np.ndarray':
+        """Mask of lanes that have not left instruction memory."""
+        return (self.pc >= 0) & (self.pc < len(self._records))
+
+    def is_finished(self) -> bool:
+        return not self.active().any()
+
+    def run(self, max_instructions: Optional[int] = None) -> int:
+        """Run until every lane has left instruction memory or retired
+        max_instructions (counted per lane, over all calls); returns the
+        number of steps dispatched by this call."""
+        records = self._records
+        count = len(records)
+        registers, memory, pc, retired = self.registers, self.memory, self.pc, self.retired
+        words = memory.shape[1]
+        log = self.executor._log
+        steps = 0
+        while True:
+            pending = (pc >= 0) & (pc < count)
+            if max_instructions is not None:
+                pending &= retired < max_instructions
+            if not pending.any():
+                break
+            slot = int(pc[pending].min())
+            mask = pending & (pc == slot)
+            # Converged: every lane is here, so whole columns are read and written as they are
+            full = bool(mask.all())
+            record = records[slot]
+            op = record.op
+            if op == Opcode.NOP:
+                # Label lines and unknown text are passed over without retiring anything
+                pc[mask] = self._fetch[slot]
+                continue
+            next_slot = slot + 1
+
+            if op in _OPERATIONS:
+                value = _OPERATIONS[op](registers[:, record.rs], registers[:, record.rt] if record.rt >= 0 else None,
+                                        record.imm)
+                self._write(record.rd, value, mask, full)
+            elif op == Opcode.LI:
+                self._write(record.rd, np.uint16(record.imm & 0xFFFF), mask, full)
+            elif op in (Opcode.LW, Opcode.SW):
+                # The word index is static: the base register is not used
+                index = record.imm // 2
+                if not 0 <= index < words:
+                    verb = "reading from" if op == Opcode.LW else "writing to"
+                    log(f"Error {verb} memory: Invalid memory access: "
+                        f"Memory access out of bounds at address: {index}", LogLevel.ERROR)
+                elif op == Opcode.LW:
+                    self._write(record.rd, memory[:, index], mask, full)
+                elif full:
+                    memory[:, index] = registers[:, record.rt]
+                else:
+                    memory[mask, index] = registers[mask, record.rt]
+            elif op in (Opcode.BEQ, Opcode.BNE):
+                equal = registers[:, record.rs] == registers[:, record.rt]
+                taken = equal if op == Opcode.BEQ else ~equal
+                next_slot = np.where(taken, record.target, next_slot)
+            elif op == Opcode.J:
+                next_slot = record.target
+            elif op == Opcode.JAL:
+                self._write(record.rd, np.uint16((slot * 4 + 4) & 0xFFFF), mask, full)  # Return address
+                next_slot = record.target
+            elif op == Opcode.JR:
+                next_slot = registers[:, record.rs].astype(np.int64) // 4
+
+            if full:
+                pc[:] = next_slot
+                retired += 1
+            else:
+                pc[mask] = next_slot[mask] if isinstance(next_slot, np.ndarray) else next_slot
+                retired[mask] += 1
+            steps += 1
+        self.steps += steps
+        return steps
+
+    def _write(self, register: int, value, mask: 'np.ndarray', full: bool) -> None:
+        if full:
+            self.registers[:, register] = value
+        elif isinstance(value, np.ndarray):
+            self.registers[mask, register] = value[mask]
+        else:
+            self.registers[mask, register] = value
+
+    def lane_state(self, lane: int) -> Dict:
+        """Final registers, PC, memory and instruction count of one lane, as plain data."""
+        registers = self.registers[lane].tolist()
+        return {
+            "registers": {name: registers[index] for index, name in enumerate(REGISTER_NAMES)},
+            "pc": int(self.pc[lane]) * 4,
+            "memory": self.memory[lane].tolist(),
+            "stats": {"instructions": int(self.retired[lane]),
+                      "finished": not 0 <= int(self.pc[lane]) < len(self._records)},
+        }
+
+    def results(self) -> List[Dict]:
+        """lane_state() for every lane."""
+        return [self.lane_state(lane) for lane in range(self.lanes)]
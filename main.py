@@ -1,117 +1,297 @@
 # main.py
+import time
 import tkinter as tk
 from interface import MIPSUI
 from mips_commands import MIPSProcessor
-from parser import MIPSParser
+from assembler import MIPSAssembler, Program
 from memory import MIPSMemory
 from executor import MIPSExecutor
+from branch_predictor import create_predictor
 from converter import MIPSConverter
 from pipeline import Pipeline
+from console_log import LogLevel
+from history import ExecutionHistory
+from breakpoints import Breakpoints
 
 class MIPSSimulator:
     DATA_SECTION_PROCESSED = "Data section processed. Ready to step through text segment."
     TEXT_SECTION_LOADED = "Loaded instructions. Ready to step through."
     NO_INSTRUCTIONS_TO_EXECUTE = "No more instructions to execute."
     NO_CODE_LOADED = "No code loaded."
+    NO_EARLIER_STATE = "No earlier state to step back to."
     MIPS_CONVERTED = "MIPS code converted to machine code."
+    RUN_FINISHED = "Run finished after {count} cycles."
+    RUN_BUDGET_EXHAUSTED = "Run stopped: cycle budget of {budget} reached."
+    RUN_STOPPED = "Run stopped after {count} cycles."
+    BREAKPOINT_HIT = "{event}: stopped after {count} cycles."
+    BREAKPOINT_SET = "Breakpoint set at slot {slot}."
+    BREAKPOINT_CLEARED = "Breakpoint cleared at slot {slot}."
+    RAN_BACK_TO_OLDEST = "No earlier stop; went back to the oldest recorded state."
+    BRANCH_PREDICTION_SUMMARY = ("Branch prediction ({predictor}): {correct}/{branches} correct "
+                                 "({accuracy:.1%}), {flush_penalty_cycles} flush cycles.")
+    RUN_CYCLE_BUDGET = 1_000_000  # Default cap on clock cycles per Run
+    FRAME_INTERVAL_MS = 50  # Repaint at most 20 times per second while running
+    RUN_SLICE_SECONDS = 0.04  # Time spent executing between repaints
+    RUN_CHUNK = 256  # Cycles between clock checks inside a slice
     WORD_SIZE = 2  # Changed to 2 bytes (16-bit)
     MEMORY_SIZE = 512  # 512 bytes total memory
 
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, run_budget: int = RUN_CYCLE_BUDGET,
+                 data_memory_size: int = MEMORY_SIZE // WORD_SIZE, paged_memory: bool = False):
         self.root = root
         self.root.title("16-bit MIPS Simulator")
         self.root.geometry("1400x1100")
 
         self.data_memory_base = 0x1000  # Simplified address space for 16-bit
-        self.data_memory_size = self.MEMORY_SIZE // self.WORD_SIZE  # 256 words
+        self.data_memory_size = data_memory_size  # In bytes; the memory view shows the first 128 words
+        self.paged_memory = paged_memory
         self.instruction_memory_size = self.MEMORY_SIZE // self.WORD_SIZE  # 256 instructions
-        self.memory = MIPSMemory(self.data_memory_base, self.data_memory_size)
-        self.parser = MIPSParser()
+        self.memory = MIPSMemory(self.data_memory_base, self.data_memory_size, self.paged_memory)
+        self.assembler = MIPSAssembler()
         self.ui = MIPSUI(root, self.data_memory_base, self._update_program_counter)
         self.processor = MIPSProcessor(self.ui.get_register_tree())
         self.executor = None
-        self.instructions = []
-        self.labels = {}
+        self.program = Program()
         self.text_section_loaded = False
         self.converter = MIPSConverter()
+        self.run_budget = run_budget
+        self._run_job = None  # Pending root.after id while a run is in progress
+        self._run_executed = 0
+        self.breakpoints = Breakpoints()  # Kept across loads; every new executor checks them
 
         self.ui._run_button_action = self._run_button_action
         self.ui._step_button_action = self._step_button_action
+        self.ui._step_back_button_action = self._step_back_button_action
+        self.ui._continue_button_action = self._continue_button_action
+        self.ui._run_back_button_action = self._run_back_button_action
+        self.ui._breakpoint_toggle_action = self._toggle_breakpoint
         self.ui._convert_button_action = self._convert_button_action
+        self.ui._clear_button_action = self._reset_machine_state
+        self.ui._stop_button_action = self._stop_run
+        self.ui._log_level_action = self._set_log_level
+        self.ui._code_changed_action = self._reassemble
         
     def _update_program_counter(self, pc):
         self.ui.update_program_counter_display(pc)
         
+    def _reassemble(self, code: str):
+        # Keeps the assembler in step with the editor; only changed lines are re-assembled
+        self.assembler.update(code)
+
     def _load_sections(self):
-        code = self.ui.get_mips_code()
-        lines = [line.strip() for line in code.split('\n') if line.strip()]
+        # The executor gets its own copy, so later edits do not reach a program being stepped
+        self.program = self.assembler.update(self.ui.get_mips_code()).copy()
 
-        data_section = self.parser.parse_data_section(lines)
-        data_section = {k: v & 0xFFFF for k, v in data_section.items()}
+        data_section = self.program.data
         self.memory.allocate_data(data_section)
         self.ui.log_to_console(f"Data Section: {data_section}")
+        # Fresh memory image: repaint the whole table once, then track writes
+        self.memory.pop_dirty_words()
         self.ui.update_data_memory_display(self.memory.get_data_memory_values())
 
-        self.instructions = self.parser.parse_text_section(lines)
-        self.labels = self.parser.map_labels([instr["source"] for instr in self.instructions])
-        self.ui.set_instruction_memory(self.instructions)
+        instructions = self.program.instructions
+        self.ui.set_instruction_memory(instructions)
+        self.ui.show_breakpoints(self.breakpoints.slots)
+        self.ui.clear_hazard_display()
         
         self.executor = MIPSExecutor(
             self.processor,
             self.memory,
-            self.labels,
+            None,
             self._update_program_counter,
             self.ui.log_to_console,
-            self.ui
+            self.ui,
+            create_predictor(self.ui.get_branch_predictor())
         )
+        self.executor.history = ExecutionHistory(self.executor)
+        self.executor.breakpoints = self.breakpoints
         
         # Update R7 (return address register) with program end
-        self.processor.update_register_value("R7", len(self.instructions) * 2)
-        self.ui.log_to_console(f"Set R7 (return address) to {len(self.instructions) * 2}")
+        self.processor.update_register_value("R7", len(instructions) * 4)
+        self.processor.refresh_view()
+        self.ui.log_to_console(f"Set R7 (return address) to {len(instructions) * 4}")
         
+        self.executor.log_level = self.ui.console_log.level
         self.ui.log_to_console(self.TEXT_SECTION_LOADED)
-        self.executor.set_instructions(self.instructions)
+        self.executor.set_program(self.program)
         self.text_section_loaded = True
         self.executor.current_line = 0
         self.executor.program_counter = 0
         self._update_program_counter(0)
       
     def _run_button_action(self):
-        self.memory = MIPSMemory(self.data_memory_base, self.data_memory_size)  # Clear data memory with 512 byte size
+        self._stop_run(announce=False)
+        self.memory = MIPSMemory(self.data_memory_base, self.data_memory_size, self.paged_memory)  # Clear data memory
         self.processor.clear_registers() # Clear registers
         self._load_sections()
         self.text_section_loaded = True # set the flag to true after loading
+        self._start_run()
+
+    def _continue_button_action(self):
+        """Run on from the current state, e.g. after a breakpoint; Run starts over."""
+        self._stop_run(announce=False)
+        if not self.text_section_loaded:
+            self._load_sections()
+        self._start_run()
+
+    def _start_run(self):
+        """Execute the loaded program in slices, repainting once per frame."""
+        self._run_executed = 0
+        self.executor.live_updates = False
+        self._run_job = self.root.after(0, self._run_tick)
+
+    def _run_tick(self):
+        self._run_job = None
+        remaining = self.run_budget - self._run_executed
+        finished = False
+
+        if self.ui.is_animating():
+            # Animate: a few instructions per frame at the requested rate
+            rate = self.ui.get_animation_speed()
+            interval = max(self.FRAME_INTERVAL_MS, 1000 // rate)
+            finished = self._run_slice(min(remaining, max(1, rate * interval // 1000))) is False
+        else:
+            interval = self.FRAME_INTERVAL_MS
+            deadline = time.perf_counter() + self.RUN_SLICE_SECONDS
+            while remaining > 0 and time.perf_counter() < deadline:
+                executed = self._run_slice(min(remaining, self.RUN_CHUNK))
+                if executed is False:
+                    finished = True
+                    break
+                if self.breakpoints.hit is not None:
+                    break
+                remaining -= executed
+
+        self._refresh_views()
+        if finished:
+            self._finish_run(self.RUN_FINISHED.format(count=self._run_executed))
+        elif self.breakpoints.hit is not None:
+            self._finish_run(self.BREAKPOINT_HIT.format(event=self.breakpoints.hit, count=self._run_executed))
+        elif self._run_executed >= self.run_budget:
+            self._finish_run(self.RUN_BUDGET_EXHAUSTED.format(budget=self.run_budget))
+        else:
+            self._run_job = self.root.after(interval, self._run_tick)
+
+    def _run_slice(self, count: int):
+        """Run up to count instructions; returns how many ran, or False once the program ends."""
+        executed = self.executor.run(count)
+        self._run_executed += executed
+        if executed < count and self.breakpoints.hit is None:
+            return False
+        return executed
+
+    def _finish_run(self, message: str):
+        self.executor.live_updates = True
+        self.ui.log_to_console(message)
+        self.ui.log_to_console(self.BRANCH_PREDICTION_SUMMARY.format(**self.executor.branch_prediction_report()))
+
+    def _stop_run(self, announce: bool = True):
+        if self._run_job is None:
+            return
+        self.root.after_cancel(self._run_job)
+        self._run_job = None
+        self._refresh_views()
+        if announce:
+            self._finish_run(self.RUN_STOPPED.format(count=self._run_executed))
+        else:
+            self.executor.live_updates = True
+
+    def _refresh_views(self):
+        """Repaint every view from the current machine state in one go."""
+        self.processor.refresh_view()
+        self._sync_data_memory_view()
+        self.ui.update_hazard_display(self.executor.pipeline.get_hazard_info(self.ui.hazard_rows_shown,
+                                                                             self.ui.HAZARD_ROW_LIMIT))
+        self.ui.highlight_instruction(self.executor.last_fetched_slot())
+        self._update_program_counter(self.executor.program_counter)
+
+    def _set_log_level(self, level):
+        if self.executor:
+            self.executor.log_level = level
+
+    def _sync_data_memory_view(self):
+        changed_words = self.memory.pop_dirty_words()
+        if changed_words:
+            self.ui.update_data_memory_cells(changed_words)
+
+    def _reset_machine_state(self):
+        self._stop_run(announce=False)
+        self.processor.clear_registers()
+        if self.executor:
+            self.executor.pipeline.reset()
+        self.text_section_loaded = False
 
     def _step_button_action(self):
+        self._stop_run()
         if not self.text_section_loaded:
             self._load_sections()
           
-        if self.executor and self.executor.current_line < len(self.instructions):
-            instruction = self.instructions[self.executor.current_line]
-            self.executor.execute_instruction(instruction)
-            self.ui.update_data_memory_display(self.memory.get_data_memory_values())
+        if self.executor and self.executor.step():
+            self._sync_data_memory_view()
+            if self.breakpoints.hit is not None:
+                self.ui.log_to_console(str(self.breakpoints.hit))
         else:
             if not self.executor:
                 self.ui.log_to_console(self.NO_CODE_LOADED)
-            elif self.executor.current_line >= len(self.instructions):
+            else:
                 self.ui.log_to_console(self.NO_INSTRUCTIONS_TO_EXECUTE)
             
 
+    def _step_back_button_action(self):
+        self._stop_run()
+        if not self.executor:
+            self.ui.log_to_console(self.NO_CODE_LOADED)
+        elif self.executor.step_back():
+            self.ui.clear_hazard_display()
+            self._refresh_views()
+        else:
+            self.ui.log_to_console(self.NO_EARLIER_STATE)
+
+    def _run_back_button_action(self):
+        """Go back to the latest earlier state at which a breakpoint or watchpoint fires."""
+        self._stop_run()
+        if not self.executor:
+            self.ui.log_to_console(self.NO_CODE_LOADED)
+            return
+        history = self.executor.history
+        position = history.position
+        if history.run_back(lambda: self.breakpoints.check(self.executor) is not None) == position:
+            self.ui.log_to_console(self.NO_EARLIER_STATE)
+            return
+        self.breakpoints.hit = self.breakpoints.check(self.executor)
+        self.ui.clear_hazard_display()
+        self._refresh_views()
+        self.ui.log_to_console(str(self.breakpoints.hit) if self.breakpoints.hit else self.RAN_BACK_TO_OLDEST)
+
+    def _toggle_breakpoint(self, slot: int):
+        if self.executor:
+            # A label row stands for the instruction after it
+            slot = self.executor.next_instruction_slot(slot)
+        if self.breakpoints.toggle_breakpoint(slot):
+            self.ui.log_to_console(self.BREAKPOINT_SET.format(slot=slot))
+        else:
+            self.ui.log_to_console(self.BREAKPOINT_CLEARED.format(slot=slot))
+        self.ui.show_breakpoints(self.breakpoints.slots)
+
     def _convert_button_action(self):
-        code = self.ui.get_mips_code()
-        lines = [line.strip() for line in code.split('\n') if line.strip()]
-        text_instructions = self.parser.parse_text_section(lines)
+        program = self.assembler.update(self.ui.get_mips_code())
+        encoded = self.converter.encode_program(program.instructions)
+        words = encoded.slot_words()
+        failures = {failure.slot: failure.reason for failure in encoded.errors}
         machine_code_pairs = []
 
-        for instruction in text_instructions:
-            try:
-                machine_code_instr = self.converter.convert_to_machine_code(instruction['source'])
-                machine_code_pairs.append((instruction['source'], machine_code_instr))
-            except Exception as e:
-                machine_code_pairs.append((instruction['source'],f"Error: {str(e)}"))
+        for instruction in program.instructions:
+            if instruction.slot in failures:
+                machine_code_pairs.append((instruction.source, f"Error: {failures[instruction.slot]}"))
+            else:
+                word = words[instruction.slot]
+                machine_code_pairs.append((instruction.source, None if word is None else format(word, '016b')))
 
         self.ui.set_machine_code_output(machine_code_pairs)
         self.ui.log_to_console(self.MIPS_CONVERTED)
+        for failure in encoded.errors:
+            self.ui.log_to_console(f"Line {failure.line}: cannot encode '{failure.source}': {failure.reason}",
+                                   LogLevel.ERROR)
 
     def _clear_registers(self):
         # Clear console
@@ -1,5 +1,6 @@
 # memory.py
-from typing import Dict, List, Optional
+from array import array
+from typing import Dict, List, Optional, Set, Union
 from dataclasses import dataclass
 import re
 
@@ -8,16 +9,85 @@ class MemoryConfig:
     base_address: int
     size: int
     word_size: int = 2  # Changed to 2 bytes (16-bit) per word
+    paged: bool = False  # Allocate PAGE_SIZE pages on first write instead of the whole image up front
+
+PAGE_SIZE = 4096  # Bytes per page in paged mode
+PAGE_WORDS = PAGE_SIZE // 2
+_PAGE_SHIFT = PAGE_WORDS.bit_length() - 1
 
 class MemoryError(Exception):
     """Custom exception for memory-related errors."""
     pass
 
+def _out_of_bounds(address: int) -> MemoryError:
+    return MemoryError(f"Invalid memory access: Memory access out of bounds at address: {address}")
+
+class PagedWords:
+    """Sparse word store: 4 KiB pages of array('H') created on first write.
+
+    Indexes like the flat memoryview (m[i], m[i] = v, len(m)), so the
+    executor and the block engine work unchanged; untouched pages read as 0
+    and cost nothing.
+    """
+
+    def __init__(self, words: int):
+        self.words = words
+        self.pages: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return self.words
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self.words:
+            raise IndexError("memory index out of range")
+        page = self.pages.get(index >> _PAGE_SHIFT)
+        return page[index & (PAGE_WORDS - 1)] if page is not None else 0
+
+    def __setitem__(self, index: int, value: int) -> None:
+        if not 0 <= index < self.words:
+            raise IndexError("memory index out of range")
+        page = self.pages.get(index >> _PAGE_SHIFT)
+        if page is None:
+            page = self.pages[index >> _PAGE_SHIFT] = array('H', bytes(PAGE_SIZE))
+        page[index & (PAGE_WORDS - 1)] = value
+
+    def tolist(self) -> List[int]:
+        values = [0] * self.words
+        for number, page in self.pages.items():
+            start = number << _PAGE_SHIFT
+            values[start:start + PAGE_WORDS] = page[:self.words - start]
+        return values
+
+    def nonzero(self) -> Dict[int, int]:
+        """{word index: value} of the non-zero words, visiting allocated pages only."""
+        words = {}
+        for number in sorted(self.pages):
+            start = number << _PAGE_SHIFT
+            for offset, value in enumerate(self.pages[number]):
+                if value:
+                    words[start + offset] = value
+        return words
+
 class MIPSMemory:
-    def __init__(self, base_address: int, size: int):
-        self.config = MemoryConfig(base_address, size)
-        self.memory: List[int] = [0] * (size // self.config.word_size)  # 512 bytes / 2 bytes per word = 256 words
+    """Word-addressed data memory.
+
+    size is in bytes. The flat layout keeps every word in one array('H')
+    exposed as a memoryview; paged=True switches to PagedWords, for large
+    address spaces of which only a few pages are used. Either way,
+    self.memory supports m[index] and m[index] = value.
+    """
+
+    def __init__(self, base_address: int, size: int, paged: bool = False):
+        self.config = MemoryConfig(base_address, size, paged=paged)
+        self.size = size // self.config.word_size  # In words
+        if paged:
+            self.memory = PagedWords(self.size)
+        else:
+            self._words = array('H', bytes(self.size * self.config.word_size))
+            self.memory = memoryview(self._words)
         self.data_section: Dict[str, int] = {}
+        # Word indices written since the last pop_dirty_words() call
+        self.dirty_words: Set[int] = set()
 
     def _validate_address(self, address: int) -> None:
         """Validate memory address."""
@@ -27,34 +97,24 @@ class MIPSMemory:
         relative_address = address - self.config.base_address
         index = relative_address // self.config.word_size
         
-        if not (0 <= index < len(self.memory)):
+        if not (0 <= index < self.size):
             if not (0 <= address < self.config.base_address):
                 raise MemoryError(f"Memory access out of bounds at address: 0x{address:08X}")
 
     def read_word(self, address: int) -> int:
         """Read a 16-bit word from memory."""
-        try:
-            # Handle direct memory access
-            if isinstance(address, int):
-                if 0 <= address < len(self.memory):
-                    return self.memory[address]
-                raise MemoryError(f"Memory access out of bounds at address: {address}")
-            
-        except Exception as e:
-            raise MemoryError(f"Invalid memory access: {str(e)}")
+        # Bounds are checked up front, so the common case raises nothing
+        if 0 <= address < self.size:
+            return self.memory[address]
+        raise _out_of_bounds(address)
 
     def write_word(self, address: int, value: int):
         """Write a 16-bit word to memory."""
-        try:
-            # Handle direct memory access
-            if isinstance(address, int):
-                if 0 <= address < len(self.memory):
-                    self.memory[address] = value & 0xFFFF
-                    return
-                raise MemoryError(f"Memory access out of bounds at address: {address}")
-            
-        except Exception as e:
-            raise MemoryError(f"Invalid memory access: {str(e)}")
+        if 0 <= address < self.size:
+            self.memory[address] = value & 0xFFFF
+            self.dirty_words.add(address)
+            return
+        raise _out_of_bounds(address)
 
     def is_valid_address(self, address: int) -> bool:
         # Check if address is within valid ranges
@@ -68,13 +128,13 @@ class MIPSMemory:
         index = relative_address // self.config.word_size
         
         # Check primary range (relative to base address)
-        if 0 <= index < len(self.memory):
+        if 0 <= index < self.size:
             return True
             
         # Check secondary range (absolute addresses below base_address)
         if 0 <= address < self.config.base_address:
             index = address // self.config.word_size
-            return 0 <= index < len(self.memory)
+            return 0 <= index < self.size
             
         return False
 
@@ -85,17 +145,33 @@ class MIPSMemory:
         
         # Store data sequentially in memory
         for var_name, value in data_section.items():
-            if current_address < len(self.memory):
+            if current_address < self.size:
                 self.memory[current_address] = value & 0xFFFF
+                self.dirty_words.add(current_address)
                 self.data_section[var_name] = current_address
                 current_address += 1
 
     def update_data_memory(self, var_name: str, value: int):
         if var_name in self.data_section:
             variable_index = list(self.data_section.keys()).index(var_name)
-            if 0 <= variable_index < len(self.memory):
-                self.memory[variable_index] = value
+            if 0 <= variable_index < self.size:
+                self.memory[variable_index] = value & 0xFFFF
+                self.dirty_words.add(variable_index)
                 self.data_section[var_name] = value
 
     def get_data_memory_values(self) -> List[int]:
-        return self.memory[:]
\ No newline at end of file
+        return self.memory.tolist()
+
+    def memory_state(self) -> Union[List[int], Dict[int, int]]:
+        """Data memory for reports: every word for flat memory; for paged
+        memory, whose address space can be huge, {word index: value} of the
+        non-zero words only."""
+        if isinstance(self.memory, PagedWords):
+            return self.memory.nonzero()
+        return self.get_data_memory_values()
+
+    def pop_dirty_words(self) -> Dict[int, int]:
+        """Return {word index: value} for every word written since the last call, and reset tracking."""
+        changed = {index: self.memory[index] for index in self.dirty_words}
+        self.dirty_words.clear()
+        return changed
\ No newline at end of file
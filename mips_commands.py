@@ -1,110 +1,85 @@
 # mips_commands.py
-import tkinter.ttk as ttk
-from typing import Optional, Union, Callable, Dict
+from array import array
+from typing import TYPE_CHECKING, Optional, List
+from register_data import REGISTER_INDEX, REGISTER_NAMES, PC_INDEX
+
+if TYPE_CHECKING:
+    # Only needed for annotations; the processor itself must run without Tk
+    import tkinter.ttk as ttk
 
 class MIPSProcessor:
-    def __init__(self, tree: ttk.Treeview):
-        self.tree = tree
+    def __init__(self, tree: Optional['ttk.Treeview'] = None):
+        # Architectural state: R0-R7 followed by the program counter
+        self.registers = array('I', [0] * (PC_INDEX + 1))
+        self.tree = None
+        self._tree_items: List[str] = []
+        self._shown_values: List[Optional[int]] = []
         self.last_highlighted_item = None  # Track last highlighted item
-        self._operation_map: Dict[str, Callable[[int, int], int]] = {
-            'add': lambda x, y: x + y,
-            'sub': lambda x, y: x - y,
-            'and': lambda x, y: x & y,
-            'or': lambda x, y: x | y,
-            'xor': lambda x, y: x ^ y,
-            'sll': lambda x, y: x << y,
-            'srl': lambda x, y: x >> y,
-            'andi': lambda x, y: x & y,
-            'ori': lambda x, y: x | y
-        }
+        if tree is not None:
+            self.attach_view(tree)
+
+    @property
+    def pc(self) -> int:
+        return self.registers[PC_INDEX]
+
+    @pc.setter
+    def pc(self, value: int) -> None:
+        self.registers[PC_INDEX] = value & 0xFFFFFFFF
+
+    def attach_view(self, tree: 'ttk.Treeview') -> None:
+        """Attach a register Treeview that mirrors the register array."""
+        items_by_name = {tree.item(item)['values'][0]: item for item in tree.get_children()}
+        self.tree = tree
+        self._tree_items = [items_by_name[name] for name in REGISTER_NAMES]
+        self._shown_values = [None] * len(REGISTER_NAMES)
+        self.refresh_view()
+
+    def detach_view(self) -> None:
+        self.tree = None
+        self._tree_items = []
+        self._shown_values = []
 
-    def _find_register_item(self, register_name: str) -> Optional[str]:
-        """Find register item in treeview."""
-        for item in self.tree.get_children():
-            if self.tree.item(item)['values'][0] == register_name:
-                return item
-        return None
+    def refresh_view(self) -> None:
+        """Push changed register values to the attached Treeview, if any."""
+        if self.tree is None:
+            return
+        changed_item = None
+        for index, value in enumerate(self.registers[:PC_INDEX]):
+            if self._shown_values[index] != value:
+                self.tree.set(self._tree_items[index], "Value", f"0x{value:04X}")
+                self._shown_values[index] = value
+                changed_item = self._tree_items[index]
+        if changed_item is not None:
+            self.tree.selection_set(changed_item)
+
+    def _register_index(self, register_name: str) -> int:
+        index = REGISTER_INDEX.get(register_name)
+        if index is None:
+            raise ValueError(f"Register {register_name} not found")
+        return index
 
     def get_register_value(self, register_name: str) -> int:
         """Get register value as integer."""
-        item = self._find_register_item(register_name)
-        if not item:
-            raise ValueError(f"Register {register_name} not found")
-            
-        hex_value = self.tree.item(item)['values'][2]
-        try:
-            return int(hex_value, 16) if not hex_value.startswith('-') else -int(hex_value[1:], 16)
-        except ValueError:
-            return 0
+        return self.registers[self._register_index(register_name)]
 
     def update_register_value(self, register_name: str, value: int):
         """Update register value."""
-        # Find the register item in the treeview
-        for item in self.tree.get_children():
-            if self.tree.item(item)['values'][0] == register_name:
-                # Mask value to 16 bits for 16-bit architecture
-                value = value & 0xFFFF
-                self.tree.set(item, "Value", f"0x{value:04X}")
-                self.tree.selection_set(item)
-                return
-        raise ValueError(f"Register {register_name} not found")
+        # Mask value to 16 bits for 16-bit architecture
+        self.registers[self._register_index(register_name)] = value & 0xFFFF
 
     def clear_registers(self) -> None:
         """Reset all registers to zero."""
-        # Clear highlight first
-        if self.last_highlighted_item:
-            index = self.tree.index(self.last_highlighted_item)
-            tag = 'evenrow' if index % 2 == 0 else 'oddrow'
-            self.tree.item(self.last_highlighted_item, tags=(tag,))
-            self.last_highlighted_item = None
-
-        for item in self.tree.get_children():
-            register_name = self.tree.item(item)['values'][0]
-            # Initialize with 16-bit zero value
-            self.tree.set(item, column="Value", value="0x0000")
+        self.clear_highlight()
+        for index in range(len(self.registers)):
+            self.registers[index] = 0
+        # Force a full repaint; the view may have been edited behind our back
+        self._shown_values = [None] * len(self._tree_items)
+        self.refresh_view()
 
     def clear_highlight(self) -> None:
         """Clear the highlight from the last modified register."""
-        if self.last_highlighted_item:
+        if self.tree is not None and self.last_highlighted_item:
             index = self.tree.index(self.last_highlighted_item)
             tag = 'evenrow' if index % 2 == 0 else 'oddrow'
             self.tree.item(self.last_highlighted_item, tags=(tag,))
-            self.last_highlighted_item = None
-
-    def execute_arithmetic(self, dest: str, src1: str, src2: str, operation: str) -> None:
-        """Execute arithmetic operations."""
-        if operation not in self._operation_map:
-            raise ValueError(f"Unknown operation: {operation}")
-            
-        val1 = self.get_register_value(src1)
-        val2 = self.get_register_value(src2)
-        result = self._operation_map[operation](val1, val2)
-        self.update_register_value(dest, result)
-
-    def execute_logical(self, dest: str, src1: str, src2: str, operation):
-      val1 = self.get_register_value(src1)
-      val2 = self.get_register_value(src2)
-      result = operation(val1, val2)
-      self.update_register_value(dest, result)
-
-    def execute_shift(self, dest: str, src1: str, shift_amount: int, operation):
-        val1 = self.get_register_value(src1)
-        result = operation(val1, shift_amount)
-        self.update_register_value(dest, result)
-
-    def execute_slt(self, dest: str, src1: str, src2: str):
-        val1 = self.get_register_value(src1)
-        val2 = self.get_register_value(src2)
-        result = 1 if val1 < val2 else 0
-        self.update_register_value(dest, result)
-
-    def execute_addi(self, dest: str, src1: str, immediate: int):
-        val1 = self.get_register_value(src1)
-        result = val1 + immediate
-        self.update_register_value(dest, result)
-
-    def execute_logical_immediate(self, dest: str, src1: str, immediate: int, operation: str) -> None:
-        """Execute logical immediate operations (andi, ori)."""
-        val1 = self.get_register_value(src1)
-        result = self._operation_map[operation](val1, immediate)
-        self.update_register_value(dest, result)
\ No newline at end of file
+        self.last_highlighted_item = None
@@ -0,0 +1,499 @@
+# mips_sim.py
+"""Headless command-line runner for the 16-bit MIPS simulator.
+
+Usage:
+    python -m mips_sim run program.asm [--max-steps N] [--verbose] [--predictor NAME] [--engine block]
+    python -m mips_sim predictors program.asm
+    python -m mips_sim encode program.asm -o program.bin
+    python -m mips_sim run program.bin --image
+    python -m mips_sim run program.asm --trace accesses.trc [--trace-compression zlib]
+    python -m mips_sim trace accesses.trc
+    python -m mips_sim run program.asm --max-steps 1000 --save-snapshot state.mss
+    python -m mips_sim run program.asm --resume state.mss
+    python -m mips_sim run program.asm --break loop:R1==10 --watch 4:rw
+    python -m mips_sim batch submissions/ --expect expected.json -o results.csv
+    python -m mips_sim lanes program.asm --inputs vectors.csv
+    python -m mips_sim fuzz --cases 5000 --engine block
+
+Nothing in this module (or the modules it imports) touches tkinter, so it
+runs in containers without a display.
+"""
+import argparse
+from array import array
+import csv
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+from assembler import MIPSAssembler, Program
+from memory import MIPSMemory
+from mips_commands import MIPSProcessor
+from executor import MIPSExecutor
+from register_data import REGISTER_NAMES
+from console_log import LogLevel
+from branch_predictor import PREDICTORS, create_predictor
+from block_engine import BlockEngine
+from program_cache import ProgramCache
+from converter import MIPSConverter, image_bytes
+from cache import Cache, CacheConfig, parse_cache_spec
+from access_trace import COMPRESSION, TraceWriter, read_trace
+from image_loader import ImageError, load_image
+from snapshot import load_snapshot, save_snapshot
+from breakpoints import Breakpoints, RegisterCondition, parse_condition
+
+# Same machine configuration as the GUI (see MIPSSimulator in main.py)
+WORD_SIZE = 2
+MEMORY_SIZE = 512
+DATA_MEMORY_SIZE = MEMORY_SIZE // WORD_SIZE  # Bytes handed to MIPSMemory, as in the GUI
+DATA_MEMORY_BASE = 0x1000
+DEFAULT_MAX_STEPS = 1_000_000
+DEFAULT_PREDICTOR = "not-taken"
+# "pipeline" is the cycle-accurate executor; "block" runs compiled basic blocks, without timing
+ENGINES = ("pipeline", "block")
+
+def load_program(code: str, log_callback=None, predictor: str = DEFAULT_PREDICTOR,
+                 cache: Optional[ProgramCache] = None, memory_size: int = DATA_MEMORY_SIZE,
+                 paged: bool = False) -> MIPSExecutor:
+    """Assemble source text into a fresh processor/memory/executor, ready to step."""
+    program = cache.load(code).program if cache else MIPSAssembler().assemble(code)
+    return load_executor(program, log_callback, predictor, memory_size, paged)
+
+def load_executor(program: Program, log_callback=None, predictor: str = DEFAULT_PREDICTOR,
+                  memory_size: int = DATA_MEMORY_SIZE, paged: bool = False) -> MIPSExecutor:
+    """Fresh processor/memory/executor for an assembled or decoded program.
+
+    memory_size is the data memory size in bytes; paged allocates it in
+    4 KiB pages as they are first written.
+    """
+    memory = MIPSMemory(DATA_MEMORY_BASE, memory_size, paged)
+    memory.allocate_data(program.data)
+
+    processor = MIPSProcessor()
+    executor = MIPSExecutor(processor, memory, program, ui_log_callback=log_callback,
+                            branch_predictor=create_predictor(predictor))
+    # R7 (return address register) points at the program end, as in the GUI
+    processor.update_register_value("R7", len(program.instructions) * 4)
+    return executor
+
+def machine_state(executor: MIPSExecutor) -> Dict:
+    """Collect the final machine state as JSON-serialisable data."""
+    registers = executor.commands.registers
+    return {
+        "registers": {name: registers[index] for index, name in enumerate(REGISTER_NAMES)},
+        "pc": executor.program_counter,
+        "memory": executor.memory.memory_state(),
+        "stats": dict(executor.pipeline.get_stats(), finished=executor.is_finished()),
+        "counters": executor.pipeline.counters.snapshot(),
+        "branch_prediction": executor.branch_prediction_report(),
+        "caches": executor.cache_report(),
+    }
+
+def block_engine_state(engine: BlockEngine) -> Dict:
+    """Final machine state after a BlockEngine run; there are no timing statistics."""
+    executor = engine.executor
+    registers = executor.commands.registers
+    return {
+        "registers": {name: registers[index] for index, name in enumerate(REGISTER_NAMES)},
+        "pc": executor.program_counter,
+        "memory": executor.memory.memory_state(),
+        "stats": {
+            "instructions": engine.instructions_retired,
+            "blocks_executed": engine.blocks_executed,
+            "compiled_blocks": len(engine.blocks),
+            "finished": engine.is_finished(),
+        },
+    }
+
+def run_program(code: str, max_steps: Optional[int] = DEFAULT_MAX_STEPS, log_callback=None,
+                log_level: LogLevel = LogLevel.INFO, counters_path: Optional[str] = None,
+                predictor: str = DEFAULT_PREDICTOR, engine: str = "pipeline",
+                cache: Optional[ProgramCache] = None, memory_size: int = DATA_MEMORY_SIZE,
+                paged: bool = False, icache: Optional[CacheConfig] = None,
+                dcache: Optional[CacheConfig] = None, trace: Optional[TraceWriter] = None) -> Dict:
+    executor = load_program(code, log_callback, predictor, cache, memory_size, paged)
+    return run_executor(executor, max_steps, log_callback, log_level, counters_path, engine, icache, dcache, trace)
+
+def run_image(path: str, max_steps: Optional[int] = DEFAULT_MAX_STEPS, log_callback=None,
+              log_level: LogLevel = LogLevel.INFO, counters_path: Optional[str] = None,
+              predictor: str = DEFAULT_PREDICTOR, engine: str = "pipeline",
+              memory_size: int = DATA_MEMORY_SIZE, paged: bool = False, icache: Optional[CacheConfig] = None,
+              dcache: Optional[CacheConfig] = None, trace: Optional[TraceWriter] = None) -> Dict:
+    """Like run_program, for a raw 16-bit image; no source text is parsed."""
+    executor = load_executor(load_image(path), log_callback, predictor, memory_size, paged)
+    return run_executor(executor, max_steps, log_callback, log_level, counters_path, engine, icache, dcache, trace)
+
+def run_executor(executor: MIPSExecutor, max_steps: Optional[int] = DEFAULT_MAX_STEPS, log_callback=None,
+                 log_level: LogLevel = LogLevel.INFO, counters_path: Optional[str] = None,
+                 engine: str = "pipeline", icache: Optional[CacheConfig] = None,
+                 dcache: Optional[CacheConfig] = None, trace: Optional[TraceWriter] = None) -> Dict:
+    """Run a loaded executor and collect its final state. The caches and the
+    access trace hang off the pipeline, so the block engine ignores them;
+    the caller closes trace."""
+    executor.log_level = log_level
+    executor.icache = Cache(icache, "icache") if icache else None
+    executor.dcache = Cache(dcache, "dcache") if dcache else None
+    executor.trace = trace
+    if engine == "block":
+        # max_steps counts retired instructions here, as there are no cycles
+        block_engine = BlockEngine(executor)
+        block_engine.run(max_steps)
+        return block_engine_state(block_engine)
+    # Per-cycle pipeline dumps are only worth formatting when someone reads them
+    executor.live_updates = log_callback is not None
+    executor.run(max_steps)
+    if counters_path:
+        executor.pipeline.counters.dump(counters_path)
+    return machine_state(executor)
+
+def _program_cache(args: argparse.Namespace) -> Optional[ProgramCache]:
+    return ProgramCache(args.cache_dir) if args.cache_dir else None
+
+def _run_command(args: argparse.Namespace) -> int:
+    log_callback = (lambda message, level: print(message, file=sys.stderr)) if args.verbose else None
+    log_level = LogLevel[args.log_level.upper()]
+    for option, value in (("--trace", args.trace), ("--resume", args.resume),
+                          ("--save-snapshot", args.save_snapshot), ("--break", args.breakpoints),
+                          ("--watch", args.watchpoints)):
+        if value and args.engine == "block":
+            print(f"{option} needs the pipeline engine", file=sys.stderr)
+            return 2
+    if args.image:
+        try:
+            executor = load_executor(load_image(args.program), log_callback, args.predictor, args.memory_size,
+                                     args.paged)
+        except (OSError, ImageError) as e:
+            print(e, file=sys.stderr)
+            return 2
+    else:
+        with open(args.program, encoding="utf-8") as f:
+            code = f.read()
+        executor = load_program(code, log_callback, args.predictor, _program_cache(args), args.memory_size,
+                                args.paged)
+    if args.resume:
+        try:
+            load_snapshot(executor, args.resume)
+        except (OSError, ValueError) as e:
+            print(f"{args.resume}: {e}", file=sys.stderr)
+            return 2
+    if args.breakpoints or args.watchpoints:
+        executor.breakpoints = Breakpoints()
+        for location, condition in args.breakpoints or ():
+            slot = executor.labels.get(location)
+            if slot is None and not location.isdigit():
+                print(f"--break: unknown label '{location}'", file=sys.stderr)
+                return 2
+            slot = executor.next_instruction_slot(int(location) if slot is None else slot)
+            executor.breakpoints.add_breakpoint(slot, condition)
+        for address, read, write in args.watchpoints or ():
+            executor.breakpoints.watch(address, read, write)
+    trace = TraceWriter(args.trace, args.trace_compression) if args.trace else None
+    try:
+        state = run_executor(executor, args.max_steps, log_callback, log_level, args.counters, args.engine,
+                             args.icache, args.dcache, trace)
+    finally:
+        if trace:
+            trace.close()
+    if executor.breakpoints is not None:
+        hit = executor.breakpoints.hit
+        state["break"] = hit and {"reason": hit.reason.name.lower(), "slot": hit.slot,
+                                  "address": hit.address, "value": hit.value}
+    if args.save_snapshot:
+        save_snapshot(executor, args.save_snapshot)
+    json.dump(state, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 0 if state["stats"]["finished"] else 1
+
+def compare_predictors(code: str, max_steps: Optional[int] = DEFAULT_MAX_STEPS,
+                       cache: Optional[ProgramCache] = None) -> Dict[str, Dict]:
+    """Run a program once per branch predictor and collect timing and accuracy."""
+    results = {}
+    for name in PREDICTORS:
+        state = run_program(code, max_steps, predictor=name, cache=cache)
+        prediction = state["branch_prediction"]
+        results[name] = {
+            "cycles": state["stats"]["cycles"],
+            "cpi": state["stats"]["cpi"],
+            "branches": prediction["branches"],
+            "accuracy": prediction["accuracy"],
+            "flush_penalty_cycles": prediction["flush_penalty_cycles"],
+        }
+    return results
+
+def _predictors_command(args: argparse.Namespace) -> int:
+    with open(args.program, encoding="utf-8") as f:
+        code = f.read()
+    json.dump(compare_predictors(code, args.max_steps, _program_cache(args)), sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 0
+
+def _encode_command(args: argparse.Namespace) -> int:
+    with open(args.program, encoding="utf-8") as f:
+        code = f.read()
+    cache = _program_cache(args)
+    if cache:
+        assembled = cache.load(code)
+        program, words = assembled.program, assembled.image_words()
+        if words is not None:
+            # Cached encodings: nothing to assemble or encode
+            with open(args.output, "wb") as f:
+                f.write(image_bytes(words, array('H', [value & 0xFFFF for value in program.data.values()])))
+            return 0
+    else:
+        program = MIPSAssembler().assemble(code)
+    # Encode afresh, which also gives the reason for every instruction that cannot be encoded
+    encoded = MIPSConverter().encode_program(program.instructions, program.data)
+    for failure in encoded.errors:
+        print(f"{args.program}:{failure.line}: cannot encode '{failure.source}': {failure.reason}", file=sys.stderr)
+    if encoded.errors:
+        return 1
+    with open(args.output, "wb") as f:
+        f.write(encoded.tobytes())
+    return 0
+
+def _trace_command(args: argparse.Namespace) -> int:
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(["cycle", "pc", "kind", "address", "value"])
+    try:
+        for count, record in enumerate(read_trace(args.trace)):
+            if args.limit is not None and count >= args.limit:
+                break
+            writer.writerow([record.cycle, record.pc, record.kind.name.lower(), record.address, record.value])
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+def _batch_command(args: argparse.Namespace) -> int:
+    # batch builds on this module, so it is imported only when needed
+    from batch import load_jobs, run_batch, write_results
+    defaults = {name: value for name, value in (("max_instructions", args.max_instructions),
+                                                ("timeout", args.timeout), ("engine", args.engine),
+                                                ("predictor", args.predictor)) if value is not None}
+    try:
+        if args.expect:
+            with open(args.expect, encoding="utf-8") as f:
+                defaults["expect"] = json.load(f)
+        jobs = load_jobs(args.source, defaults)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    batch = run_batch(jobs, args.workers)
+    if args.output:
+        write_results(batch, args.output, args.indent)
+    else:
+        json.dump(batch, sys.stdout, indent=args.indent)
+        sys.stdout.write("\n")
+    summary = batch["summary"]
+    return 0 if summary["passed"] == summary["jobs"] else 1
+
+def _read_lane_inputs(path: str) -> List[Dict[str, int]]:
+    """One {.data variable: value} dict per lane, from a CSV file with a
+    header row of variable names or a JSON list of objects."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            return [{name: int(value, 0) for name, value in row.items()} for row in csv.DictReader(f)]
+        inputs = json.load(f)
+    if not isinstance(inputs, list) or not all(isinstance(lane, dict) for lane in inputs):
+        raise ValueError(f"{path}: expected a JSON list of objects")
+    return inputs
+
+def _lanes_command(args: argparse.Namespace) -> int:
+    from lane_engine import LaneEngine
+    try:
+        inputs = _read_lane_inputs(args.inputs)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not inputs:
+        print(f"{args.inputs}: no lanes", file=sys.stderr)
+        return 2
+    with open(args.program, encoding="utf-8") as f:
+        executor = load_program(f.read(), memory_size=args.memory_size)
+    try:
+        engine = LaneEngine(executor, len(inputs))
+        for name in {name for lane in inputs for name in lane}:
+            initial = executor.memory.memory[executor.memory.data_section[name]] \
+                if name in executor.memory.data_section else 0
+            engine.set_data(name, [lane.get(name, initial) for lane in inputs])
+    except (ImportError, KeyError) as e:
+        print(e.args[0] if e.args else e, file=sys.stderr)
+        return 2
+    engine.run(args.max_steps)
+    lanes = engine.results()
+    json.dump({"steps": engine.steps, "lanes": lanes}, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 0 if all(lane["stats"]["finished"] for lane in lanes) else 1
+
+def _fuzz_command(args: argparse.Namespace) -> int:
+    from fuzz import DEFAULT_MAX_CYCLES, fuzz
+    from lane_engine import np
+    if args.engine == "lanes" and np is None:
+        print("The lanes engine needs NumPy (pip install numpy)", file=sys.stderr)
+        return 2
+    result = fuzz(args.cases, args.engine, args.seed, args.max_cycles or DEFAULT_MAX_CYCLES, args.length,
+                  not args.no_shrink, args.stop_after)
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for failure in result["failures"]:
+            with open(os.path.join(args.out, f"fuzz-{failure.seed}.asm"), "w", encoding="utf-8") as f:
+                f.write(failure.minimized + "\n")
+    json.dump({
+        "engine": args.engine,
+        "cases": result["cases"],
+        "invalid": result["invalid"],
+        "failures": [{"seed": failure.seed, "differences": failure.differences, "program": failure.minimized}
+                     for failure in result["failures"]],
+    }, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 1 if result["failures"] else 0
+
+def _cache_spec(spec: str) -> CacheConfig:
+    try:
+        return parse_cache_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _breakpoint_spec(spec: str) -> Tuple[str, Optional[RegisterCondition]]:
+    location, _, condition = spec.partition(":")
+    try:
+        return location.strip(), parse_condition(condition) if condition else None
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _watchpoint_spec(spec: str) -> Tuple[int, bool, bool]:
+    address, _, access = spec.partition(":")
+    access = access.strip().lower() or "w"
+    try:
+        value = int(address, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid watch address: {address}")
+    if access not in ("r", "w", "rw") or value < 0 or value % 2:
+        raise argparse.ArgumentTypeError(f"Invalid watchpoint: {spec}")
+    return value, "r" in access, "w" in access
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(prog="mips_sim", description="Headless 16-bit MIPS simulator")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run a program to completion and print its final state as JSON")
+    run_parser.add_argument("program", help="assembly source file, or image file with --image")
+    run_parser.add_argument("--image", action="store_true",
+                            help="PROGRAM is a raw image of 16-bit words, as written by 'encode'")
+    run_parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+                            help="stop after this many steps (default: %(default)s)")
+    run_parser.add_argument("--indent", type=int, default=None, help="pretty-print the JSON output")
+    run_parser.add_argument("--verbose", action="store_true", help="write the execution log to stderr")
+    run_parser.add_argument("--log-level", choices=[level.name.lower() for level in LogLevel], default="info",
+                            help="verbosity of the --verbose log; 'trace' adds per-cycle pipeline dumps")
+    run_parser.add_argument("--counters", metavar="PATH",
+                            help="also write the performance counters to PATH (.csv for CSV, JSON otherwise)")
+    run_parser.add_argument("--predictor", choices=list(PREDICTORS), default=DEFAULT_PREDICTOR,
+                            help="branch predictor model (default: %(default)s)")
+    run_parser.add_argument("--engine", choices=ENGINES, default="pipeline",
+                            help="'block' runs compiled basic blocks: much faster, but no timing or counters")
+    run_parser.add_argument("--cache-dir", metavar="DIR",
+                            help="reuse assembled programs cached in DIR across runs")
+    run_parser.add_argument("--memory-size", type=int, default=DATA_MEMORY_SIZE, metavar="BYTES",
+                            help="data memory size in bytes (default: %(default)s)")
+    run_parser.add_argument("--paged", action="store_true",
+                            help="allocate data memory in 4 KiB pages on first write, for large --memory-size")
+    run_parser.add_argument("--icache", type=_cache_spec, metavar="SPEC",
+                            help="model an instruction cache, e.g. size=256,line=16,ways=2,replacement=lru,penalty=10")
+    run_parser.add_argument("--dcache", type=_cache_spec, metavar="SPEC",
+                            help="model a data cache; also takes write=back|through and allocate=yes|no")
+    run_parser.add_argument("--trace", metavar="PATH",
+                            help="record every fetch, load and store to PATH as fixed-width binary records")
+    run_parser.add_argument("--trace-compression", choices=[name for name in COMPRESSION if name],
+                            help="compress the --trace stream")
+    run_parser.add_argument("--save-snapshot", metavar="PATH",
+                            help="write the machine state to PATH when the run stops, e.g. after --max-steps")
+    run_parser.add_argument("--resume", metavar="PATH",
+                            help="start from a snapshot written by --save-snapshot for the same program")
+    run_parser.add_argument("--break", dest="breakpoints", type=_breakpoint_spec, action="append",
+                            metavar="SLOT[:COND]",
+                            help="stop when the instruction at a slot number or label is about to retire, "
+                                 "optionally only if a condition such as R1==10 holds; repeatable")
+    run_parser.add_argument("--watch", dest="watchpoints", type=_watchpoint_spec, action="append",
+                            metavar="ADDR[:r|w|rw]",
+                            help="stop after a load (r) and/or store (w, the default) of the word at byte "
+                                 "address ADDR of data memory; repeatable")
+    run_parser.set_defaults(handler=_run_command)
+
+    predictors_parser = commands.add_parser("predictors",
+                                            help="run a program under every branch predictor and compare them")
+    predictors_parser.add_argument("program", help="assembly source file")
+    predictors_parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+                                   help="stop after this many steps (default: %(default)s)")
+    predictors_parser.add_argument("--indent", type=int, default=None, help="pretty-print the JSON output")
+    predictors_parser.add_argument("--cache-dir", metavar="DIR",
+                                   help="reuse assembled programs cached in DIR across runs")
+    predictors_parser.set_defaults(handler=_predictors_command)
+
+    encode_parser = commands.add_parser("encode", help="assemble a program into an image of 16-bit words, with its .data")
+    encode_parser.add_argument("program", help="assembly source file")
+    encode_parser.add_argument("-o", "--output", required=True, help="image file to write (little-endian words)")
+    encode_parser.add_argument("--cache-dir", metavar="DIR",
+                               help="reuse assembled programs and their encodings cached in DIR")
+    encode_parser.set_defaults(handler=_encode_command)
+
+    trace_parser = commands.add_parser("trace", help="print a memory access trace written by run --trace as CSV")
+    trace_parser.add_argument("trace", help="trace file")
+    trace_parser.add_argument("--limit", type=int, default=None, help="print at most this many records")
+    trace_parser.set_defaults(handler=_trace_command)
+
+    batch_parser = commands.add_parser("batch", help="run many programs in parallel worker processes")
+    batch_parser.add_argument("source", help="directory of .asm files, or a JSON manifest of jobs")
+    batch_parser.add_argument("--expect", metavar="PATH",
+                              help='JSON with expected values, e.g. {"registers": {"R1": 53}, "memory": {"4": 53}}')
+    batch_parser.add_argument("--max-instructions", type=int, default=None,
+                              help="instruction budget per program (default: 1000000)")
+    batch_parser.add_argument("--timeout", type=float, default=None,
+                              help="wall-clock seconds per program (default: 10)")
+    batch_parser.add_argument("--engine", choices=ENGINES, default=None, help="execution engine (default: pipeline)")
+    batch_parser.add_argument("--predictor", choices=list(PREDICTORS), default=None,
+                              help="branch predictor model (default: %s)" % DEFAULT_PREDICTOR)
+    batch_parser.add_argument("--workers", type=int, default=None,
+                              help="worker processes (default: one per CPU)")
+    batch_parser.add_argument("-o", "--output", metavar="PATH",
+                              help="write the merged results to PATH (.csv for CSV, JSON otherwise) "
+                                   "instead of stdout")
+    batch_parser.add_argument("--indent", type=int, default=None, help="pretty-print the JSON output")
+    batch_parser.set_defaults(handler=_batch_command)
+
+    lanes_parser = commands.add_parser("lanes",
+                                       help="run one program over many .data initialisations at once (needs NumPy)")
+    lanes_parser.add_argument("program", help="assembly source file")
+    lanes_parser.add_argument("--inputs", required=True, metavar="PATH",
+                              help="one lane per row: CSV with a header of .data variable names, "
+                                   "or a JSON list of {variable: value} objects")
+    lanes_parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS,
+                              help="stop each lane after this many instructions (default: %(default)s)")
+    lanes_parser.add_argument("--memory-size", type=int, default=DATA_MEMORY_SIZE, metavar="BYTES",
+                              help="data memory size in bytes (default: %(default)s)")
+    lanes_parser.add_argument("--indent", type=int, default=None, help="pretty-print the JSON output")
+    lanes_parser.set_defaults(handler=_lanes_command)
+
+    fuzz_parser = commands.add_parser("fuzz", help="compare a fast engine with the pipeline on random programs")
+    fuzz_parser.add_argument("--cases", type=int, default=1000, help="programs to try (default: %(default)s)")
+    fuzz_parser.add_argument("--engine", choices=("block", "lanes"), default="block",
+                             help="engine checked against the pipeline (default: %(default)s)")
+    fuzz_parser.add_argument("--seed", type=int, default=0,
+                             help="seed of the first case; case i uses SEED + i (default: %(default)s)")
+    fuzz_parser.add_argument("--length", type=int, default=24,
+                             help="instructions in each main body (default: %(default)s)")
+    fuzz_parser.add_argument("--max-cycles", type=int, default=None,
+                             help="reference cycle limit per program (default: 20000)")
+    fuzz_parser.add_argument("--no-shrink", action="store_true",
+                             help="report failing programs without minimising them")
+    fuzz_parser.add_argument("--stop-after", type=int, default=None, metavar="N", help="stop after N failures")
+    fuzz_parser.add_argument("--out", metavar="DIR", help="write each minimised failing program to DIR")
+    fuzz_parser.add_argument("--indent", type=int, default=None, help="pretty-print the JSON output")
+    fuzz_parser.set_defaults(handler=_fuzz_command)
+    return arg_parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
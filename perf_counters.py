@@ -0,0 +1,99 @@
+# perf_counters.py
+from array import array
+import csv
+import io
+import json
+from typing import Dict
+from decoder import Opcode
+
+# Counter slots. The engine increments these by index, so a counter costs one
+# array store; names are only attached when the block is read out.
+CYCLES = 0
+INSTRUCTIONS = 1
+STALL_CYCLES = 2            # Bubbles inserted for load-use hazards
+FLUSH_CYCLES = 3            # Bubbles inserted when fetch is redirected
+BRANCHES_TAKEN = 4
+BRANCHES_NOT_TAKEN = 5
+JUMPS = 6                   # Retired j, jal and jr
+LOADS = 7
+STORES = 8
+RAW_FORWARDED = 9           # RAW hazards resolved by EX/MEM or MEM/WB forwarding
+RAW_STALLED = 10            # RAW hazards that needed a load-use stall
+WAW_HAZARDS = 11            # Resolved by in-order writeback; neither forwarded nor stalled
+CONTROL_FLUSHED = 12        # Branches and jumps that redirected fetch and flushed
+CONTROL_NOT_FLUSHED = 13    # Branches that cost no bubbles
+BRANCH_MISPREDICTS = 14     # Branches whose predicted direction was wrong
+MEMORY_STALL_CYCLES = 15    # Cycles the whole pipeline waited on cache misses
+
+COUNTER_NAMES = [
+    "cycles",
+    "instructions",
+    "stall_cycles",
+    "flush_cycles",
+    "branches_taken",
+    "branches_not_taken",
+    "jumps",
+    "loads",
+    "stores",
+    "raw_forwarded",
+    "raw_stalled",
+    "waw_hazards",
+    "control_flushed",
+    "control_not_flushed",
+    "branch_mispredicts",
+    "memory_stall_cycles",
+]
+
+# Retired instructions per opcode occupy the slots after the named counters
+OPCODE_BASE = len(COUNTER_NAMES)
+
+class PerfCounters:
+    """Hardware-style performance counter block."""
+
+    def __init__(self):
+        self.values = array('Q', bytes(8 * (OPCODE_BASE + len(Opcode))))
+
+    def reset(self) -> None:
+        for index in range(len(self.values)):
+            self.values[index] = 0
+
+    def __getitem__(self, index: int) -> int:
+        return self.values[index]
+
+    def read(self, name: str) -> int:
+        """Read a counter by name, e.g. "cycles" or "opcode.add"."""
+        if name.startswith("opcode."):
+            return self.values[OPCODE_BASE + Opcode[name[len("opcode."):].upper()]]
+        return self.values[COUNTER_NAMES.index(name)]
+
+    def opcode_counts(self) -> Dict[str, int]:
+        return {op.name.lower(): self.values[OPCODE_BASE + op] for op in Opcode if op != Opcode.NOP}
+
+    def snapshot(self) -> Dict:
+        """All counters as plain data, with derived CPI."""
+        counters = {name: self.values[index] for index, name in enumerate(COUNTER_NAMES)}
+        instructions = counters["instructions"]
+        counters["cpi"] = counters["cycles"] / instructions if instructions else 0.0
+        counters["opcodes"] = self.opcode_counts()
+        return counters
+
+    def to_json(self, indent=None) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_csv(self) -> str:
+        """Two-column counter,value CSV; per-opcode counts appear as opcode.<name>."""
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(["counter", "value"])
+        snapshot = self.snapshot()
+        opcodes = snapshot.pop("opcodes")
+        for name, value in snapshot.items():
+            writer.writerow([name, value])
+        for name, value in opcodes.items():
+            writer.writerow([f"opcode.{name}", value])
+        return output.getvalue()
+
+    def dump(self, path: str) -> None:
+        """Write the counters to path as CSV if it ends in .csv, JSON otherwise."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(self.to_csv() if path.lower().endswith(".csv") else self.to_json(indent=2))
@@ -1,6 +1,11 @@
 from dataclasses import dataclass
-from typing import Optional, Dict, List, Set, Tuple
+from typing import Optional, Dict, List, Set, Tuple, TYPE_CHECKING
 from enum import Enum, auto
+from decoder import DecodedInstruction
+from perf_counters import PerfCounters, CYCLES, INSTRUCTIONS, STALL_CYCLES, FLUSH_CYCLES, MEMORY_STALL_CYCLES
+
+if TYPE_CHECKING:
+    from assembler import IRInstruction
 
 class PipelineStage(Enum):
     IF = "Instruction Fetch"
@@ -16,7 +21,7 @@ class HazardType(Enum):
     CONTROL = auto()  # Control Hazard
     STRUCTURAL = auto()  # Structural Hazard
 
-@dataclass
+@dataclass(frozen=True)
 class Hazard:
     type: HazardType
     source_instr: str
@@ -26,18 +31,28 @@ class Hazard:
 
 @dataclass
 class PipelineRegister:
-    instruction: Optional[dict] = None
+    instruction: Optional['IRInstruction'] = None
+    decoded: Optional[DecodedInstruction] = None
     pc: int = 0
     rs_value: int = 0
     rt_value: int = 0
     rd_value: int = 0
     alu_result: int = 0
     memory_data: int = 0
-    write_register: str = ""
+    write_register: int = -1  # Destination register index, -1 if nothing is written back
     write_data: int = 0
-    is_stall: bool = False
+    is_stall: bool = False  # Bubble inserted by a stall or a flush
+    predicted_taken: bool = False  # Fetch already followed this branch to its target
+    prediction_penalty: int = 0  # Bubbles spent following that prediction from ID
 
 class Pipeline:
+    """State of the 5-stage pipeline: the four inter-stage registers, the
+    hazards observed so far and the per-run timing totals.
+
+    The stage logic itself lives in MIPSExecutor, which owns the register
+    file and memory; it latches new values into these registers every cycle.
+    """
+
     def __init__(self):
         # Pipeline registers between stages
         self.if_id = PipelineRegister()
@@ -62,77 +77,45 @@ class Pipeline:
         self.forwarding_actions = []
         self.current_hazards: List[Hazard] = []
         self.resolved_hazards: List[Hazard] = []
-        self.stall_cycles = 0
         self.all_hazards: List[Hazard] = []
+        self._hazard_index: Set[Hazard] = set()  # O(1) de-duplication of all_hazards
+        self.hazard_counts: Dict[HazardType, int] = {hazard_type: 0 for hazard_type in HazardType}
 
-    def detect_data_hazard(self, current_instr: dict, previous_instr: dict) -> bool:
-        """Detect RAW (Read After Write) hazards."""
-        if not current_instr or not previous_instr:
-            return False
-            
-        # Extract registers from instructions
-        curr_parts = current_instr['source'].split()
-        prev_parts = previous_instr['source'].split()
-        
-        # Check for dependencies
-        if len(curr_parts) >= 3 and len(prev_parts) >= 2:
-            if curr_parts[2] in prev_parts[1:]:
-                self.hazards.append(f"RAW hazard detected between {prev_parts[0]} and {curr_parts[0]}")
-                return True
-        return False
+        # Timing totals and event counts for the current run
+        self.counters = PerfCounters()
 
-    def handle_forwarding(self, current_instr: dict, ex_instr: dict, mem_instr: dict) -> None:
-        """Implement forwarding logic."""
-        if not current_instr:
-            return
-            
-        # Check if forwarding is needed
-        if ex_instr and self.needs_forwarding(current_instr, ex_instr):
-            self.forward_unit_active = True
-            self.forwarding_actions.append(f"Forwarding from EX stage to {current_instr['source']}")
-            
-        elif mem_instr and self.needs_forwarding(current_instr, mem_instr):
-            self.forward_unit_active = True
-            self.forwarding_actions.append(f"Forwarding from MEM stage to {current_instr['source']}")
+    @property
+    def cycles(self) -> int:
+        return self.counters[CYCLES]
 
-    def needs_forwarding(self, current_instr: dict, previous_instr: dict) -> bool:
-        """Check if forwarding is needed between instructions."""
-        if not current_instr or not previous_instr:
-            return False
-            
-        curr_parts = current_instr['source'].split()
-        prev_parts = previous_instr['source'].split()
-        
-        # Check register dependencies
-        if len(curr_parts) >= 3 and len(prev_parts) >= 2:
-            return curr_parts[2] in prev_parts[1:]
-        return False
+    @property
+    def instructions_retired(self) -> int:
+        return self.counters[INSTRUCTIONS]
 
-    def advance_pipeline(self) -> None:
-        """Advance the pipeline by one cycle."""
-        # Move instructions through pipeline registers
-        self.mem_wb = self.ex_mem
-        self.ex_mem = self.id_ex
-        self.id_ex = self.if_id
-        self.if_id = PipelineRegister()
-        
-        # Update current stage status
-        self.current_stages[PipelineStage.WB] = self.current_stages[PipelineStage.MEM]
-        self.current_stages[PipelineStage.MEM] = self.current_stages[PipelineStage.EX]
-        self.current_stages[PipelineStage.EX] = self.current_stages[PipelineStage.ID]
-        self.current_stages[PipelineStage.ID] = self.current_stages[PipelineStage.IF]
-        self.current_stages[PipelineStage.IF] = None
-        
-        # Clear hazards and forwarding actions for new cycle
-        self.hazards = []
-        self.forwarding_actions = []
-        self.forward_unit_active = False
+    @property
+    def stall_cycles(self) -> int:
+        """Bubbles inserted for load-use hazards."""
+        return self.counters[STALL_CYCLES]
+
+    @property
+    def flush_cycles(self) -> int:
+        """Bubbles inserted when a branch or jump redirects fetch."""
+        return self.counters[FLUSH_CYCLES]
+
+    @property
+    def memory_stall_cycles(self) -> int:
+        """Cycles frozen while instruction or data cache misses were serviced."""
+        return self.counters[MEMORY_STALL_CYCLES]
+
+    def is_empty(self) -> bool:
+        """True when no instruction is in flight."""
+        return not (self.if_id.decoded or self.id_ex.decoded or self.ex_mem.decoded or self.mem_wb.decoded)
 
     def get_pipeline_state(self) -> Dict[str, str]:
         """Get the current state of all pipeline stages."""
         return {
             stage.value: (
-                self.current_stages[stage]['source'] 
+                self.current_stages[stage].source
                 if self.current_stages[stage] else "Empty"
             )
             for stage in PipelineStage
@@ -146,120 +129,49 @@ class Pipeline:
         """Get list of current forwarding actions."""
         return self.forwarding_actions 
 
-    def detect_all_hazards(self, current_instr: dict) -> List[Hazard]:
-        """Detect all types of hazards for the current instruction."""
-        hazards = []
-        
-        # Check for RAW hazards
-        raw_hazards = self._detect_raw_hazards(current_instr)
-        hazards.extend(raw_hazards)
-        
-        # Check for WAW hazards
-        waw_hazards = self._detect_waw_hazards(current_instr)
-        hazards.extend(waw_hazards)
-        
-        # Check for control hazards
-        control_hazards = self._detect_control_hazards(current_instr)
-        hazards.extend(control_hazards)
-        
+    def record_hazards(self, hazards: List[Hazard]) -> None:
+        """Record the hazards observed during the current cycle."""
         self.current_hazards = hazards
         # Yeni hazardları all_hazards listesine ekle
         for hazard in hazards:
-            if hazard not in self.all_hazards:  # Tekrarları önle
+            self.hazard_counts[hazard.type] += 1
+            if hazard not in self._hazard_index:  # Tekrarları önle
+                self._hazard_index.add(hazard)
                 self.all_hazards.append(hazard)
-        
-        return hazards
-
-    def _detect_raw_hazards(self, current_instr: dict) -> List[Hazard]:
-        """Detect Read After Write (RAW) hazards."""
-        hazards = []
-        if not current_instr:
-            return hazards
-            
-        curr_parts = current_instr['source'].split()
-        if len(curr_parts) < 2:
-            return hazards
-            
-        # Get source registers for current instruction
-        src_regs = []
-        if len(curr_parts) >= 3:
-            src_regs.extend(curr_parts[2:])
-        
-        # Check against instructions in EX and MEM stages
-        for stage, instr in [(PipelineStage.EX, self.current_stages[PipelineStage.EX]),
-                           (PipelineStage.MEM, self.current_stages[PipelineStage.MEM])]:
-            if instr:
-                prev_parts = instr['source'].split()
-                if len(prev_parts) >= 2:
-                    dest_reg = prev_parts[1]
-                    for src_reg in src_regs:
-                        if src_reg == dest_reg:
-                            hazards.append(Hazard(
-                                type=HazardType.RAW,
-                                source_instr=instr['source'],
-                                dependent_instr=current_instr['source'],
-                                affected_register=src_reg,
-                                resolution="Forwarding" if self.forward_unit_active else "Stall"
-                            ))
-        return hazards
 
-    def _detect_waw_hazards(self, current_instr: dict) -> List[Hazard]:
-        """Detect Write After Write (WAW) hazards."""
-        hazards = []
-        if not current_instr:
-            return hazards
-            
-        curr_parts = current_instr['source'].split()
-        if len(curr_parts) < 2:
-            return hazards
-            
-        # Get destination register for current instruction
-        curr_dest = curr_parts[1]
-        
-        # Check against instructions in pipeline
-        for stage in [PipelineStage.EX, PipelineStage.MEM]:
-            instr = self.current_stages[stage]
-            if instr:
-                prev_parts = instr['source'].split()
-                if len(prev_parts) >= 2:
-                    prev_dest = prev_parts[1]
-                    if prev_dest == curr_dest:
-                        hazards.append(Hazard(
-                            type=HazardType.WAW,
-                            source_instr=instr['source'],
-                            dependent_instr=current_instr['source'],
-                            affected_register=curr_dest,
-                            resolution="Stall"
-                        ))
-        return hazards
+    def get_stats(self) -> Dict[str, float]:
+        """Per-run timing totals."""
+        return {
+            "cycles": self.cycles,
+            "instructions": self.instructions_retired,
+            "stall_cycles": self.stall_cycles,
+            "flush_cycles": self.flush_cycles,
+            "memory_stall_cycles": self.memory_stall_cycles,
+            "cpi": self.cycles / self.instructions_retired if self.instructions_retired else 0.0
+        }
 
-    def _detect_control_hazards(self, current_instr: dict) -> List[Hazard]:
-        """Detect Control Hazards (branch/jump instructions)."""
-        hazards = []
-        if not current_instr:
-            return hazards
-            
-        curr_parts = current_instr['source'].split()
-        if curr_parts[0] in ['beq', 'bne', 'j', 'jal', 'jr']:
-            hazards.append(Hazard(
-                type=HazardType.CONTROL,
-                source_instr=current_instr['source'],
-                dependent_instr="Next sequential instructions",
-                affected_register="PC",
-                resolution="Branch prediction/delay slot"
-            ))
-        return hazards
+    def get_hazard_info(self, start: int = 0, limit: Optional[int] = None) -> Dict[str, List[dict]]:
+        """Get detailed information about hazards.
 
-    def get_hazard_info(self) -> Dict[str, List[dict]]:
-        """Get detailed information about current hazards."""
+        "all" lists the distinct hazards from index start onwards, so a view that
+        has already shown the first start entries only receives the new ones.
+        With a limit only the newest limit of those are listed, and "start" is
+        moved up to the first one listed.
+        """
+        if limit is not None:
+            start = max(start, len(self.all_hazards) - limit)
         hazard_info = {
             "current": [],
             "all": [],  # Tüm hazardlar için yeni liste
-            "stalls": [f"Total stall cycles: {self.stall_cycles}"]
+            "start": start,
+            "total": len(self.all_hazards),
+            "counts": {hazard_type.name: count for hazard_type, count in self.hazard_counts.items()},
+            "stalls": [f"Total stall cycles: {self.stall_cycles}", f"Total flush cycles: {self.flush_cycles}",
+                       f"Total memory stall cycles: {self.memory_stall_cycles}"]
         }
         
         # Tüm hazardları ekle
-        for hazard in self.all_hazards:
+        for hazard in self.all_hazards[start:]:
             hazard_info["all"].append({
                 "type": hazard.type.name,
                 "source": hazard.source_instr,
@@ -297,4 +209,6 @@ class Pipeline:
         self.current_hazards = []
         self.resolved_hazards = []
         self.all_hazards = []  # Explicitly clear all hazards
-        self.stall_cycles = 0 
\ No newline at end of file
+        self._hazard_index = set()
+        self.hazard_counts = {hazard_type: 0 for hazard_type in HazardType}
+        self.counters.reset() 
\ No newline at end of file
@@ -0,0 +1,253 @@
+# program_cache.py
+from array import array
+from dataclasses import dataclass
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from typing import Dict, List, Optional
+from assembler import ASSEMBLER_VERSION, IRInstruction, MIPSAssembler, Operand, OperandKind, Program
+from converter import MIPSConverter
+from decoder import Opcode
+
+@dataclass
+class AssembledProgram:
+    program: Program
+    machine_words: List[Optional[int]]  # 16-bit encoding per instruction slot, None if it has none
+
+    def image_words(self) -> Optional[array]:
+        """The packed image words, as MIPSConverter.encode_program would give,
+        or None if some instruction has no encoding."""
+        words = array('H')
+        for instruction, word in zip(self.program.instructions, self.machine_words):
+            if instruction.op == Opcode.NOP and not instruction.mnemonic:
+                continue  # Label lines take no space in the image
+            if word is None:
+                return None
+            words.append(word)
+        return words
+
+def assemble_program(source: str, assembler: Optional[MIPSAssembler] = None) -> AssembledProgram:
+    """Assemble and encode source without touching the cache."""
+    program = (assembler or MIPSAssembler()).assemble(source)
+    return AssembledProgram(program, MIPSConverter().encode_program(program.instructions).slot_words())
+
+# File layout, little-endian:
+#   header
+#   string lengths (u32 each), then the UTF-8 bytes of every string back to back
+#   operand table: one record per distinct operand
+#   one instruction record per slot, naming up to MAX_OPERANDS operands by table index
+#   machine words (i32 each, -1 for none)
+#   symbols (string index, slot), then data entries (string index, value)
+# Strings are referenced by index into the string table, where index 0 is "".
+# Operand references are table index + 1, with 0 meaning no operand.
+_MAGIC = b"MPC1"
+_HEADER = struct.Struct("<4sHHIIIIII")  # magic, assembler version, reserved, strings, string bytes,
+                                        # operands, instructions, symbols, data
+_OPERAND = struct.Struct("<BiiI")  # kind, value, base, label
+_INSTRUCTION = struct.Struct("<IBxxxIIIIIII")  # line, opcode, mnemonic, label, source, error, 3 operands
+_PAIR = struct.Struct("<II")
+MAX_OPERANDS = 3
+_OPERAND_KINDS = {kind.value: kind for kind in OperandKind}
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "little":
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+def _read_array(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+class _Table:
+    """Interning table: each distinct item is stored once and referenced by index."""
+
+    def __init__(self, first=None):
+        self.items: List = [] if first is None else [first]
+        self.index: Dict = {} if first is None else {first: 0}
+
+    def add(self, item) -> int:
+        position = self.index.get(item)
+        if position is None:
+            position = self.index[item] = len(self.items)
+            self.items.append(item)
+        return position
+
+def pack_program(assembled: AssembledProgram) -> bytes:
+    """Serialise an assembled program into the compact cache format."""
+    program = assembled.program
+    strings = _Table("")
+    operands = _Table()
+    records = bytearray()
+    for instruction in program.instructions:
+        references = [operands.add(operand) + 1 for operand in instruction.operands]
+        references += [0] * (MAX_OPERANDS - len(references))
+        records += _INSTRUCTION.pack(
+            instruction.line, instruction.op, strings.add(instruction.mnemonic), strings.add(instruction.label),
+            strings.add(instruction.source), strings.add(instruction.error), *references)
+    operand_records = b"".join(_OPERAND.pack(operand.kind.value, operand.value, operand.base,
+                                             strings.add(operand.label)) for operand in operands.items)
+    words = array('i', (-1 if word is None else word for word in assembled.machine_words))
+    symbols = b"".join(_PAIR.pack(strings.add(label), slot) for label, slot in program.symbols.items())
+    data = b"".join(_PAIR.pack(strings.add(name), value) for name, value in program.data.items())
+
+    encoded = [text.encode("utf-8") for text in strings.items]
+    blob = b"".join(encoded)
+    header = _HEADER.pack(_MAGIC, ASSEMBLER_VERSION, 0, len(encoded), len(blob), len(operands.items),
+                          len(program.instructions), len(program.symbols), len(program.data))
+    return b"".join((header, _little_endian(array('I', map(len, encoded))), blob, operand_records, records,
+                     _little_endian(words), symbols, data))
+
+def _section(buffer: memoryview, offset: int, size: int) -> memoryview:
+    if offset + size > len(buffer):
+        raise ValueError("Corrupt program cache file: truncated")
+    return buffer[offset:offset + size]
+
+def unpack_program(buffer: bytes) -> AssembledProgram:
+    """Inverse of pack_program. Raises ValueError if buffer is not a valid cache file."""
+    view = memoryview(buffer)
+    try:
+        (magic, version, _, string_count, blob_size, operand_count, instruction_count, symbol_count,
+         data_count) = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC or version != ASSEMBLER_VERSION:
+            raise ValueError("Not a program cache file for this assembler version")
+        offset = _HEADER.size
+        lengths = _read_array('I', _section(view, offset, 4 * string_count))
+        offset += 4 * string_count
+        strings = []
+        for length in lengths:
+            strings.append(str(view[offset:offset + length], "utf-8"))
+            offset += length
+
+        operands = [None]
+        size = operand_count * _OPERAND.size
+        for kind, value, base, label in _OPERAND.iter_unpack(_section(view, offset, size)):
+            operands.append(Operand(_OPERAND_KINDS[kind], value, base, strings[label]))
+        offset += size
+
+        instructions = []
+        size = instruction_count * _INSTRUCTION.size
+        for slot, (line, op, mnemonic, label, source, error, first, second, third) in enumerate(
+                _INSTRUCTION.iter_unpack(_section(view, offset, size))):
+            operand_tuple = tuple(operands[reference] for reference in (first, second, third) if reference)
+            instructions.append(IRInstruction(slot, line, Opcode(op), strings[mnemonic], operand_tuple,
+                                              strings[label], strings[source], strings[error]))
+        offset += size
+
+        words = _read_array('i', _section(view, offset, 4 * instruction_count))
+        offset += 4 * instruction_count
+        program = Program(instructions)
+        for name, slot in _PAIR.iter_unpack(_section(view, offset, symbol_count * _PAIR.size)):
+            program.symbols[strings[name]] = slot
+            program.labels_at[slot] = strings[name]
+        offset += symbol_count * _PAIR.size
+        for name, value in _PAIR.iter_unpack(_section(view, offset, data_count * _PAIR.size)):
+            program.data[strings[name]] = value
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise ValueError(f"Corrupt program cache file: {e}")
+    return AssembledProgram(program, [None if word < 0 else word for word in words])
+
+class ProgramCache:
+    """Content-addressed on-disk cache of assembled programs.
+
+    Entries are keyed by a hash of the source text and ASSEMBLER_VERSION, so
+    an edited source or a newer assembler never sees a stale entry. Each
+    entry is one compact binary file; a hit refreshes its modification time,
+    and once the directory grows past max_bytes the least recently used
+    files are deleted.
+    """
+
+    FILE_SUFFIX = ".mpc"
+    DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(source: str) -> str:
+        digest = hashlib.sha256(f"{ASSEMBLER_VERSION}\0".encode("utf-8"))
+        digest.update(source.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, source: str) -> str:
+        return os.path.join(self.directory, self.key(source) + self.FILE_SUFFIX)
+
+    def get(self, source: str) -> Optional[AssembledProgram]:
+        path = self._path(source)
+        try:
+            with open(path, "rb") as f:
+                assembled = unpack_program(f.read())
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError):
+            # Unreadable or corrupt: drop it and assemble again
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return assembled
+
+    def put(self, source: str, assembled: AssembledProgram) -> None:
+        try:
+            payload = pack_program(assembled)
+        except struct.error:
+            return  # An immediate too large for the file format; such programs are not cached
+        # Write to a temporary file first so readers never see a partial entry
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(payload)
+            os.replace(temporary, self._path(source))
+        except OSError:
+            self._remove(temporary)
+            return
+        self.evict()
+
+    def load(self, source: str, assembler: Optional[MIPSAssembler] = None) -> AssembledProgram:
+        """Return the cached program for source, assembling and storing it on a miss."""
+        assembled = self.get(source)
+        if assembled is None:
+            assembled = assemble_program(source, assembler)
+            self.put(source, assembled)
+        return assembled
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.FILE_SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            self._remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.FILE_SUFFIX):
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
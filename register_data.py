@@ -23,4 +23,9 @@ class MIPSRegisters:
         
         return [cls.create_register(name, number) for name, number in register_definitions]
 
-register = MIPSRegisters.get_registers()
\ No newline at end of file
+register = MIPSRegisters.get_registers()
+
+# Lookup tables for the array-backed register file (R0-R7 followed by the PC)
+REGISTER_NAMES: List[str] = [reg["name"] for reg in register]
+REGISTER_INDEX: Dict[str, int] = {name: index for index, name in enumerate(REGISTER_NAMES)}
+PC_INDEX = len(REGISTER_NAMES)
@@ -0,0 +1,191 @@
+# snapshot.py
+from array import array
+import hashlib
+import struct
+import sys
+from typing import List, TYPE_CHECKING
+from assembler import Program
+from memory import MIPSMemory, PAGE_SIZE, PagedWords
+from pipeline import HazardType, PipelineRegister, PipelineStage
+
+if TYPE_CHECKING:
+    from executor import MIPSExecutor
+
+# File layout, little-endian:
+#   header
+#   registers (u32 each, R0-R7 then the PC)
+#   the four pipeline latches, IF/ID first
+#   performance counters (u64 each)
+#   hazard counts (u64 per HazardType, in declaration order)
+#   data memory: the raw word image, or for paged memory (page number, page bytes) per allocated page
+# A latch names its instruction by slot (-1 for a bubble); the instruction
+# and its decoded record are looked up again in the loaded program.
+_MAGIC = b"MSS1"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sHH32sIIIII")  # magic, version, flags, program hash, registers, memory words,
+                                          # pages, counters, hazard types
+_LATCH = struct.Struct("<iIiiiiiiiBBBx")  # slot, pc, rs/rt/rd values, alu result, memory data,
+                                          # write register, write data, stall, predicted taken, penalty
+_PAGE_NUMBER = struct.Struct("<I")
+_FLAG_PAGED = 1
+_HAZARD_TYPES = list(HazardType)
+
+def program_hash(program: Program) -> bytes:
+    """Digest of the instruction text, symbols and data of a program."""
+    digest = hashlib.sha256()
+    for instruction in program.instructions:
+        digest.update(instruction.source.encode("utf-8"))
+        digest.update(b"\n")
+    digest.update(repr(sorted(program.symbols.items())).encode("utf-8"))
+    digest.update(repr(list(program.data.items())).encode("utf-8"))
+    return digest.digest()
+
+def _little_endian(words: array) -> bytes:
+    if sys.byteorder == "little":
+        return words.tobytes()
+    swapped = array(words.typecode, words)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+def _read_array(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+def _pack_latch(latch: PipelineRegister) -> bytes:
+    return _LATCH.pack(latch.pc // 4 if latch.decoded else -1, latch.pc, latch.rs_value, latch.rt_value,
+                       latch.rd_value, latch.alu_result, latch.memory_data, latch.write_register,
+                       latch.write_data, latch.is_stall, latch.predicted_taken, latch.prediction_penalty)
+
+def snapshot_bytes(executor: 'MIPSExecutor') -> bytes:
+    """Serialise the machine state of executor.
+
+    Covers registers and PC, data memory, the pipeline latches, counters
+    and hazard counts, tagged with a hash of the loaded program. Branch
+    predictor and cache models are not included and restart cold.
+    """
+    memory = executor.memory
+    pipeline = executor.pipeline
+    paged = isinstance(memory.memory, PagedWords)
+    pages = sorted(memory.memory.pages.items()) if paged else []
+    parts: List[bytes] = [
+        _HEADER.pack(_MAGIC, SNAPSHOT_VERSION, _FLAG_PAGED if paged else 0, program_hash(executor.program),
+                     len(executor.commands.registers), memory.size, len(pages), len(pipeline.counters.values),
+                     len(_HAZARD_TYPES)),
+        _little_endian(executor.commands.registers),
+    ]
+    parts.extend(_pack_latch(latch) for latch in (pipeline.if_id, pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb))
+    parts.append(_little_endian(pipeline.counters.values))
+    parts.append(_little_endian(array('Q', (pipeline.hazard_counts[hazard_type] for hazard_type in _HAZARD_TYPES))))
+    if paged:
+        for number, page in pages:
+            parts.append(_PAGE_NUMBER.pack(number))
+            parts.append(_little_endian(page))
+    elif sys.byteorder == "little":
+        parts.append(memory.memory.cast('B'))  # Straight from the buffer
+    else:
+        parts.append(_little_endian(memory._words))
+    return b"".join(parts)
+
+def save_snapshot(executor: 'MIPSExecutor', path: str) -> None:
+    with open(path, "wb") as f:
+        f.write(snapshot_bytes(executor))
+
+def _section(view: memoryview, offset: int, size: int) -> memoryview:
+    if offset + size > len(view):
+        raise ValueError("Corrupt snapshot: truncated")
+    return view[offset:offset + size]
+
+def restore_snapshot(executor: 'MIPSExecutor', data: bytes) -> None:
+    """Load a snapshot into executor, which must already hold the same program
+    and a memory of the same size and kind.
+
+    Raises ValueError if data is not a snapshot of this version, belongs to a
+    different program or does not fit the executor's memory. Memory is
+    replaced wholesale without marking words dirty, so views should repaint
+    in full afterwards.
+    """
+    view = memoryview(data)
+    try:
+        (magic, version, flags, digest, register_count, memory_words, page_count, counter_count,
+         hazard_type_count) = _HEADER.unpack_from(view, 0)
+    except struct.error:
+        raise ValueError("Corrupt snapshot: truncated header")
+    if magic != _MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("Not a machine snapshot of this version")
+    if digest != program_hash(executor.program):
+        raise ValueError("Snapshot was taken with a different program")
+    memory: MIPSMemory = executor.memory
+    paged = bool(flags & _FLAG_PAGED)
+    if memory_words != memory.size or paged != isinstance(memory.memory, PagedWords):
+        raise ValueError(f"Snapshot needs {'paged' if paged else 'flat'} memory of {memory_words} words")
+    registers = executor.commands.registers
+    pipeline = executor.pipeline
+    if (register_count != len(registers) or counter_count != len(pipeline.counters.values)
+            or hazard_type_count != len(_HAZARD_TYPES)):
+        raise ValueError("Snapshot layout does not match this simulator")
+
+    offset = _HEADER.size
+    register_values = _read_array(registers.typecode, _section(view, offset, 4 * register_count))
+    offset += 4 * register_count
+    latches = []
+    instruction_count = len(executor.instructions)
+    for _ in range(4):
+        (slot, pc, rs_value, rt_value, rd_value, alu_result, memory_data, write_register, write_data,
+         is_stall, predicted_taken, penalty) = _LATCH.unpack(_section(view, offset, _LATCH.size))
+        offset += _LATCH.size
+        if slot >= instruction_count:
+            raise ValueError("Corrupt snapshot: instruction slot out of range")
+        latches.append(PipelineRegister(
+            instruction=executor.instructions[slot] if slot >= 0 else None,
+            decoded=executor.decode_slot(slot) if slot >= 0 else None,
+            pc=pc, rs_value=rs_value, rt_value=rt_value, rd_value=rd_value, alu_result=alu_result,
+            memory_data=memory_data, write_register=write_register, write_data=write_data,
+            is_stall=bool(is_stall), predicted_taken=bool(predicted_taken), prediction_penalty=penalty))
+    counters = _read_array('Q', _section(view, offset, 8 * counter_count))
+    offset += 8 * counter_count
+    hazard_counts = _read_array('Q', _section(view, offset, 8 * hazard_type_count))
+    offset += 8 * hazard_type_count
+
+    if paged:
+        pages = {}
+        for _ in range(page_count):
+            (number,) = _PAGE_NUMBER.unpack(_section(view, offset, _PAGE_NUMBER.size))
+            offset += _PAGE_NUMBER.size
+            pages[number] = _read_array('H', _section(view, offset, PAGE_SIZE))
+            offset += PAGE_SIZE
+    else:
+        image = _section(view, offset, 2 * memory_words)
+        offset += 2 * memory_words
+    if offset != len(view):
+        raise ValueError("Corrupt snapshot: unexpected trailing data")
+
+    # Everything is validated; only now is the machine touched
+    registers[:] = register_values
+    if paged:
+        memory.memory.pages = pages
+    elif sys.byteorder == "little":
+        memory.memory[:] = image.cast('H')
+    else:
+        memory.memory[:] = memoryview(_read_array('H', image))
+    pipeline.if_id, pipeline.id_ex, pipeline.ex_mem, pipeline.mem_wb = latches
+    pipeline.counters.values[:] = counters
+    pipeline.hazard_counts = dict(zip(_HAZARD_TYPES, hazard_counts))
+    pipeline.all_hazards.clear()
+    pipeline._hazard_index.clear()
+    pipeline.current_hazards = []
+    pipeline.forwarding_actions = []
+    stages = pipeline.current_stages
+    stages[PipelineStage.IF] = pipeline.if_id.instruction
+    stages[PipelineStage.ID] = pipeline.id_ex.instruction
+    stages[PipelineStage.EX] = pipeline.ex_mem.instruction
+    stages[PipelineStage.MEM] = pipeline.mem_wb.instruction
+    stages[PipelineStage.WB] = None
+    if executor.history:
+        executor.history.reset()
+
+def load_snapshot(executor: 'MIPSExecutor', path: str) -> None:
+    with open(path, "rb") as f:
+        restore_snapshot(executor, f.read())
@@ -0,0 +1,71 @@
+# test_access_trace.py
+import pytest
+from access_trace import COMPRESSION, RECORD, AccessKind, TraceRecord, TraceWriter, read_trace
+from mips_sim import main, run_program
+
+PROGRAM = "\n".join([".data", "a: .word 5", ".text", "main:", "lw R1 0(R0)", "add R2 R1 R1", "sw R2 2(R0)"])
+
+def sample_records(count):
+    kinds = tuple(AccessKind)
+    return [TraceRecord(cycle, cycle * 4 % 4096, kinds[cycle % 3], cycle * 2 % 65536, cycle * 31 % 65536)
+            for cycle in range(count)]
+
+@pytest.mark.parametrize("compression", list(COMPRESSION))
+def test_round_trip_across_buffer_and_chunk_boundaries(tmp_path, compression):
+    path = str(tmp_path / "accesses.trc")
+    records = sample_records(5000)
+    with TraceWriter(path, compression, buffer_records=333) as writer:
+        for record in records:
+            writer.record(*record)
+    assert writer.records == len(records)
+    # A chunk size that is not a multiple of the record size splits records between reads
+    assert list(read_trace(path, chunk_size=1000)) == records
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_compression_shrinks_a_regular_trace(tmp_path, compression):
+    plain, packed = str(tmp_path / "plain.trc"), str(tmp_path / "packed.trc")
+    for path, name in ((plain, None), (packed, compression)):
+        with TraceWriter(path, name) as writer:
+            for record in sample_records(5000):
+                writer.record(*record)
+    assert (tmp_path / "packed.trc").stat().st_size < (tmp_path / "plain.trc").stat().st_size // 2
+
+def test_run_records_fetches_loads_and_stores(tmp_path):
+    path = str(tmp_path / "accesses.trc")
+    with TraceWriter(path) as writer:
+        run_program(PROGRAM, trace=writer)
+    records = list(read_trace(path))
+    data = [record for record in records if record.kind != AccessKind.FETCH]
+    assert [(record.kind, record.pc, record.address, record.value) for record in data] == [
+        (AccessKind.LOAD, 4, 0, 5), (AccessKind.STORE, 12, 2, 10)]
+    assert {record.address for record in records if record.kind == AccessKind.FETCH} == {4, 8, 12}
+    assert [record.cycle for record in records] == sorted(record.cycle for record in records)
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        TraceWriter(str(tmp_path / "accesses.trc"), "bz2")
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_trace.trc"
+    path.write_bytes(b"MPC1 something else entirely")
+    with pytest.raises(ValueError):
+        list(read_trace(str(path)))
+
+def test_reader_rejects_a_truncated_record(tmp_path):
+    path = tmp_path / "accesses.trc"
+    with TraceWriter(str(path)) as writer:
+        writer.record(1, 4, AccessKind.FETCH, 4, 0)
+    path.write_bytes(path.read_bytes()[:-RECORD.size // 2])
+    with pytest.raises(ValueError, match="truncated"):
+        list(read_trace(str(path)))
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_cli_writes_and_prints_a_trace(tmp_path, capsys, compression):
+    source, path = tmp_path / "program.asm", tmp_path / "accesses.trc"
+    source.write_text(PROGRAM)
+    assert main(["run", str(source), "--trace", str(path), "--trace-compression", compression]) == 0
+    capsys.readouterr()
+    assert main(["trace", str(path)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "cycle,pc,kind,address,value"
+    assert "4,load,0,5" in "\n".join(lines) and "12,store,2,10" in "\n".join(lines)
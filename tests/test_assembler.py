@@ -0,0 +1,69 @@
+# test_assembler.py
+import random
+import pytest
+from assembler import MIPSAssembler
+
+# Line pool for random sources: instructions, labels with and without an
+# instruction, duplicate labels, comments, blank lines, bad text and the
+# section directives that force update() back to a full pass
+_INSTRUCTIONS = [
+    "add R1 R2 R3", "sub R4 R1 R1", "addi R2 R2 -1", "li R3 0x10", "lw R1 2(R0)", "sw R2 4(R0)",
+    "beq R1 R0 L1", "bne R2 R3 L2", "j L3", "jal L1", "jr R7", "slt R1 R2 R3", "sll R1 R1 2",
+    "bogus R1", "add R1 R2",
+]
+_OTHER = [
+    "L1:", "L2:", "L3:", "L1: add R1 R1 R1", "L2: j L1", "main:", "", "   ", "# comment",
+    "add R1 R1 R1 # trailing comment", ".data", ".text", "x: .word 5", "y: .word 0x7",
+]
+
+def _line(rng: random.Random) -> str:
+    return rng.choice(_INSTRUCTIONS) if rng.random() < 0.7 else rng.choice(_OTHER)
+
+def _edit(rng: random.Random, lines):
+    """A random insert, delete or replace of a short run of lines."""
+    lines = list(lines)
+    start = rng.randrange(len(lines) + 1)
+    kind = rng.choice(("insert", "delete", "replace"))
+    count = rng.randint(1, 3)
+    new = [_line(rng) for _ in range(count)]
+    if kind == "insert":
+        lines[start:start] = new
+    elif kind == "delete":
+        del lines[start:start + count]
+    else:
+        lines[start:start + count] = new
+    return lines
+
+def _state(program):
+    return program.instructions, program.symbols, program.labels_at, list(program.data.items())
+
+@pytest.mark.parametrize("seed", range(20))
+def test_update_matches_full_assembly(seed):
+    rng = random.Random(seed)
+    lines = [_line(rng) for _ in range(rng.randint(0, 30))]
+    if rng.random() < 0.5:
+        lines = [".data", "a: .word 1", "b: .word 2", ".text", "main:"] + lines
+    incremental = MIPSAssembler()
+    incremental.assemble("\n".join(lines))
+    for _ in range(100):
+        lines = _edit(rng, lines)
+        code = "\n".join(lines)
+        updated = incremental.update(code)
+        assert _state(updated) == _state(MIPSAssembler().assemble(code)), code
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rewrite_matches_full_assembly(seed):
+    rng = random.Random(seed)
+    lines = [rng.choice(_INSTRUCTIONS + ["L1: add R1 R1 R1", "L2: j L1", "L1: sub R2 R2 R2"])
+             for _ in range(rng.randint(1, 20))]
+    program = MIPSAssembler().assemble("\n".join(lines))
+    for _ in range(50):
+        slot = rng.randrange(len(lines))
+        lines[slot] = rng.choice(_INSTRUCTIONS + ["L1: li R1 1", "L2: add R2 R2 R2", "L3: jr R7"])
+        program.rewrite(slot, lines[slot])
+        assert _state(program) == _state(MIPSAssembler().assemble("\n".join(lines)))
+
+def test_unchanged_source_returns_same_program():
+    assembler = MIPSAssembler()
+    program = assembler.assemble("main:\nadd R1 R1 R1")
+    assert assembler.update("main:\nadd R1 R1 R1") is program
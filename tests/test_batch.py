@@ -0,0 +1,52 @@
+# test_batch.py
+import json
+import pytest
+from batch import BatchJob, load_jobs, run_batch, run_job
+
+PROGRAM = "\n".join([".data", "a: .word 5", ".text", "main:", "lw R1 0(R0)", "add R2 R1 R1", "sw R2 2(R0)"])
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+@pytest.mark.parametrize("engine", ["pipeline", "block"])
+def test_expectations_pass_and_fail(tmp_path, engine):
+    program = _write(tmp_path, "ok.asm", PROGRAM)
+    passed = run_job(BatchJob(program, engine=engine, expect={"registers": {"R2": 10}, "memory": {"2": 10}}))
+    assert passed["status"] == "passed"
+    failed = run_job(BatchJob(program, engine=engine, expect={"registers": {"R2": 11}}))
+    assert failed["status"] == "failed"
+    assert failed["failures"] == ["R2 is 10, expected 11"]
+
+def test_budget(tmp_path):
+    program = _write(tmp_path, "loop.asm", "main:\nloop:\naddi R1 R1 1\nj loop")
+    assert run_job(BatchJob(program, max_instructions=100))["status"] == "budget"
+
+def test_lines_that_do_not_decode_are_an_error(tmp_path):
+    program = _write(tmp_path, "bad.asm", PROGRAM + "\nbeq R1 R0 nowhere")
+    result = run_job(BatchJob(program, expect={"registers": {"R2": 10}}))
+    assert result["status"] == "error"
+    assert result["errors"]
+
+@pytest.mark.parametrize("expect", [
+    [1],
+    {"registers": [1]},
+    {"regs": {}},
+    {"registers": {"R1": "5"}},
+    {"memory": {"4": True}},
+    {"memory": {"abc": 1}},
+])
+def test_malformed_expect_is_rejected_when_loading(tmp_path, expect):
+    _write(tmp_path, "ok.asm", PROGRAM)
+    manifest = _write(tmp_path, "jobs.json", json.dumps({"jobs": [{"program": "ok.asm", "expect": expect}]}))
+    with pytest.raises(ValueError):
+        load_jobs(manifest)
+
+def test_a_job_that_raises_keeps_the_other_results(tmp_path):
+    good = BatchJob(_write(tmp_path, "ok.asm", PROGRAM), expect={"registers": {"R2": 10}})
+    broken = BatchJob(good.program)
+    broken.expect = {"registers": {"R1": "5"}}  # Bypasses the check in __post_init__
+    batch = run_batch([broken, good], workers=1)
+    assert [result["status"] for result in batch["results"]] == ["error", "passed"]
+    assert batch["summary"]["passed"] == 1
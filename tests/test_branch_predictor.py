@@ -0,0 +1,41 @@
+# test_branch_predictor.py
+import pytest
+from branch_predictor import PREDICTORS
+from mips_sim import run_program
+
+# Five iterations: the loop branch goes taken four times, then falls through
+LOOP = "main:\nli R1 5\nloop:\naddi R1 R1 -1\nbne R1 R0 loop\naddi R2 R0 1"
+
+# predictor -> (mispredicts, flush cycles, cycles)
+EXPECTED = {
+    "not-taken": (4, 8, 24),       # Every taken branch is a 2-cycle misprediction
+    "backward-taken": (1, 6, 22),  # 1 cycle per taken loop branch, 2 for the exit
+    "1-bit": (2, 7, 23),           # Wrong on the first iteration and on the exit
+    "2-bit": (2, 7, 23),           # Starts weakly not-taken, so the same as 1-bit here
+    "btb": (2, 4, 20),             # Hits redirect in IF at no cost
+}
+
+def test_every_predictor_is_covered():
+    assert set(EXPECTED) == set(PREDICTORS)
+
+@pytest.mark.parametrize("predictor", EXPECTED)
+def test_counted_loop(predictor):
+    mispredicts, flushes, cycles = EXPECTED[predictor]
+    state = run_program(LOOP, predictor=predictor)
+    assert state["registers"]["R2"] == 1
+    assert state["stats"]["instructions"] == 12
+    assert state["counters"]["branch_mispredicts"] == mispredicts
+    assert state["stats"]["flush_cycles"] == flushes
+    assert state["stats"]["cycles"] == cycles
+    report = state["branch_prediction"]
+    assert (report["branches"], report["correct"]) == (5, 5 - mispredicts)
+    assert report["flush_penalty_cycles"] == flushes
+
+def test_two_bit_counter_survives_one_exit():
+    # The inner loop exits once per outer iteration; a 2-bit counter stays
+    # taken-leaning across the exit, a 1-bit one flips and mispredicts again
+    nested = "\n".join(["main:", "li R2 3", "outer:", "li R1 4", "inner:", "addi R1 R1 -1", "bne R1 R0 inner",
+                        "addi R2 R2 -1", "bne R2 R0 outer"])
+    one_bit = run_program(nested, predictor="1-bit")["counters"]["branch_mispredicts"]
+    two_bit = run_program(nested, predictor="2-bit")["counters"]["branch_mispredicts"]
+    assert (one_bit, two_bit) == (8, 6)
@@ -0,0 +1,138 @@
+# test_breakpoints.py
+import json
+import pytest
+from breakpoints import BreakEvent, Breakpoints, RegisterCondition, StopReason, parse_condition
+from history import ExecutionHistory
+from mips_sim import load_program, main
+
+LOOP = "\n".join([".data", "step: .word 2", ".text", "main:", "li R1 5", "loop:", "lw R2 0(R0)",
+                  "add R4 R4 R2", "sw R4 2(R0)", "addi R1 R1 -1", "bne R1 R0 loop", "sw R1 4(R0)"])
+LW, SW, LAST_SW = 3, 5, 8  # Slots; the .data lines take none
+
+def make_executor(code=LOOP):
+    executor = load_program(code)
+    executor.live_updates = False
+    executor.breakpoints = Breakpoints()
+    return executor
+
+def stops(executor):
+    """Run to the end, collecting (event, R1) at every stop."""
+    events = []
+    while executor.run(1000) and executor.breakpoints.hit is not None:
+        events.append((executor.breakpoints.hit, executor.commands.registers[1]))
+    assert executor.is_finished()
+    return events
+
+@pytest.mark.parametrize("text, condition", [
+    ("R3 == 10", RegisterCondition(3, "==", 10)),
+    ("r1>=0x20", RegisterCondition(1, ">=", 0x20)),
+    ("R2 != -1", RegisterCondition(2, "!=", 0xFFFF)),
+])
+def test_parse_condition(text, condition):
+    assert parse_condition(text) == condition
+
+@pytest.mark.parametrize("text", ["R9 == 1", "R1 = 1", "R1 == x", "== 3", ""])
+def test_parse_condition_rejects_bad_text(text):
+    with pytest.raises(ValueError):
+        parse_condition(text)
+
+def test_breakpoint_fires_on_every_iteration():
+    executor = make_executor()
+    slot = executor.next_instruction_slot(executor.labels["loop"])
+    executor.breakpoints.add_breakpoint(slot)
+    events = stops(executor)
+    assert [event for event, _ in events] == [BreakEvent(StopReason.BREAKPOINT, slot, -1, 0)] * 5
+    # Earlier instructions have written back; the lw at the breakpoint has not
+    assert [r1 for _, r1 in events] == [5, 4, 3, 2, 1]
+
+def test_conditional_breakpoint_sees_committed_registers():
+    executor = make_executor()
+    slot = LW + 4  # bne R1 R0 loop, after addi R1 has written back
+    executor.breakpoints.add_breakpoint(slot, parse_condition("R1 == 2"))
+    executor.run()
+    registers = executor.commands.registers
+    assert executor.breakpoints.hit == BreakEvent(StopReason.BREAKPOINT, slot, -1, 0)
+    assert (registers[1], registers[4]) == (2, 6)  # Three iterations done
+    assert stops(executor) == []
+
+def test_breakpoint_on_a_squashed_instruction_never_fires():
+    executor = make_executor("main:\nbeq R0 R0 skip\naddi R1 R1 1\nskip:\naddi R2 R2 1")
+    executor.breakpoints.add_breakpoint(2)
+    assert stops(executor) == []
+    assert executor.commands.registers[1] == 0
+
+def test_watchpoints_report_address_and_value():
+    executor = make_executor()
+    executor.breakpoints.watch(2, read=False, write=True)
+    executor.breakpoints.watch(0, read=True, write=False)
+    events = [event for event, _ in stops(executor)]
+    assert events[:3] == [BreakEvent(StopReason.READ_WATCH, LW, 0, 2), BreakEvent(StopReason.WRITE_WATCH, SW, 2, 2),
+                          BreakEvent(StopReason.READ_WATCH, LW, 0, 2)]
+    assert [event.value for event in events if event.reason == StopReason.WRITE_WATCH] == [2, 4, 6, 8, 10]
+
+def test_toggle_and_clear():
+    breakpoints = Breakpoints()
+    assert breakpoints.toggle_breakpoint(3)
+    assert breakpoints.slots == [3] and breakpoints.enabled
+    assert not breakpoints.toggle_breakpoint(3)
+    assert not breakpoints.enabled
+    breakpoints.watch(4)
+    breakpoints.clear()
+    assert not breakpoints.enabled
+    with pytest.raises(ValueError):
+        breakpoints.watch(3)
+
+def test_step_back_forgets_the_undone_stop():
+    executor = make_executor()
+    executor.history = ExecutionHistory(executor)
+    executor.breakpoints.watch(2)
+    executor.run()
+    assert executor.breakpoints.hit is not None
+    assert executor.step_back()
+    assert executor.breakpoints.hit is None
+
+def test_run_back_finds_the_previous_stop():
+    executor = make_executor()
+    executor.history = ExecutionHistory(executor, interval=4)
+    executor.breakpoints.watch(2)
+    executor.run()
+    executor.run()
+    second = executor.cycles
+    executor.run()
+    executor.history.run_back(lambda: executor.breakpoints.check(executor) is not None)
+    assert executor.cycles == second
+    assert executor.memory.read_word(1) == 4
+
+def run_cli(tmp_path, capsys, *options):
+    source = tmp_path / "program.asm"
+    source.write_text(LOOP)
+    code = main(["run", str(source), *options])
+    return code, capsys.readouterr()
+
+def test_cli_break_on_a_label_with_a_condition(tmp_path, capsys):
+    code, output = run_cli(tmp_path, capsys, "--break", "loop:R1==3")
+    state = json.loads(output.out)
+    assert code == 1
+    assert state["break"] == {"reason": "breakpoint", "slot": LW, "address": -1, "value": 0}
+    assert state["registers"]["R1"] == 3
+
+def test_cli_watch(tmp_path, capsys):
+    code, output = run_cli(tmp_path, capsys, "--watch", "4:w")
+    state = json.loads(output.out)
+    assert code == 1
+    assert state["break"] == {"reason": "write_watch", "slot": LAST_SW, "address": 4, "value": 0}
+
+def test_cli_without_a_stop_finishes(tmp_path, capsys):
+    code, output = run_cli(tmp_path, capsys, "--break", "loop:R1==9")
+    assert code == 0
+    assert json.loads(output.out)["break"] is None
+
+def test_cli_rejects_an_unknown_label(tmp_path, capsys):
+    code, output = run_cli(tmp_path, capsys, "--break", "nowhere")
+    assert code == 2
+    assert "unknown label" in output.err
+
+@pytest.mark.parametrize("option", [["--watch", "3"], ["--watch", "4:x"], ["--break", "loop:R1=3"]])
+def test_cli_rejects_bad_specs(tmp_path, capsys, option):
+    with pytest.raises(SystemExit):
+        run_cli(tmp_path, capsys, *option)
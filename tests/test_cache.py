@@ -0,0 +1,84 @@
+# test_cache.py
+import pytest
+from cache import Cache, CacheConfig, parse_cache_spec
+from mips_sim import run_program
+
+def make_cache(**options) -> Cache:
+    return Cache(CacheConfig(**options))
+
+def test_hits_after_the_first_miss_on_a_line():
+    cache = make_cache(line_size=16, miss_penalty=10)
+    assert cache.access(0) == 10
+    assert cache.access(4) == 0
+    assert cache.access(15) == 0
+    assert cache.access(16) == 10
+    assert (cache.hits, cache.misses, cache.stall_cycles) == (2, 2, 20)
+
+def test_direct_mapped_lines_conflict_in_one_set():
+    cache = make_cache(size=64, line_size=16, associativity=1)
+    for address in (0, 64, 0):
+        cache.access(address)
+    assert (cache.misses, cache.evictions) == (3, 2)
+
+@pytest.mark.parametrize("replacement, misses", [("lru", 3), ("fifo", 4)])
+def test_replacement_policy_picks_the_victim(replacement, misses):
+    # Two ways in one set: touching line 0 again keeps it under LRU, not under FIFO
+    cache = make_cache(size=32, line_size=16, associativity=2, replacement=replacement)
+    for address in (0, 16, 0, 32, 0):
+        cache.access(address)
+    assert cache.misses == misses
+
+def test_random_replacement_is_reproducible_per_seed():
+    def misses(seed):
+        cache = make_cache(size=64, line_size=16, associativity=4, replacement="random", seed=seed)
+        for index in range(200):
+            cache.access((index * 7 % 9) * 16)
+        return cache.misses
+    assert misses(3) == misses(3)
+
+def test_write_back_pays_for_a_dirty_victim():
+    cache = make_cache(size=16, line_size=16, miss_penalty=10)
+    assert cache.access(0, write=True) == 10
+    assert cache.access(16) == 20
+    assert (cache.writebacks, cache.memory_writes) == (1, 0)
+
+def test_write_through_sends_every_store_to_memory():
+    cache = make_cache(size=16, line_size=16, miss_penalty=10, write_back=False)
+    cache.access(0, write=True)
+    cache.access(0, write=True)
+    assert cache.access(16) == 10
+    assert (cache.writebacks, cache.memory_writes) == (0, 2)
+
+def test_no_write_allocate_leaves_the_line_out():
+    cache = make_cache(write_allocate=False, miss_penalty=10)
+    assert cache.access(0, write=True) == 0
+    assert cache.access(0) == 10
+    assert (cache.write_misses, cache.read_misses, cache.memory_writes) == (1, 1, 1)
+
+def test_reset_clears_lines_and_counters():
+    cache = make_cache()
+    cache.access(0, write=True)
+    cache.reset()
+    assert cache.report()["accesses"] == 0
+    assert cache.access(0) == cache.config.miss_penalty
+
+def test_parse_cache_spec():
+    config = parse_cache_spec("size=1024, line=32, ways=2, replacement=FIFO, write=through, allocate=no, penalty=4")
+    assert config == CacheConfig(1024, 32, 2, "fifo", False, False, 4)
+    assert parse_cache_spec("") == CacheConfig()
+
+@pytest.mark.parametrize("spec", ["colour=red", "write=sideways", "size=100", "replacement=mru", "ways=0"])
+def test_parse_cache_spec_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_cache_spec(spec)
+
+def test_data_cache_misses_add_memory_stalls():
+    code = "main:\nlw R1 0(R0)\nlw R2 0(R0)\nadd R3 R1 R2"
+    plain = run_program(code)
+    cached = run_program(code, dcache=CacheConfig(miss_penalty=10))
+    assert plain["caches"] == {}
+    report = cached["caches"]["dcache"]
+    assert (report["reads"], report["hits"], report["misses"]) == (2, 1, 1)
+    assert cached["stats"]["memory_stall_cycles"] == 10
+    assert cached["stats"]["cycles"] == plain["stats"]["cycles"] + 10
+    assert cached["registers"] == plain["registers"]
@@ -0,0 +1,33 @@
+# test_converter.py
+import struct
+from assembler import MIPSAssembler
+from converter import IMAGE_HEADER, IMAGE_MAGIC, MIPSConverter
+
+def _encode(source):
+    program = MIPSAssembler().assemble(source)
+    return MIPSConverter().encode_program(program.instructions, program.data)
+
+def test_labels_resolve_to_relative_and_absolute_fields():
+    encoded = _encode("main:\nloop:\nadd R1 R1 R2\nbeq R1 R0 loop\nj loop")
+    assert encoded.errors == []
+    assert encoded.symbols == {"main": 0, "loop": 0}
+    assert len(encoded.words) == 3
+    beq, jump = encoded.words[1], encoded.words[2]
+    assert beq >> 13 == 0b110 and beq & 0x7F == (-2) & 0x7F  # Back to word 0 from after word 1
+    assert jump == 0b111 << 13
+
+def test_unencodable_instructions_are_reported():
+    encoded = _encode("main:\naddi R1 R0 1\nadd R2 R1 R1\nfrobnicate R1")
+    assert [(failure.line, failure.source.split()[0]) for failure in encoded.errors] == [(2, "addi"),
+                                                                                          (4, "frobnicate")]
+    assert len(encoded.words) == 2  # The addi keeps its word so later addresses do not move
+
+def test_image_without_data_is_raw_words():
+    encoded = _encode("main:\nadd R1 R1 R2\nsub R3 R1 R2")
+    assert encoded.tobytes() == struct.pack("<2H", *encoded.words)
+
+def test_image_with_data_has_a_header():
+    encoded = _encode(".data\na: .word 5\nb: .word -1\n.text\nmain:\nlw R1 0(R0)")
+    payload = encoded.tobytes()
+    assert IMAGE_HEADER.unpack_from(payload, 0) == (IMAGE_MAGIC, 1, 2)
+    assert struct.unpack_from("<3H", payload, IMAGE_HEADER.size) == (encoded.words[0], 5, 0xFFFF)
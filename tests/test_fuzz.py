@@ -0,0 +1,34 @@
+# test_fuzz.py
+import pytest
+from decoder import Opcode
+from fuzz import compare, fuzz, minimize
+
+def test_block_engine_matches_pipeline():
+    result = fuzz(150, engine="block", seed=1000)
+    assert result["invalid"] == 0
+    assert result["failures"] == []
+
+def test_lane_engine_matches_pipeline():
+    pytest.importorskip("numpy")
+    result = fuzz(150, engine="lanes", seed=2000)
+    assert result["invalid"] == 0
+    assert result["failures"] == []
+
+def test_injected_bug_is_found_and_minimized(monkeypatch):
+    np = pytest.importorskip("numpy")
+    import lane_engine
+    # Off by one: slt as <=
+    monkeypatch.setitem(lane_engine._OPERATIONS, Opcode.SLT, lambda s, t, imm: (s <= t).astype(np.uint16))
+    result = fuzz(50, engine="lanes", stop_after=1)
+    assert len(result["failures"]) == 1
+    failure = result["failures"][0]
+    assert failure.minimized.count("\n") == 0
+    assert failure.minimized.startswith("slt ")
+    assert failure.differences
+
+def test_minimize_keeps_only_the_failing_line():
+    code = "\n".join(["main:", "li R1 3", "add R2 R1 R1", "xor R3 R1 R2", "sw R3 0(R0)", "sub R4 R3 R1"])
+    assert minimize(code, lambda candidate: "xor R3 R1 R2" in candidate) == "xor R3 R1 R2"
+
+def test_compare_rejects_programs_that_do_not_finish():
+    assert compare("main:\nL: j L", max_cycles=100) is None
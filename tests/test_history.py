@@ -0,0 +1,90 @@
+# test_history.py
+import pytest
+from branch_predictor import create_predictor
+from cache import Cache, CacheConfig
+from history import ExecutionHistory
+from mips_sim import load_program
+
+# Every iteration overwrites the same words, so stepping back has stores to undo
+LOOP = "\n".join(["main:", "li R1 12", "loop:", "sw R1 0(R0)", "lw R3 0(R0)", "add R4 R4 R3",
+                  "sw R4 2(R0)", "addi R1 R1 -1", "bne R1 R0 loop", "sw R4 4(R0)"])
+
+def make_executor(interval=8, max_checkpoints=ExecutionHistory.DEFAULT_MAX_CHECKPOINTS):
+    executor = load_program(LOOP, predictor="2-bit")
+    executor.live_updates = False
+    executor.dcache = Cache(CacheConfig(size=32, line_size=8), "dcache")
+    executor.history = ExecutionHistory(executor, interval, max_checkpoints)
+    return executor
+
+def machine(executor):
+    pipeline = executor.pipeline
+    return (executor.commands.registers.tolist(), executor.memory.memory.tolist(),
+            pipeline.counters.values.tolist(), len(pipeline.all_hazards), dict(pipeline.hazard_counts),
+            executor.branch_predictor.report(), executor.dcache.report())
+
+def test_step_back_restores_every_earlier_cycle():
+    executor = make_executor()
+    states = [machine(executor)]
+    while executor.step():
+        states.append(machine(executor))
+    assert executor.is_finished()
+    for cycle in range(len(states) - 1, 0, -1):
+        assert executor.step_back()
+        assert executor.history.position == cycle - 1
+        assert machine(executor) == states[cycle - 1]
+    assert not executor.step_back()
+
+def test_replay_after_stepping_back_matches_a_straight_run():
+    straight = make_executor()
+    straight.run()
+    executor = make_executor()
+    executor.run(60)
+    middle = machine(executor)
+    executor.step_back(45)
+    assert executor.history.position == 15
+    executor.run(45)
+    assert machine(executor) == middle
+    executor.run()
+    assert machine(executor) == machine(straight)
+
+def test_travel_clamps_to_the_reachable_range():
+    executor = make_executor()
+    executor.run(40)
+    assert executor.history.travel(100) == 40
+    assert executor.history.travel(-5) == 0
+    assert executor.cycles == 0
+
+def test_only_the_newest_checkpoints_are_kept():
+    executor = make_executor(interval=4, max_checkpoints=3)
+    executor.run(50)
+    history = executor.history
+    assert len(history.checkpoints) == 3
+    assert history.oldest_position == 40
+    expected = make_executor()
+    expected.run(40)
+    assert history.step_back(1000) == 40
+    assert machine(executor) == machine(expected)
+
+def test_run_back_stops_at_the_latest_matching_cycle():
+    executor = make_executor()
+    executor.run()
+    registers = executor.commands.registers
+    # R1 counts down from 12; go back to the last cycle at which it was still 6
+    position = executor.history.run_back(lambda: registers[1] == 6)
+    expected = make_executor()
+    expected.run(position)
+    assert registers[1] == 6
+    assert machine(executor) == machine(expected)
+    executor.step()
+    assert registers[1] == 5
+
+def test_rewriting_the_program_forgets_the_past():
+    executor = make_executor()
+    executor.run(20)
+    executor.write_instruction(executor.labels["loop"] + 1, "addi R3 R0 7")
+    assert not executor.step_back()
+
+@pytest.mark.parametrize("interval, max_checkpoints", [(0, 4), (4, 0)])
+def test_history_rejects_bad_limits(interval, max_checkpoints):
+    with pytest.raises(ValueError):
+        make_executor(interval, max_checkpoints)
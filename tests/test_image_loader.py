@@ -0,0 +1,52 @@
+# test_image_loader.py
+import pytest
+from assembler import MIPSAssembler
+from converter import MIPSConverter
+from image_loader import ImageError, load_image
+from mips_sim import load_executor, run_executor, run_program
+
+def _write_image(tmp_path, source):
+    program = MIPSAssembler().assemble(source)
+    encoded = MIPSConverter().encode_program(program.instructions, program.data)
+    assert encoded.errors == []
+    path = tmp_path / "program.bin"
+    path.write_bytes(encoded.tobytes())
+    return str(path)
+
+def _architectural(state):
+    # R7 starts at the program end, which differs because label lines take no space in the image
+    registers = dict(state["registers"], R7=None)
+    return registers, state["memory"], state["stats"]["instructions"]
+
+@pytest.mark.parametrize("source", [
+    "main:\nadd R1 R2 R3\nsub R4 R1 R1\nsll R5 R4 3",
+    "\n".join([".data", "a: .word 5", "b: .word 7", "c: .word 0", ".text", "main:", "lw R1 0(R0)",
+               "lw R2 2(R0)", "sw R1 4(R0)", "lw R3 4(R0)", "add R6 R1 R2", "slt R4 R1 R2"]),
+    "\n".join([".data", "n: .word 3", "one: .word 1", "sum: .word 0", ".text", "main:", "lw R1 0(R0)",
+               "lw R3 2(R0)", "loop:", "add R2 R2 R1", "sub R1 R1 R3", "beq R1 R0 done", "j loop", "done:",
+               "sw R2 4(R0)"]),
+])
+def test_encoded_program_runs_like_its_source(tmp_path, source):
+    from_source = run_program(source)
+    assert from_source["stats"]["finished"]
+    executor = load_executor(load_image(_write_image(tmp_path, source)))
+    executor.live_updates = False
+    from_image = run_executor(executor)
+    assert _architectural(from_image) == _architectural(from_source)
+
+def test_data_words_become_data_variables(tmp_path):
+    program = load_image(_write_image(tmp_path, ".data\na: .word 5\nb: .word -2\n.text\nmain:\nlw R1 0(R0)"))
+    assert program.data == {"D0": 5, "D1": 0xFFFE}
+
+def test_header_that_does_not_match_the_size_is_rejected(tmp_path):
+    path = _write_image(tmp_path, ".data\na: .word 5\n.text\nmain:\nlw R1 0(R0)")
+    with open(path, "ab") as f:
+        f.write(b"\0\0")
+    with pytest.raises(ImageError):
+        load_image(path)
+
+def test_odd_sized_image_is_rejected(tmp_path):
+    path = tmp_path / "odd.bin"
+    path.write_bytes(b"\0\0\0")
+    with pytest.raises(ImageError):
+        load_image(str(path))
@@ -0,0 +1,23 @@
+# test_memory.py
+import json
+from memory import MIPSMemory, PAGE_WORDS
+from mips_sim import run_program
+
+def test_paged_memory_reads_zero_until_written():
+    memory = MIPSMemory(0x1000, 1 << 24, paged=True)
+    assert memory.read_word(5 * PAGE_WORDS + 3) == 0
+    assert memory.memory.pages == {}
+    memory.write_word(5 * PAGE_WORDS + 3, 0x1234)
+    assert list(memory.memory.pages) == [5]
+    assert memory.memory_state() == {5 * PAGE_WORDS + 3: 0x1234}
+
+def test_flat_memory_state_lists_every_word():
+    memory = MIPSMemory(0x1000, 16)
+    memory.write_word(2, 7)
+    assert memory.memory_state() == [0, 0, 7, 0, 0, 0, 0, 0]
+
+def test_large_paged_run_keeps_its_output_small():
+    code = "\n".join([".data", "a: .word 5", ".text", "main:", "lw R1 0(R0)", "add R2 R1 R1", "sw R2 4(R0)"])
+    state = run_program(code, memory_size=200_000_000, paged=True)
+    assert state["memory"] == {0: 5, 2: 10}
+    assert len(json.dumps(state)) < 10_000
@@ -0,0 +1,63 @@
+# test_pipeline.py
+import pytest
+from mips_sim import load_program, run_program
+
+# (source, cycles, instructions, stall cycles, flush cycles) under the default not-taken predictor.
+# With no hazards, N instructions take N + 4 cycles to leave WB.
+TIMING = {
+    "straight": ("main:\naddi R1 R0 1\naddi R2 R0 2\naddi R3 R0 3", 7, 3, 0, 0),
+    "load-use": (".data\na: .word 5\n.text\nmain:\nlw R1 0(R0)\nadd R2 R1 R1", 7, 2, 1, 0),
+    "load, gap, use": (".data\na: .word 5\n.text\nmain:\nlw R1 0(R0)\naddi R3 R0 3\nadd R2 R1 R1", 7, 3, 0, 0),
+    "ex/mem forwarding": ("main:\naddi R1 R0 1\nadd R2 R1 R1", 6, 2, 0, 0),
+    "mem/wb forwarding": ("main:\naddi R1 R0 1\naddi R4 R0 4\nadd R2 R1 R1", 7, 3, 0, 0),
+    "j": ("main:\nj X\naddi R1 R0 1\nX:\naddi R2 R0 2", 7, 2, 0, 1),
+    "jal and jr": ("main:\njal S\naddi R3 R0 3\nj E\nS:\naddi R2 R0 2\njr R7\nE:\naddi R4 R0 4", 14, 6, 0, 4),
+    "branch mispredicted": ("main:\nbeq R0 R0 T\naddi R1 R0 1\naddi R2 R0 2\nT:\naddi R3 R0 3", 8, 2, 0, 2),
+    "branch not taken": ("main:\nbne R0 R0 T\naddi R1 R0 1\nT:\naddi R3 R0 3", 7, 3, 0, 0),
+}
+
+@pytest.mark.parametrize("name", TIMING)
+def test_timing(name):
+    source, cycles, instructions, stalls, flushes = TIMING[name]
+    stats = run_program(source)["stats"]
+    assert (stats["cycles"], stats["instructions"], stats["stall_cycles"], stats["flush_cycles"]) == \
+        (cycles, instructions, stalls, flushes)
+    assert stats["cpi"] == pytest.approx(cycles / instructions)
+    assert stats["finished"]
+
+def _resolutions(source):
+    executor = load_program(source)
+    executor.live_updates = False
+    executor.run()
+    return [hazard.resolution for hazard in executor.pipeline.all_hazards]
+
+def test_forwarding_paths():
+    assert _resolutions("main:\naddi R1 R0 1\nadd R2 R1 R0") == ["Forwarding (EX/MEM)"]
+    assert _resolutions("main:\naddi R1 R0 1\naddi R4 R0 4\nadd R2 R1 R0") == ["Forwarding (MEM/WB)"]
+    assert _resolutions(".data\na: .word 5\n.text\nmain:\nlw R1 0(R0)\nadd R2 R1 R0") == \
+        ["Stall (load-use)", "Forwarding (MEM/WB)"]
+
+def test_forwarded_values_are_used():
+    registers = run_program(".data\na: .word 5\n.text\nmain:\nlw R1 0(R0)\nadd R2 R1 R1\n"
+                            "add R3 R2 R1\nsub R4 R3 R2")["registers"]
+    assert (registers["R1"], registers["R2"], registers["R3"], registers["R4"]) == (5, 10, 15, 5)
+
+def test_squashed_jump_is_not_counted():
+    # The j after a mispredicted beq is fetched and decoded, but never executes
+    state = run_program("main:\nbeq R0 R0 T\nj X\naddi R1 R0 1\nX:\naddi R2 R0 2\nT:\naddi R3 R0 3")
+    assert state["counters"]["jumps"] == 0
+    assert state["counters"]["control_flushed"] == 1
+    assert state["stats"]["flush_cycles"] == 2
+
+def test_hazard_info_limit_keeps_the_newest_hazards():
+    # Each instruction forwards from the one before it: six distinct hazards
+    executor = load_program("main:\n" + "".join(f"addi R{index + 1} R{index} 1\n" for index in range(7)))
+    executor.live_updates = False
+    executor.run()
+    pipeline = executor.pipeline
+    assert len(pipeline.all_hazards) == 6
+    newest = pipeline.get_hazard_info(0, limit=4)
+    assert (newest["start"], newest["total"], len(newest["all"])) == (2, 6, 4)
+    assert newest["all"][-1]["register"] == pipeline.all_hazards[-1].affected_register
+    assert pipeline.get_hazard_info(5, limit=4)["start"] == 5
+    assert len(pipeline.get_hazard_info(1)["all"]) == 5
@@ -0,0 +1,41 @@
+# test_program_cache.py
+import struct
+import program_cache
+from program_cache import ProgramCache, assemble_program, pack_program, unpack_program
+from mips_sim import main
+
+SOURCE = "\n".join([".data", "a: .word 5", "b: .word -2", ".text", "main:", "lw R1 0(R0)", "loop:",
+                    "add R2 R2 R1", "beq R2 R0 loop", "j done", "done:", "sw R2 2(R0)"])
+
+def _state(assembled):
+    program = assembled.program
+    return (program.instructions, program.symbols, program.labels_at, program.data, assembled.machine_words)
+
+def test_pack_round_trip():
+    assembled = assemble_program(SOURCE)
+    assert _state(unpack_program(pack_program(assembled))) == _state(assembled)
+
+def test_arrays_are_stored_little_endian():
+    assembled = assemble_program(SOURCE)
+    payload = pack_program(assembled)
+    header = program_cache._HEADER
+    _, _, _, string_count, blob_size, operand_count, instruction_count, _, _ = header.unpack_from(payload, 0)
+    lengths = struct.unpack_from(f"<{string_count}I", payload, header.size)
+    assert sum(lengths) == blob_size
+    offset = (header.size + 4 * string_count + blob_size + operand_count * program_cache._OPERAND.size
+              + instruction_count * program_cache._INSTRUCTION.size)
+    words = struct.unpack_from(f"<{instruction_count}i", payload, offset)
+    assert [None if word < 0 else word for word in words] == assembled.machine_words
+
+def test_cache_hit_and_encode_from_cached_words(tmp_path):
+    cache = ProgramCache(str(tmp_path / "cache"))
+    first = cache.load(SOURCE)
+    second = cache.load(SOURCE)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert _state(second) == _state(first)
+    source = tmp_path / "program.asm"
+    source.write_text(SOURCE)
+    plain, cached = tmp_path / "plain.bin", tmp_path / "cached.bin"
+    assert main(["encode", str(source), "-o", str(plain)]) == 0
+    assert main(["encode", str(source), "-o", str(cached), "--cache-dir", str(tmp_path / "cache")]) == 0
+    assert cached.read_bytes() == plain.read_bytes()
@@ -0,0 +1,84 @@
+# test_snapshot.py
+import json
+import pytest
+from mips_sim import load_program, main
+from snapshot import load_snapshot, restore_snapshot, save_snapshot, snapshot_bytes
+
+LOOP = "\n".join([".data", "step: .word 3", ".text", "main:", "li R1 9", "loop:", "lw R2 0(R0)",
+                  "add R4 R4 R2", "sw R4 2(R0)", "addi R1 R1 -1", "bne R1 R0 loop", "sw R1 4(R0)"])
+
+def make_executor(code=LOOP, **options):
+    executor = load_program(code, **options)
+    executor.live_updates = False
+    return executor
+
+def machine(executor):
+    pipeline = executor.pipeline
+    return (executor.commands.registers.tolist(), executor.memory.memory_state(),
+            pipeline.counters.values.tolist(), pipeline.hazard_counts)
+
+@pytest.mark.parametrize("paged", [False, True])
+@pytest.mark.parametrize("split", [0, 1, 4, 17, 40])
+def test_resumed_run_matches_a_straight_run(split, paged):
+    straight = make_executor(paged=paged)
+    straight.run()
+    first = make_executor(paged=paged)
+    first.run(split)
+    resumed = make_executor(paged=paged)
+    restore_snapshot(resumed, snapshot_bytes(first))
+    assert machine(resumed)[:3] == machine(first)[:3]
+    resumed.run()
+    assert resumed.is_finished()
+    assert machine(resumed) == machine(straight)
+
+def test_snapshot_file_round_trip(tmp_path):
+    path = str(tmp_path / "state.mss")
+    first = make_executor()
+    first.run(25)
+    save_snapshot(first, path)
+    resumed = make_executor()
+    load_snapshot(resumed, path)
+    assert machine(resumed) == machine(first)
+
+@pytest.mark.parametrize("code, options", [
+    (LOOP.replace("li R1 9", "li R1 8"), {}),
+    (LOOP, {"memory_size": 64}),
+    (LOOP, {"paged": True}),
+])
+def test_snapshot_of_another_machine_is_rejected(code, options):
+    first = make_executor()
+    first.run(10)
+    other = make_executor(code, **options)
+    before = machine(other)
+    with pytest.raises(ValueError):
+        restore_snapshot(other, snapshot_bytes(first))
+    assert machine(other) == before
+
+@pytest.mark.parametrize("damage", [lambda data: data[:-1], lambda data: data + b"\0",
+                                    lambda data: b"XXXX" + data[4:], lambda data: data[:10]])
+def test_corrupt_snapshot_is_rejected(damage):
+    first = make_executor()
+    first.run(10)
+    with pytest.raises(ValueError):
+        restore_snapshot(make_executor(), damage(snapshot_bytes(first)))
+
+def test_cli_resume_matches_a_straight_run(tmp_path, capsys):
+    source, path = tmp_path / "program.asm", tmp_path / "state.mss"
+    source.write_text(LOOP)
+    assert main(["run", str(source)]) == 0
+    straight = json.loads(capsys.readouterr().out)
+    assert main(["run", str(source), "--max-steps", "20", "--save-snapshot", str(path)]) == 1
+    capsys.readouterr()
+    assert main(["run", str(source), "--resume", str(path)]) == 0
+    resumed = json.loads(capsys.readouterr().out)
+    for key in ("registers", "memory", "stats", "counters"):
+        assert resumed[key] == straight[key]
+
+def test_cli_rejects_a_snapshot_of_another_program(tmp_path, capsys):
+    source, other, path = tmp_path / "program.asm", tmp_path / "other.asm", tmp_path / "state.mss"
+    source.write_text(LOOP)
+    other.write_text(LOOP.replace("li R1 9", "li R1 8"))
+    main(["run", str(source), "--max-steps", "5", "--save-snapshot", str(path)])
+    capsys.readouterr()
+    assert main(["run", str(other), "--resume", str(path)]) == 2
+    assert "different program" in capsys.readouterr().err